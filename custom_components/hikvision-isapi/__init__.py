@@ -1,23 +1,72 @@
+import asyncio
+from collections.abc import Mapping
 import logging
 import async_timeout
 from datetime import timedelta
 
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.const import ATTR_ENTITY_ID, EVENT_HOMEASSISTANT_STOP, Platform
 from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from hikvision_isapi_cli.errors import UnexpectedStatus
+from httpx import HTTPError
+import voluptuous as vol
 
-from .const import DOMAIN, MANUFACTURER, PLATFORMS, CONF_KEEPALIVE
+from .const import (
+    ATTR_COMMAND,
+    ATTR_QUERY,
+    CAPABILITY_RETRY_MAX,
+    CAPABILITY_RETRY_MIN,
+    CONNECTION_KEYS,
+    DEFAULT_MAX_REQUESTS,
+    DOMAIN,
+    DOOR_BULK_CONCURRENCY,
+    DOOR_COMMANDS,
+    MANUFACTURER,
+    PLATFORMS,
+    CONF_KEEPALIVE,
+    CONF_MAX_REQUESTS,
+    CONF_SNAPSHOT_MODE,
+    SERVICE_CONTROL_DOORS,
+    SERVICE_SEARCH_USERS,
+    SERVICE_SYNC_USERS,
+    SNAPSHOT_MODE_HTTP,
+    SNAPSHOT_MODE_RTSP,
+    STATUS_REFRESH_COOLDOWN,
+)
+from .acs_events import HikvisionAcsEventLog, async_remove_cursor
+from .event_snapshots import HikvisionEventSnapshotView
+from .handoff import async_get_handoff
 from .host import HikvisionHost
+from .isapi import remote_control_door
+from .prometheus import HikvisionMetricsView
+from .scheduler import RequestPriority, request_priority
+from .storage import HikvisionCapabilityCache
+from .users import HikvisionUserDirectory, async_remove_index
 
 PLATFORMS = [Platform.LOCK, Platform.CAMERA, Platform.SENSOR]
 _LOGGER = logging.getLogger(__name__)
 
+# Session.start and the capability documents fail with whatever the device
+# answers, not only with HTTP errors.
+_INIT_ERRORS = (UnexpectedStatus, HTTPError, AttributeError, KeyError, TypeError, ValueError)
+
 
 @dataclass
 class HikvisionData:
@@ -25,22 +74,221 @@ class HikvisionData:
 
     host: HikvisionHost
     device_coordinator: DataUpdateCoordinator
+    acs_events: HikvisionAcsEventLog | None = None
+    users: HikvisionUserDirectory | None = None
+    config: dict[str, Any] = field(default_factory=dict)
+
+
+def entry_config(config_entry: ConfigEntry) -> dict[str, Any]:
+    """Return the entry data with the options flow changes applied.
+
+    The address and login live in the data only, so that a config flow
+    updating them for an existing device is not overridden by options.
+    """
+    options = {
+        key: value
+        for key, value in config_entry.options.items()
+        if key not in CONNECTION_KEYS
+    }
+    return {**config_entry.data, **options}
+
+
+def _async_move_connection_options(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> None:
+    """Move an address or login saved by older options flows to the data."""
+    moved = {
+        key: value
+        for key, value in config_entry.options.items()
+        if key in CONNECTION_KEYS
+    }
+    if not moved:
+        return
+    hass.config_entries.async_update_entry(
+        config_entry,
+        data={**config_entry.data, **moved},
+        options={
+            key: value
+            for key, value in config_entry.options.items()
+            if key not in CONNECTION_KEYS
+        },
+    )
+
+
+def _async_migrate_snapshot_mode(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> None:
+    """Switch entries off the retired rtsp snapshot mode."""
+
+    def migrate(config: Mapping[str, Any]) -> Mapping[str, Any]:
+        if config.get(CONF_SNAPSHOT_MODE) != SNAPSHOT_MODE_RTSP:
+            return config
+        return {**config, CONF_SNAPSHOT_MODE: SNAPSHOT_MODE_HTTP}
+
+    data = migrate(config_entry.data)
+    options = migrate(config_entry.options)
+    if data is not config_entry.data or options is not config_entry.options:
+        hass.config_entries.async_update_entry(
+            config_entry, data=data, options=options
+        )
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Register the HTTP views and the services shared by every entry."""
+    hass.http.register_view(HikvisionMetricsView())
+    hass.http.register_view(HikvisionEventSnapshotView())
+
+    def _directories() -> list[tuple[HikvisionHost, HikvisionUserDirectory]]:
+        return [
+            (data.host, data.users)
+            for data in hass.data.get(DOMAIN, {}).values()
+            if data.users is not None
+        ]
+
+    async def async_search_users(call: ServiceCall) -> ServiceResponse:
+        """Look up users in the local index of every device."""
+        return {
+            "users": [
+                {"device": host.device_info["name"], "mac": host.unique_id, **user}
+                for host, users in _directories()
+                for user in users.search(call.data.get(ATTR_QUERY))
+            ]
+        }
+
+    async def async_sync_users(call: ServiceCall) -> ServiceResponse:
+        """Diff the index of every device with its database now."""
+        results: dict[str, Any] = {}
+        for host, users in _directories():
+            try:
+                added, changed, removed = await users.async_sync()
+            except (UnexpectedStatus, HTTPError) as err:
+                # One unreachable device does not fail the others.
+                results[host.unique_id] = {"error": str(err) or type(err).__name__}
+                continue
+            results[host.unique_id] = {
+                "added": added,
+                "changed": changed,
+                "removed": removed,
+            }
+        return results
+
+    async def async_control_doors(call: ServiceCall) -> ServiceResponse:
+        """Send one command to many doors at once, across every device."""
+        command = call.data[ATTR_COMMAND]
+        wanted = call.data.get(ATTR_ENTITY_ID)
+        registry = er.async_get(hass)
+        doors = [
+            (data, door, entity_id)
+            for data in hass.data.get(DOMAIN, {}).values()
+            for door in range(1, data.host.doors + 1)
+            if (
+                entity_id := registry.async_get_entity_id(
+                    Platform.LOCK, DOMAIN, f"{DOMAIN}-{data.host.unique_id}-{door}"
+                )
+            )
+            is not None
+            and (wanted is None or entity_id in wanted)
+        ]
+        # Each host scheduler still caps its own requests, door control
+        # goes ahead of anything else queued there.
+        semaphore = asyncio.Semaphore(DOOR_BULK_CONCURRENCY)
+
+        async def async_control(host: HikvisionHost, door: int) -> dict[str, Any]:
+            async with semaphore:
+                try:
+                    with request_priority(RequestPriority.DOOR_CONTROL):
+                        response = await remote_control_door(
+                            door, command, client=host.api
+                        )
+                except HTTPError as err:
+                    return {"success": False, "status": None, "error": str(err)}
+            return {
+                "success": response.status_code == HTTPStatus.OK,
+                "status": int(response.status_code),
+                "error": None,
+            }
+
+        results = await asyncio.gather(
+            *(async_control(data.host, door) for data, door, _ in doors)
+        )
+        for coordinator in {data.device_coordinator for data, _, _ in doors}:
+            hass.async_create_task(coordinator.async_request_refresh())
+        return {
+            "doors": [
+                {
+                    "entity_id": entity_id,
+                    "mac": data.host.unique_id,
+                    "door": door,
+                    **result,
+                }
+                for (data, door, entity_id), result in zip(doors, results)
+            ]
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SEARCH_USERS,
+        async_search_users,
+        schema=vol.Schema({vol.Optional(ATTR_QUERY): cv.string}),
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SYNC_USERS,
+        async_sync_users,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CONTROL_DOORS,
+        async_control_doors,
+        schema=vol.Schema(
+            {
+                vol.Required(ATTR_COMMAND): vol.In(DOOR_COMMANDS),
+                vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+            }
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Set up Hikvision from a config entry."""
-    host = HikvisionHost(hass, config_entry.data, config_entry.options)
+    _async_move_connection_options(hass, config_entry)
+    _async_migrate_snapshot_mode(hass, config_entry)
+    cache = HikvisionCapabilityCache(hass, config_entry.unique_id or config_entry.entry_id)
 
-    try:
-        if not await host.async_init():
+    config = entry_config(config_entry)
+    handed_off = async_get_handoff(hass).async_take(config)
+    host = handed_off or HikvisionHost(hass, config, config_entry.options)
+
+    cached = handed_off is None and await cache.async_restore(host)
+    if handed_off is not None:
+        # The config flow logged in and bootstrapped the host moments ago.
+        await cache.async_save(host)
+    elif cached:
+        # Entities are built from the cache, the device is checked later.
+        config_entry.async_create_background_task(
+            hass,
+            async_revalidate_capabilities(hass, config_entry, host, cache),
+            f"{DOMAIN} revalidate {host.hostname}",
+        )
+    else:
+        try:
+            ready = await host.async_init()
+        except _INIT_ERRORS as err:
+            await host.stop()
+            raise ConfigEntryNotReady(
+                f"Error while trying to setup {host.api.base_url}: {err!r}."
+            ) from err
+        if not ready:
+            await host.stop()
             raise ConfigEntryNotReady(
                 f"Error while trying to setup {host.api.base_url}: "
                 "failed to obtain data from device."
             )
-    except (UnexpectedStatus,) as err:
-        raise ConfigEntryNotReady(
-            f'Error while trying to setup {host.api.base_url}: "{str(err)}".'
-        ) from err
+        await cache.async_save(host)
 
     config_entry.async_on_unload(
         hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, host.stop)
@@ -48,26 +296,55 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
 
     async def async_device_config_update():
         """Update the host state cache."""
-        async with async_timeout.timeout(host.api.timeout):
-            await host.update_states()
+        try:
+            async with async_timeout.timeout(host.api.timeout):
+                return await host.update_states()
+        except HTTPError as err:
+            # Includes CircuitOpenError, raised without touching the network.
+            raise UpdateFailed(f"{host.hostname}: {err}") from err
 
     coordinator = DataUpdateCoordinator(
         hass,
         _LOGGER,
         name=f"{MANUFACTURER}.{host.device_info['name']}",
         update_method=async_device_config_update,
-        update_interval=timedelta(seconds=config_entry.data[CONF_KEEPALIVE]),
+        update_interval=timedelta(seconds=config[CONF_KEEPALIVE]),
+        # Door and tamper events ask for a refresh, they should not wait for
+        # the default ten second cooldown.
+        request_refresh_debouncer=Debouncer(
+            hass, _LOGGER, cooldown=STATUS_REFRESH_COOLDOWN, immediate=True
+        ),
     )
     # Fetch initial data so we have data when entities subscribe
-    await coordinator.async_config_entry_first_refresh()
+    if cached:
+        await coordinator.async_refresh()
+    else:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except ConfigEntryNotReady:
+            # The retry builds a new host, do not leak this session.
+            await host.stop()
+            raise
 
     hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = HikvisionData(
         host=host,
         device_coordinator=coordinator,
+        config=config,
     )
 
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
 
+    host.start()
+
+    if host.doors:
+        acs_events = HikvisionAcsEventLog(hass, host)
+        await acs_events.async_start()
+        hass.data[DOMAIN][config_entry.entry_id].acs_events = acs_events
+
+        users = HikvisionUserDirectory(hass, host)
+        await users.async_start()
+        hass.data[DOMAIN][config_entry.entry_id].users = users
+
     config_entry.async_on_unload(
         config_entry.add_update_listener(entry_update_listener)
     )
@@ -75,16 +352,60 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
     return True
 
 
+async def async_revalidate_capabilities(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    host: HikvisionHost,
+    cache: HikvisionCapabilityCache,
+) -> None:
+    """Connect to a host set up from cache and reload if it changed."""
+    cached = host.capabilities
+    retry = CAPABILITY_RETRY_MIN
+    while True:
+        try:
+            if await host.async_init():
+                break
+        except _INIT_ERRORS as err:
+            # Keep backing off instead of ending the revalidation.
+            _LOGGER.debug("Revalidation of %s failed: %r", host.hostname, err)
+        await asyncio.sleep(retry)
+        retry = min(retry * 2, CAPABILITY_RETRY_MAX)
+
+    if host.capabilities != cached:
+        _LOGGER.info("Capabilities of %s changed, reloading", host.hostname)
+        await cache.async_save(host)
+        hass.async_create_task(hass.config_entries.async_reload(config_entry.entry_id))
+
+
 async def entry_update_listener(hass: HomeAssistant, config_entry: ConfigEntry):
-    """Update the configuration of the host entity."""
-    await hass.config_entries.async_reload(config_entry.entry_id)
+    """Apply changed options in place, reconnect only for a new address or login."""
+    hikvision_data: HikvisionData = hass.data[DOMAIN][config_entry.entry_id]
+    config = entry_config(config_entry)
+    if any(config.get(key) != hikvision_data.config.get(key) for key in CONNECTION_KEYS):
+        await hass.config_entries.async_reload(config_entry.entry_id)
+        return
+
+    hikvision_data.config = config
+    host = hikvision_data.host
+    host.heartbeat.interval = config[CONF_KEEPALIVE]
+    host.scheduler.max_in_flight = config.get(CONF_MAX_REQUESTS, DEFAULT_MAX_REQUESTS)
+    coordinator = hikvision_data.device_coordinator
+    if coordinator.update_interval != timedelta(seconds=config[CONF_KEEPALIVE]):
+        coordinator.update_interval = timedelta(seconds=config[CONF_KEEPALIVE])
+        # The refresh schedules the next one with the new interval.
+        await coordinator.async_request_refresh()
+    async_dispatcher_send(hass, host.options_signal, config)
 
 
 async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    host: HikvisionHost = hass.data[DOMAIN][config_entry.entry_id].host
+    hikvision_data: HikvisionData = hass.data[DOMAIN][config_entry.entry_id]
 
-    await host.stop()
+    await hikvision_data.host.stop()
+    if hikvision_data.acs_events is not None:
+        await hikvision_data.acs_events.async_stop()
+    if hikvision_data.users is not None:
+        await hikvision_data.users.async_stop()
 
     if unload_ok := await hass.config_entries.async_unload_platforms(
         config_entry, PLATFORMS
@@ -92,3 +413,13 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
         hass.data[DOMAIN].pop(config_entry.entry_id)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    """Drop the capability cache and event log cursor of a removed entry."""
+    await HikvisionCapabilityCache(
+        hass, config_entry.unique_id or config_entry.entry_id
+    ).async_remove()
+    if config_entry.unique_id:
+        await async_remove_cursor(hass, config_entry.unique_id)
+        await async_remove_index(hass, config_entry.unique_id)
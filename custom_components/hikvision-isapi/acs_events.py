@@ -0,0 +1,193 @@
+"""Incremental sync of the access control event log."""
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from datetime import timedelta
+from http import HTTPStatus
+import logging
+from typing import Any
+import uuid
+
+import httpx
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+import homeassistant.util.dt as dt_util
+
+from .alert_stream import HikvisionEvent
+from .const import (
+    ACS_EVENT_COOLDOWN,
+    ACS_EVENT_PAGE_SIZE,
+    ACS_EVENT_POLL_INTERVAL,
+    DOMAIN,
+    EVENT_HIKVISION_ACS,
+)
+from .host import HikvisionHost
+from .isapi import AcsEventRecord, acs_event_search
+from .scheduler import RequestPriority, request_priority
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# Writes of the cursor are grouped, a crash replays at most this many seconds.
+STORAGE_SAVE_DELAY = 10
+
+
+def _store(hass: HomeAssistant, mac: str) -> Store:
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{mac.replace(':', '')}.acs_events")
+
+
+async def async_remove_cursor(hass: HomeAssistant, mac: str) -> None:
+    """Delete the persisted cursor of a device."""
+    await _store(hass, mac).async_remove()
+
+
+class HikvisionAcsEventLog:
+    """Fire the new records of the device event log on the event bus.
+
+    The log is paged with searchResultPosition from a persisted high-water
+    mark, the time and serialNo of the last fired record, so only records
+    newer than the mark are read and at most one page is held in memory.
+    A first sync starts at the current time instead of replaying the log.
+    """
+
+    def __init__(self, hass: HomeAssistant, host: HikvisionHost) -> None:
+        """Initialize the event log of the host."""
+        self._hass = hass
+        self._host = host
+        self._store = _store(hass, host.unique_id)
+        self._time: str | None = None
+        self._serial_no: int | None = None
+        self._supported = True
+        self._debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=ACS_EVENT_COOLDOWN,
+            immediate=True,
+            function=self.async_sync,
+        )
+        self._unsubs: list[CALLBACK_TYPE] = []
+
+    async def async_start(self) -> None:
+        """Load the cursor and sync on events and on a slow interval."""
+        if cursor := await self._store.async_load():
+            self._time = cursor["time"]
+            self._serial_no = cursor.get("serial_no")
+        else:
+            self._time = dt_util.now().replace(microsecond=0).isoformat()
+
+        self._unsubs = [
+            async_dispatcher_connect(
+                self._hass, self._host.event_signal, self._handle_event
+            ),
+            async_track_time_interval(
+                self._hass,
+                self._async_poll,
+                timedelta(seconds=ACS_EVENT_POLL_INTERVAL),
+                name=f"{DOMAIN} AcsEvent {self._host.hostname}",
+            ),
+        ]
+        self._hass.async_create_task(self._debouncer.async_call())
+
+    async def async_stop(self) -> None:
+        """Stop syncing and flush the cursor."""
+        while self._unsubs:
+            self._unsubs.pop()()
+        self._debouncer.async_cancel()
+        if self._time is not None:
+            await self._store.async_save(self._cursor())
+
+    @callback
+    def _handle_event(self, event: HikvisionEvent) -> None:
+        """Read the log as soon as the alertStream reports a new record."""
+        if event.major is not None:
+            self._hass.async_create_task(self._debouncer.async_call())
+
+    async def _async_poll(self, _now) -> None:
+        await self._debouncer.async_call()
+
+    async def async_sync(self) -> None:
+        """Fire every record newer than the cursor."""
+        if not self._supported or self._time is None:
+            return
+        try:
+            async for record in self._async_records():
+                if not self._is_new(record):
+                    continue
+                self._time = record.time
+                self._serial_no = record.serial_no
+                self._fire(record)
+                self._store.async_delay_save(self._cursor, STORAGE_SAVE_DELAY)
+        except httpx.HTTPError as err:
+            # The next event or poll resumes from the cursor.
+            _LOGGER.debug("AcsEvent sync of %s interrupted: %s", self._host.hostname, err)
+
+    async def _async_records(self) -> AsyncIterator[AcsEventRecord]:
+        """Page through the records from the cursor time, oldest first."""
+        search_id = uuid.uuid4().hex
+        start_time = self._time
+        position = 0
+        while True:
+            with request_priority(RequestPriority.EVENTS):
+                response = await acs_event_search(
+                    client=self._host.api,
+                    search_id=search_id,
+                    position=position,
+                    max_results=ACS_EVENT_PAGE_SIZE,
+                    start_time=start_time,
+                )
+            if response.status_code in (HTTPStatus.NOT_FOUND, HTTPStatus.FORBIDDEN):
+                _LOGGER.info("%s has no access control event log", self._host.hostname)
+                self._supported = False
+                return
+            if response.status_code != HTTPStatus.OK or response.parsed is None:
+                _LOGGER.warning(
+                    "AcsEvent search on %s failed: %s",
+                    self._host.hostname,
+                    response.status_code,
+                )
+                return
+
+            page = response.parsed
+            for record in page.records:
+                yield record
+            if not page.more or not page.records:
+                return
+            position += len(page.records)
+
+    def _is_new(self, record: AcsEventRecord) -> bool:
+        """Compare the record with the high-water mark."""
+        if record.serial_no is not None and self._serial_no is not None:
+            return record.serial_no > self._serial_no
+        # Without serial numbers records of the cursor second are dropped.
+        record_time = dt_util.parse_datetime(record.time)
+        cursor_time = dt_util.parse_datetime(self._time)
+        if (
+            record_time is None
+            or cursor_time is None
+            or (record_time.tzinfo is None) != (cursor_time.tzinfo is None)
+        ):
+            return record.time > self._time
+        return record_time > cursor_time
+
+    def _cursor(self) -> dict[str, Any]:
+        return {"time": self._time, "serial_no": self._serial_no}
+
+    def _fire(self, record: AcsEventRecord) -> None:
+        self._hass.bus.async_fire(
+            EVENT_HIKVISION_ACS,
+            {
+                "mac": self._host.unique_id,
+                "serial_no": record.serial_no,
+                "major": record.major,
+                "minor": record.minor,
+                "time": record.time,
+                "door": record.door,
+                "card_no": record.card_no,
+                "name": record.name,
+                "employee_no": record.employee_no,
+            },
+        )
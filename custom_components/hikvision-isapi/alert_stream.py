@@ -0,0 +1,276 @@
+"""Long-lived subscription to the ISAPI alertStream."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+import json
+import logging
+import re
+from xml.parsers.expat import ExpatError
+
+import httpx
+from hikvision_isapi_cli.client import Client
+
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .const import (
+    ACS_EVENT_KINDS,
+    ALERT_STREAM_READ_TIMEOUT,
+    ALERT_STREAM_RETRY_MAX,
+    ALERT_STREAM_RETRY_MIN,
+    CALL_EVENT_TYPES,
+    EVENT_KIND_CALL,
+    EVENT_KIND_MOTION,
+    EVENT_KIND_TAMPER,
+    MOTION_EVENT_TYPES,
+    TAMPER_EVENT_TYPES,
+)
+from .fastxml import scan
+
+_LOGGER = logging.getLogger(__name__)
+
+ALERT_STREAM_PATH = "/ISAPI/Event/notification/alertStream"
+_BOUNDARY = re.compile(r'boundary="?([^";]+)"?', re.IGNORECASE)
+
+# The only fields read from an XML EventNotificationAlert.
+_ALERT_FIELDS = frozenset(("eventType", "eventState", "channelID", "dateTime"))
+_ACS_FIELDS = frozenset(("majorEventType", "subEventType", "doorNo"))
+_XML_EVENT_FIELDS = _ALERT_FIELDS | _ACS_FIELDS
+
+
+@dataclass
+class HikvisionEvent:
+    """A single EventNotificationAlert received from the device."""
+
+    kind: str | None
+    event_type: str
+    state: str | None = None
+    channel: int | None = None
+    door: int | None = None
+    major: int | None = None
+    minor: int | None = None
+    date_time: str | None = None
+
+
+class MultipartParser:
+    """Incremental multipart/mixed parser.
+
+    Bytes are fed as they arrive and complete parts are returned as soon as
+    their body is available, the stream is never buffered past one part.
+    """
+
+    def __init__(self, boundary: str) -> None:
+        """Initialize the parser for the given boundary."""
+        self._delimiter = b"--" + boundary.encode()
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> list[tuple[dict[str, str], bytes]]:
+        """Consume a chunk and return the parts it completed."""
+        self._buffer += data
+        parts = []
+        while (part := self._next_part()) is not None:
+            parts.append(part)
+        return parts
+
+    def _next_part(self) -> tuple[dict[str, str], bytes] | None:
+        buffer = self._buffer
+        start = buffer.find(self._delimiter)
+        if start < 0:
+            # Keep only what could be the beginning of a split delimiter.
+            del buffer[: max(len(buffer) - len(self._delimiter), 0)]
+            return None
+
+        header_end = buffer.find(b"\r\n\r\n", start)
+        if header_end < 0:
+            return None
+
+        headers = {}
+        raw_headers = bytes(buffer[start + len(self._delimiter) : header_end])
+        for line in raw_headers.decode("latin-1").split("\r\n"):
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+
+        body_start = header_end + 4
+        length = headers.get("content-length", "")
+        if length.isdigit():
+            body_end = body_start + int(length)
+            if len(buffer) < body_end:
+                return None
+            body = bytes(buffer[body_start:body_end])
+        else:
+            body_end = buffer.find(self._delimiter, body_start)
+            if body_end < 0:
+                return None
+            body = bytes(buffer[body_start:body_end]).rstrip(b"\r\n")
+
+        del buffer[:body_end]
+        return headers, body
+
+
+def _int(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def classify(event_type: str, major: int | None, minor: int | None) -> str | None:
+    """Map an event to one of the EVENT_KIND_* constants."""
+    if major is not None and minor is not None:
+        if kind := ACS_EVENT_KINDS.get((major, minor)):
+            return kind
+    event_type = event_type.lower()
+    if event_type in CALL_EVENT_TYPES:
+        return EVENT_KIND_CALL
+    if event_type in TAMPER_EVENT_TYPES:
+        return EVENT_KIND_TAMPER
+    if event_type in MOTION_EVENT_TYPES:
+        return EVENT_KIND_MOTION
+    return None
+
+
+def parse_event(content_type: str, body: bytes) -> HikvisionEvent | None:
+    """Parse an alertStream part, XML or JSON depending on the firmware."""
+    if "json" in content_type:
+        alert = json.loads(body)
+    elif "xml" in content_type:
+        fields = scan(body, _XML_EVENT_FIELDS)
+        if fields.root != "EventNotificationAlert":
+            return None
+        alert = {name: fields.get(name) for name in _ALERT_FIELDS if name in fields}
+        alert["AccessControllerEvent"] = {
+            name: fields.get(name) for name in _ACS_FIELDS if name in fields
+        }
+    else:
+        return None
+
+    # Any JSON document parses, only an object with a textual eventType is
+    # an alert.
+    if not isinstance(alert, dict) or not isinstance(alert.get("eventType"), str):
+        return None
+
+    acs = alert.get("AccessControllerEvent")
+    if not isinstance(acs, dict):
+        acs = {}
+    major = _int(acs.get("majorEventType"))
+    minor = _int(acs.get("subEventType"))
+    event_type = alert["eventType"]
+
+    return HikvisionEvent(
+        kind=classify(event_type, major, minor),
+        event_type=event_type,
+        state=alert.get("eventState"),
+        channel=_int(alert.get("channelID")),
+        door=_int(acs.get("doorNo")),
+        major=major,
+        minor=minor,
+        date_time=alert.get("dateTime"),
+    )
+
+
+class HikvisionAlertStream:
+    """Keep an alertStream connection open and dispatch parsed events."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: Client,
+        callback: Callable[[HikvisionEvent], None],
+    ) -> None:
+        """Initialize the alert stream subscription."""
+        self._hass = hass
+        self._client = client
+        self._callback = callback
+        self._task: asyncio.Task | None = None
+        self._retry = ALERT_STREAM_RETRY_MIN
+        self.connected = False
+        self.events = 0
+        self.lag: float | None = None
+
+    @property
+    def running(self) -> bool:
+        """Return True while the subscription task is alive."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the subscription in the background."""
+        if self.running:
+            return
+        self._task = self._hass.async_create_background_task(
+            self._async_run(), f"hikvision alertStream {self._client.base_url}"
+        )
+
+    async def stop(self) -> None:
+        """Cancel the subscription."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _async_run(self) -> None:
+        """Reconnect forever, backing off while the device is unreachable."""
+        self._retry = ALERT_STREAM_RETRY_MIN
+        while True:
+            try:
+                await self._async_listen()
+            except (httpx.HTTPError, ValueError) as err:
+                _LOGGER.debug(
+                    "alertStream of %s interrupted: %s", self._client.base_url, err
+                )
+            await asyncio.sleep(self._retry)
+            self._retry = min(self._retry * 2, ALERT_STREAM_RETRY_MAX)
+
+    async def _async_listen(self) -> None:
+        """Read the multipart stream until the device closes it."""
+        async with self._client._asyncio_api.stream(
+            "GET",
+            f"{self._client.base_url}{ALERT_STREAM_PATH}",
+            headers=self._client.get_headers(),
+            cookies=self._client.get_cookies(),
+            timeout=httpx.Timeout(
+                self._client.get_timeout(), read=ALERT_STREAM_READ_TIMEOUT
+            ),
+        ) as response:
+            response.raise_for_status()
+            # Only failed connection attempts back off, a stream that drops
+            # or idles out after connecting is reopened after the shortest delay.
+            self._retry = ALERT_STREAM_RETRY_MIN
+            self.connected = True
+            try:
+                await self._async_read(response)
+            finally:
+                self.connected = False
+
+    async def _async_read(self, response: httpx.Response) -> None:
+        """Parse the parts of an open alertStream response."""
+        match = _BOUNDARY.search(response.headers.get("content-type", ""))
+        if match is None:
+            raise ValueError("alertStream response is not multipart")
+
+        parser = MultipartParser(match.group(1))
+        async for chunk in response.aiter_bytes():
+            for headers, body in parser.feed(chunk):
+                try:
+                    event = parse_event(headers.get("content-type", ""), body)
+                except (ExpatError, ValueError) as err:
+                    _LOGGER.debug("Unparsable alertStream part: %s", err)
+                    continue
+                if event is not None:
+                    self._measure(event)
+                    self._callback(event)
+
+    def _measure(self, event: HikvisionEvent) -> None:
+        """Count the event and how late it arrived, by the device clock."""
+        self.events += 1
+        if event.date_time is None:
+            return
+        date_time = dt_util.parse_datetime(event.date_time)
+        if date_time is not None and date_time.tzinfo is not None:
+            self.lag = (dt_util.utcnow() - date_time).total_seconds()
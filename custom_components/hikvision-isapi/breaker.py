@@ -0,0 +1,104 @@
+"""Circuit breaker guarding the requests sent to one device."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from enum import StrEnum
+import logging
+import time
+
+import httpx
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CircuitState(StrEnum):
+    """States of the circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of sending a request to a device known to be down."""
+
+
+class CircuitBreaker:
+    """Fail fast once a device stopped answering.
+
+    After ``failure_threshold`` consecutive transport errors the circuit
+    opens and requests fail immediately. Once ``reset_timeout`` has elapsed a
+    single probe request is let through, its outcome closes or reopens the
+    circuit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        on_change: Callable[[CircuitState], None] | None = None,
+    ) -> None:
+        """Initialize the breaker."""
+        self._name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._on_change = on_change
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> CircuitState:
+        """Return the current state."""
+        if (
+            self._state == CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self._reset_timeout
+        ):
+            return CircuitState.HALF_OPEN
+        return self._state
+
+    def before_request(self) -> bool:
+        """Admit a request, return True when it is the half-open probe."""
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return False
+        if state == CircuitState.HALF_OPEN and not self._probing:
+            self._probing = True
+            self._set_state(CircuitState.HALF_OPEN)
+            return True
+        raise CircuitOpenError(f"{self._name} is unreachable, circuit is {state}")
+
+    def check(self) -> None:
+        """Raise unless the circuit is closed, without claiming the probe."""
+        if (state := self.state) != CircuitState.CLOSED:
+            raise CircuitOpenError(f"{self._name} is unreachable, circuit is {state}")
+
+    def record_success(self, probe: bool = False) -> None:
+        """Close the circuit after an answered request."""
+        if probe:
+            self._probing = False
+        self._failures = 0
+        self._set_state(CircuitState.CLOSED)
+
+    def record_failure(self, probe: bool = False) -> None:
+        """Count a transport error, opening the circuit when needed."""
+        self._failures += 1
+        if probe:
+            self._probing = False
+        if probe or self._failures >= self._failure_threshold:
+            self._opened_at = time.monotonic()
+            self._set_state(CircuitState.OPEN)
+
+    def cancel_probe(self) -> None:
+        """Let another request probe the device."""
+        self._probing = False
+
+    def _set_state(self, state: CircuitState) -> None:
+        if state == self._state:
+            return
+        _LOGGER.info("Circuit of %s is now %s", self._name, state)
+        self._state = state
+        if self._on_change is not None:
+            self._on_change(state)
@@ -1,25 +1,32 @@
 """This component provides support for Hikvision IP cameras."""
 from __future__ import annotations
-from calendar import c
 
+from http import HTTPStatus
 import logging
+from typing import Any
+
+from aiohttp import web
+import httpx
 
 from homeassistant.components.camera import Camera, CameraEntityFeature
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from hikvision_isapi_cli.api.isapi import get_isapi_streaming_channels as streaming
-from hikvision_isapi_cli.models import (
-    RootTypeForXMLStreamingChannelListStreamingChannelList,
-    RootTypeForXMLStreamingChannel,
-)
+from hikvision_isapi_cli.models import RootTypeForXMLStreamingChannel
 from hikvision_isapi_sk.snap import RtspClient
 
 from . import HikvisionData
-from .const import DOMAIN, MANUFACTURER
+from .alert_stream import HikvisionEvent
+from .channels import CameraChannels
+from .const import DOMAIN, EVENT_SNAPSHOT_KINDS, MANUFACTURER, SNAPSHOT_MODE_HTTP
 from .entity import HikvisionCoordinatorEntity
+from .event_snapshots import EventSnapshots
+from .isapi import picture
+from .scheduler import RequestPriority, request_priority
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,18 +40,33 @@ async def async_setup_entry(
     hikvision_data: HikvisionData = hass.data[DOMAIN][config_entry.entry_id]
     host = hikvision_data.host
 
+    entity_registry = er.async_get(hass)
     cameras = []
-    channels: RootTypeForXMLStreamingChannelListStreamingChannelList = (
-        await streaming.asyncio(client=host.api)
-    )
-    for channel in channels.streaming_channel_list.streaming_channel:
-        cameras.append(HikvisionCamera(hikvision_data, config_entry, channel))
+    for channels in host.cameras:
+        cameras.append(HikvisionCamera(hikvision_data, config_entry, channels))
+        # Sub-streams used to be cameras of their own.
+        if channels.sub is not None and (
+            entity_id := entity_registry.async_get_entity_id(
+                "camera", DOMAIN, _unique_id(host.unique_id, channels.sub)
+            )
+        ):
+            entity_registry.async_remove(entity_id)
 
     async_add_entities(cameras, update_before_add=True)
 
 
+def _unique_id(mac: str, channel: RootTypeForXMLStreamingChannel) -> str:
+    return f"{mac}_{channel.id}_{channel.channel_name}"
+
+
 class HikvisionCamera(HikvisionCoordinatorEntity, Camera):
-    """An implementation of a Hikvision IP camera."""
+    """An implementation of a Hikvision IP camera.
+
+    Recording and full-screen streams use the main stream, snapshots and
+    the MJPEG preview use the sub-stream when the camera has one. Call,
+    motion and door events capture a frame right away, so the image is
+    ready when a notification or dashboard asks for it.
+    """
 
     _attr_supported_features: CameraEntityFeature = CameraEntityFeature.STREAM
     _attr_has_entity_name = True
@@ -53,37 +75,129 @@ class HikvisionCamera(HikvisionCoordinatorEntity, Camera):
         self,
         hikvision_data: HikvisionData,
         config_entry: ConfigEntry,
-        channel: RootTypeForXMLStreamingChannel,
+        channels: CameraChannels,
     ) -> None:
         """Initialize Hikvision camera stream."""
         HikvisionCoordinatorEntity.__init__(self, hikvision_data, config_entry)
         Camera.__init__(self)
 
+        channel = channels.main
         self._stream = channel
+        self._channels = channels
         self._attr_name = f"{channel.channel_name}_{channel.video.constant_bit_rate}"
-        self._attr_unique_id = (
-            f"{self._host.unique_id}_{channel.id}_{channel.channel_name}"
-        )
+        self._attr_unique_id = _unique_id(self._host.unique_id, channel)
         self._attr_entity_registry_enabled_default = bool(channel.enabled)
+        # The stream source is resolved once, up front.
         self._rtsp = RtspClient(
             client=self._host.api,
             rtsp_port=554,
-            path=f"ISAPI/streaming/channels/{self._stream.id}",
+            path=f"ISAPI/streaming/channels/{channel.id}",
         )
+        self._snapshot_source: str | None = None
+        self._event_snapshots = EventSnapshots()
+        # Intercoms report their single camera under varying channel ids.
+        self._any_channel = len(self._host.cameras) == 1
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the device events."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, self._host.event_signal, self._handle_event
+            )
+        )
+
+    @callback
+    def _handle_event(self, event: HikvisionEvent) -> None:
+        """Capture a frame as soon as the event reaches the alertStream."""
+        if event.kind not in EVENT_SNAPSHOT_KINDS or event.state == "inactive":
+            return
+        if not self._any_channel and event.channel != self._channels.camera:
+            return
+        if self._event_snapshots.claim(event.kind):
+            self.hass.async_create_task(self._async_capture(event.kind))
+
+    async def _async_capture(self, kind: str) -> None:
+        """Fetch a frame newer than the event into the ring buffer."""
+        try:
+            # The frame lands in the snapshot cache under the full-size key,
+            # sized and unsized requests made meanwhile or just after use it.
+            image = await self._async_image(None, None, max_age=0)
+        except httpx.HTTPError as err:
+            _LOGGER.debug("Event snapshot of %s failed: %s", self.entity_id, err)
+            return
+        if image:
+            self._event_snapshots.add(kind, image)
+            self.async_write_ha_state()
+
+    @property
+    def event_snapshots(self) -> EventSnapshots:
+        """Return the frames captured on the latest events."""
+        return self._event_snapshots
 
     async def stream_source(self) -> str | None:
-        """Return the source of the stream."""
+        """Return the main stream, for recording and full-screen viewing."""
         return self._rtsp.stream_source()
 
-    # async def async_camera_image(
-    #     self, width: int | None = None, height: int | None = None
-    # ) -> bytes | None:
-    #     """Return a still image response from the camera."""
-    #     return await self._rtsp.get_snapshot()
+    async def handle_async_mjpeg_stream(
+        self, request: web.Request
+    ) -> web.StreamResponse | None:
+        """Relay the device httpPreview, or fall back to snapshots."""
+        if response := await self._host.previews.async_handle(
+            request, self._channels.preview.id
+        ):
+            return response
+        return await super().handle_async_mjpeg_stream(request)
+
     async def async_camera_image(
         self, width: int | None = None, height: int | None = None
     ) -> bytes | None:
-        return self._rtsp.get_snapshot(self._stream.id)
+        """Return a still image, from the sub-stream unless it is too small."""
+        return await self._async_image(width, height)
+
+    async def _async_image(
+        self, width: int | None, height: int | None, max_age: float | None = None
+    ) -> bytes | None:
+        channel_id = self._channels.for_size(width, height).id
+        # A fresh or in-flight full frame of the channel, such as the one
+        # captured on an event, serves sized requests too: the camera
+        # component scales JPEGs locally.
+        if (width or height) and max_age is None:
+            if image := await self._host.snapshots.async_peek(
+                (channel_id, None, None)
+            ):
+                return image
+        return await self._host.snapshots.async_get(
+            (channel_id, width, height),
+            lambda: self._async_fetch_picture(channel_id, width, height),
+            max_age,
+        )
+
+    async def _async_fetch_picture(
+        self, channel_id: str, width: int | None, height: int | None
+    ) -> bytes | None:
+        """Fetch a device-scaled JPEG through the ISAPI picture endpoint."""
+        with request_priority(RequestPriority.SNAPSHOT):
+            response = await picture(
+                channel_id, client=self._host.api, width=width, height=height
+            )
+        if response.status_code != HTTPStatus.OK:
+            # The body is a ResponseStatus document, never cache it as a frame.
+            _LOGGER.error(
+                "Snapshot of channel %s failed: %s", channel_id, response.status_code
+            )
+            return None
+        self._snapshot_source = SNAPSHOT_MODE_HTTP
+        return response.content
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the path taken by the last snapshot and the sub-stream."""
+        return super().extra_state_attributes | {
+            "snapshot_source": self._snapshot_source,
+            "sub_stream": self._channels.sub.id if self._channels.sub else None,
+            "event_snapshots": self._event_snapshots.as_list(),
+        }
 
     @property
     def device_info(self) -> DeviceInfo:
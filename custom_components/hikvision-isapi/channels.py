@@ -0,0 +1,84 @@
+"""Grouping of the streaming channels by camera."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from hikvision_isapi_cli.models import RootTypeForXMLStreamingChannel
+from hikvision_isapi_cli.types import Unset
+
+MAIN_STREAM = 1
+SUB_STREAM = 2
+
+
+def _split(channel: RootTypeForXMLStreamingChannel) -> tuple[int, int] | None:
+    """Return the camera and stream numbers, 1 and 2 for channel 102."""
+    try:
+        return divmod(int(channel.id), 100)
+    except (TypeError, ValueError):
+        return None
+
+
+def _resolution(channel: RootTypeForXMLStreamingChannel) -> tuple[int, int] | None:
+    video = channel.video
+    if isinstance(video, Unset):
+        return None
+    try:
+        return int(video.video_resolution_width), int(video.video_resolution_height)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class CameraChannels:
+    """The streams of one camera.
+
+    The main stream keeps the full resolution for recording and full-screen
+    viewing, the sub-stream serves thumbnails, snapshots and previews.
+    """
+
+    camera: int | None
+    main: RootTypeForXMLStreamingChannel
+    sub: RootTypeForXMLStreamingChannel | None = None
+
+    @property
+    def preview(self) -> RootTypeForXMLStreamingChannel:
+        """Return the channel of the live preview."""
+        return self.sub or self.main
+
+    def for_size(
+        self, width: int | None = None, height: int | None = None
+    ) -> RootTypeForXMLStreamingChannel:
+        """Return the sub-stream unless the requested size exceeds it."""
+        if self.sub is None:
+            return self.main
+        if (resolution := _resolution(self.sub)) is None:
+            return self.sub
+        if (width or 0) > resolution[0] or (height or 0) > resolution[1]:
+            return self.main
+        return self.sub
+
+
+def group_channels(
+    channels: list[RootTypeForXMLStreamingChannel],
+) -> list[CameraChannels]:
+    """Pair the main stream x01 of every camera with its sub-stream x02.
+
+    Cameras without an x01 channel use their lowest stream as main, channels
+    with a non numeric id are cameras of their own.
+    """
+    cameras: dict[int, dict[int, RootTypeForXMLStreamingChannel]] = {}
+    grouped = []
+    for channel in channels:
+        if (numbers := _split(channel)) is None:
+            grouped.append(CameraChannels(None, channel))
+            continue
+        camera, stream = numbers
+        cameras.setdefault(camera, {})[stream] = channel
+
+    for camera, streams in sorted(cameras.items()):
+        main = streams.get(MAIN_STREAM) or streams[min(streams)]
+        sub = streams.get(SUB_STREAM)
+        if sub is main or (sub is not None and sub.enabled == "false"):
+            sub = None
+        grouped.append(CameraChannels(camera, main, sub))
+    return grouped
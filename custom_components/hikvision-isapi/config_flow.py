@@ -1,6 +1,8 @@
 """Config flow for the Hikvision component."""
 from __future__ import annotations
 
+import asyncio
+from ipaddress import ip_network
 import logging
 from typing import Any
 
@@ -9,25 +11,36 @@ import voluptuous as vol
 from homeassistant import config_entries, core, exceptions
 from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_PORT, CONF_USERNAME
 from homeassistant.core import callback
-from homeassistant.data_entry_flow import FlowResult
+from homeassistant.data_entry_flow import FlowResult, UnknownFlow
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.schema_config_entry_flow import (
     SchemaFlowFormStep,
 )
 
 from .const import (
+    CONF_DEVICE,
+    CONF_NETWORK,
+    CONNECTION_KEYS,
     CONF_VERIFY_SSL,
     CONF_DOOR_LATCH,
     DOMAIN,
     CONF_KEEPALIVE,
+    CONF_MAX_REQUESTS,
+    CONF_SNAPSHOT_MODE,
     DEFAULT_USERNAME,
     DEFAULT_HOST,
     DEFAULT_PORT,
     DEFAULT_VERIFY_SSL,
     DEFAULT_DOOR_LATCH,
     DEFAULT_KEEPALIVE,
+    DEFAULT_MAX_REQUESTS,
+    DEFAULT_SNAPSHOT_MODE,
+    SNAPSHOT_MODES,
 )
 
+from . import entry_config
+from .discovery import DiscoveredDevice, async_discover, probe_targets
+from .handoff import async_get_handoff
 from .host import HikvisionHost
 
 _LOGGER = logging.getLogger(__name__)
@@ -41,6 +54,23 @@ OPTIONS_SCHEMA = vol.Schema(
         vol.Optional(CONF_VERIFY_SSL, default=DEFAULT_VERIFY_SSL): cv.boolean,
         vol.Optional(CONF_DOOR_LATCH, default=DEFAULT_DOOR_LATCH): cv.positive_int,
         vol.Optional(CONF_KEEPALIVE, default=DEFAULT_KEEPALIVE): cv.positive_int,
+        vol.Optional(CONF_SNAPSHOT_MODE, default=DEFAULT_SNAPSHOT_MODE): vol.In(
+            SNAPSHOT_MODES
+        ),
+        vol.Optional(CONF_MAX_REQUESTS, default=DEFAULT_MAX_REQUESTS): cv.positive_int,
+    }
+)
+DISCOVERY_SCHEMA = vol.Schema(
+    {
+        vol.Required(
+            CONF_NETWORK,
+            default=str(
+                ip_network(f"{DEFAULT_HOST.removeprefix('http://')}/24", strict=False)
+            ),
+        ): cv.string,
+        vol.Required(CONF_PORT, default=DEFAULT_PORT): cv.positive_int,
+        vol.Required(CONF_USERNAME, default=DEFAULT_USERNAME): cv.string,
+        vol.Required(CONF_PASSWORD): cv.string,
     }
 )
 OPTIONS_FLOW = {
@@ -48,6 +78,37 @@ OPTIONS_FLOW = {
 }
 
 
+def _options_schema(config: dict[str, Any]) -> vol.Schema:
+    """Return the options form prefilled with the current config."""
+    return vol.Schema(
+        {
+            vol.Required(
+                CONF_USERNAME, default=config.get(CONF_USERNAME, DEFAULT_USERNAME)
+            ): cv.string,
+            vol.Required(CONF_PASSWORD, default=config.get(CONF_PASSWORD)): cv.string,
+            vol.Required(CONF_HOST, default=config.get(CONF_HOST, DEFAULT_HOST)): cv.string,
+            vol.Required(CONF_PORT, default=config.get(CONF_PORT, DEFAULT_PORT)): cv.positive_int,
+            vol.Optional(
+                CONF_VERIFY_SSL, default=config.get(CONF_VERIFY_SSL, DEFAULT_VERIFY_SSL)
+            ): cv.boolean,
+            vol.Optional(
+                CONF_DOOR_LATCH, default=config.get(CONF_DOOR_LATCH, DEFAULT_DOOR_LATCH)
+            ): cv.positive_int,
+            vol.Optional(
+                CONF_KEEPALIVE, default=config.get(CONF_KEEPALIVE, DEFAULT_KEEPALIVE)
+            ): cv.positive_int,
+            vol.Optional(
+                CONF_SNAPSHOT_MODE,
+                default=config.get(CONF_SNAPSHOT_MODE, DEFAULT_SNAPSHOT_MODE),
+            ): vol.In(SNAPSHOT_MODES),
+            vol.Optional(
+                CONF_MAX_REQUESTS,
+                default=config.get(CONF_MAX_REQUESTS, DEFAULT_MAX_REQUESTS),
+            ): cv.positive_int,
+        }
+    )
+
+
 class HikvisionOptionsFlow(config_entries.OptionsFlow):
     """Handle options."""
 
@@ -57,83 +118,53 @@ class HikvisionOptionsFlow(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input=None):
         """Manage the options."""
-        if user_input is not None:
-            errors = {}
-            placeholders = {}
-            try:
-                host = await async_obtain_host_settings(self.hass, user_input)
+        errors = {}
+        placeholders = {}
+        config = entry_config(self.config_entry)
 
-            except CannotConnect:
-                errors[CONF_HOST] = "cannot_connect"
-            except CredentialsInvalidError:
-                errors[CONF_HOST] = "invalid_auth"
-            except Exception as err:  # pylint: disable=broad-except
-                _LOGGER.exception("Unexpected exception")
-                placeholders["error"] = str(err)
-                errors[CONF_HOST] = "unknown"
-            return self.async_create_entry(
-                title=str(host.device_info["name"]), data=user_input
-            )
+        if user_input is not None:
+            # Only a new address or login needs the device to be checked.
+            if any(user_input.get(key) != config.get(key) for key in CONNECTION_KEYS):
+                try:
+                    host = await async_obtain_host_settings(self.hass, user_input)
+                except CannotConnect:
+                    errors[CONF_HOST] = "cannot_connect"
+                except CredentialsInvalidError:
+                    errors[CONF_HOST] = "invalid_auth"
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOGGER.exception("Unexpected exception")
+                    placeholders["error"] = str(err)
+                    errors[CONF_HOST] = "unknown"
+                else:
+                    async_get_handoff(self.hass).async_put(user_input, host)
+            if not errors:
+                # The address and login go to the data, where a config flow
+                # finding the device again updates them.
+                options = {
+                    key: value
+                    for key, value in user_input.items()
+                    if key not in CONNECTION_KEYS
+                }
+                self.hass.config_entries.async_update_entry(
+                    self.config_entry,
+                    data={
+                        **self.config_entry.data,
+                        **{
+                            key: user_input[key]
+                            for key in CONNECTION_KEYS
+                            if key in user_input
+                        },
+                    },
+                    options=options,
+                )
+                return self.async_create_entry(title="", data=options)
+            config = user_input
 
         return self.async_show_form(
             step_id="init",
-            data_schema=vol.Schema(
-                {
-                    vol.Required(
-                        CONF_USERNAME,
-                        default=self.config_entry.options.get(
-                            CONF_USERNAME,
-                            self.config_entry.data.get(CONF_USERNAME, DEFAULT_USERNAME),
-                        ),
-                    ): cv.string,
-                    vol.Required(
-                        CONF_PASSWORD,
-                        default=self.config_entry.options.get(
-                            CONF_PASSWORD,
-                            self.config_entry.data.get(CONF_PASSWORD),
-                        ),
-                    ): cv.string,
-                    vol.Required(
-                        CONF_HOST,
-                        default=self.config_entry.options.get(
-                            CONF_HOST,
-                            self.config_entry.data.get(CONF_HOST, DEFAULT_HOST),
-                        ),
-                    ): cv.string,
-                    vol.Required(
-                        CONF_PORT,
-                        default=self.config_entry.options.get(
-                            CONF_PORT,
-                            self.config_entry.data.get(CONF_PORT, DEFAULT_PORT),
-                        ),
-                    ): cv.positive_int,
-                    vol.Optional(
-                        CONF_VERIFY_SSL,
-                        default=self.config_entry.options.get(
-                            CONF_VERIFY_SSL,
-                            self.config_entry.data.get(
-                                CONF_VERIFY_SSL, DEFAULT_VERIFY_SSL
-                            ),
-                        ),
-                    ): cv.boolean,
-                    vol.Optional(
-                        CONF_DOOR_LATCH,
-                        default=self.config_entry.options.get(
-                            CONF_DOOR_LATCH,
-                            self.config_entry.data.get(CONF_DOOR_LATCH, DEFAULT_DOOR_LATCH),
-                        ),
-                    ): cv.positive_int,
-                    vol.Optional(
-                        CONF_KEEPALIVE,
-                        default=str(
-                            self.config_entry.options.get(
-                                CONF_KEEPALIVE,
-                                self.config_entry.data.get(CONF_KEEPALIVE, DEFAULT_KEEPALIVE),
-                            ),
-                        ),
-                    ): cv.positive_int,
-                }
-            ),
+            data_schema=_options_schema(config),
+            errors=errors,
+            description_placeholders=placeholders,
         )
 
 
@@ -148,10 +179,24 @@ class HikvisionFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         """Get the options flow for this handler."""
         return HikvisionOptionsFlow(config_entry)
 
+    def __init__(self) -> None:
+        """Initialize the flow."""
+        self._discovery: dict[str, Any] = {}
+        self._discovery_task: asyncio.Task | None = None
+        self._addresses: list[str] = []
+        self._discovered: dict[str, DiscoveredDevice] = {}
+        self._refresh_pending = False
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle the initial step."""
+        return self.async_show_menu(step_id="user", menu_options=["discover", "manual"])
+
+    async def async_step_manual(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle a device entered by address."""
         errors = {}
         placeholders = {}
 
@@ -168,6 +213,9 @@ class HikvisionFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                 errors[CONF_HOST] = "unknown"
 
             if not errors:
+                # The setup of the entry, or of the one updated below, takes
+                # over the session.
+                async_get_handoff(self.hass).async_put(user_input, host)
                 await self.async_set_unique_id(host.unique_id, raise_on_progress=False)
                 self._abort_if_unique_id_configured(updates=user_input)
 
@@ -178,19 +226,123 @@ class HikvisionFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                 )
 
         return self.async_show_form(
-            step_id="user",
+            step_id="manual",
             data_schema=OPTIONS_SCHEMA,
             errors=errors,
             description_placeholders=placeholders,
         )
 
+    async def async_step_discover(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Scan a network for devices, reporting them while the scan runs."""
+        errors = {}
+
+        if user_input is not None and self._discovery_task is None:
+            try:
+                self._addresses = probe_targets(user_input[CONF_NETWORK])
+            except (TypeError, ValueError):
+                errors[CONF_NETWORK] = "invalid_network"
+            else:
+                self._discovery = user_input
+                self._discovery_task = self.hass.async_create_task(
+                    async_discover(
+                        self.hass,
+                        self._addresses,
+                        user_input[CONF_PORT],
+                        user_input[CONF_USERNAME],
+                        user_input[CONF_PASSWORD],
+                        self._async_current_ids(),
+                        self._device_found,
+                    )
+                )
+
+        if self._discovery_task is None:
+            return self.async_show_form(
+                step_id="discover", data_schema=DISCOVERY_SCHEMA, errors=errors
+            )
+
+        if not self._discovery_task.done():
+            return self.async_show_progress(
+                step_id="discover",
+                progress_action="discover",
+                description_placeholders={
+                    "hosts": str(len(self._addresses)),
+                    "found": str(len(self._discovered)),
+                },
+                progress_task=self._discovery_task,
+            )
+
+        if (err := self._discovery_task.exception()) is not None:
+            _LOGGER.error("Network scan failed: %s", err)
+        return self.async_show_progress_done(next_step_id="pick")
+
+    @callback
+    def _device_found(self, device: DiscoveredDevice) -> None:
+        """Show a device on the progress form as soon as it answers."""
+        self._discovered[device.mac] = device
+        if (
+            self._refresh_pending
+            or self._discovery_task is None
+            or self._discovery_task.done()
+        ):
+            return
+        # Devices found before the refresh runs share it.
+        self._refresh_pending = True
+        self.hass.async_create_task(self._async_refresh_progress())
+
+    async def _async_refresh_progress(self) -> None:
+        """Render the step again, the frontend then shows the new count."""
+        self._refresh_pending = False
+        try:
+            await self.hass.config_entries.flow.async_configure(self.flow_id)
+        except UnknownFlow:
+            # The user closed the flow meanwhile.
+            pass
+
+    async def async_step_pick(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Choose one of the discovered devices."""
+        if not self._discovered:
+            return self.async_abort(reason="no_devices_found")
+
+        if user_input is not None:
+            device = self._discovered[user_input[CONF_DEVICE]]
+            return await self.async_step_manual(
+                OPTIONS_SCHEMA(
+                    {
+                        CONF_HOST: device.host,
+                        CONF_PORT: self._discovery[CONF_PORT],
+                        CONF_USERNAME: self._discovery[CONF_USERNAME],
+                        CONF_PASSWORD: self._discovery[CONF_PASSWORD],
+                    }
+                )
+            )
+
+        devices = {
+            mac: f"{device.name} ({device.host.removeprefix('http://')})"
+            for mac, device in self._discovered.items()
+        }
+        return self.async_show_form(
+            step_id="pick",
+            data_schema=vol.Schema({vol.Required(CONF_DEVICE): vol.In(devices)}),
+            description_placeholders={"found": str(len(devices))},
+        )
+
 
 async def async_obtain_host_settings(
     hass: core.HomeAssistant, user_input: dict
 ) -> HikvisionHost:
     """Initialize the Hikvision host and get the host information."""
     host = HikvisionHost(hass, user_input, {})
-    if not await host.async_init():
+    try:
+        ready = await host.async_init()
+    except Exception:
+        await host.stop()
+        raise
+    if not ready:
+        await host.stop()
         raise CannotConnect
     return host
 
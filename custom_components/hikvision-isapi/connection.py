@@ -0,0 +1,361 @@
+"""Connection pool shared by every Hikvision host."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from http import HTTPStatus
+import logging
+import ssl
+import threading
+import time
+from typing import Any
+
+import httpx
+from hikvision_isapi_cli.client import Client
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.httpx_client import SERVER_SOFTWARE, USER_AGENT
+from homeassistant.helpers.singleton import singleton
+from homeassistant.util.ssl import (
+    get_default_context,
+    get_default_no_verify_context,
+)
+
+from .breaker import CircuitBreaker, CircuitState
+from .const import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_PROBE_TIMEOUT,
+    BREAKER_RESET_TIMEOUT,
+    DEFAULT_CONNECT_TIMEOUT,
+    DOMAIN,
+    POOL_KEEPALIVE_EXPIRY,
+    POOL_MAX_CONNECTIONS,
+    POOL_MAX_KEEPALIVE,
+)
+from .metrics import HostMetrics
+from .renewal import SessionRenewal
+from .scheduler import RequestScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_CONNECTION_POOL = f"{DOMAIN}_connection_pool"
+
+
+class _ThreadLocalDigestAuth(httpx.Auth):
+    """Digest auth holding one DigestAuth per executor thread.
+
+    DigestAuth keeps the last challenge and a nonce counter without locking,
+    so concurrent executor jobs must not share an instance.
+    """
+
+    def __init__(self, username: str, password: str) -> None:
+        self._username = username
+        self._password = password
+        self._local = threading.local()
+
+    def _auth(self) -> httpx.DigestAuth:
+        auth = getattr(self._local, "auth", None)
+        if auth is None:
+            auth = self._local.auth = httpx.DigestAuth(
+                self._username, self._password
+            )
+        return auth
+
+    def sync_auth_flow(self, request: httpx.Request):
+        """Run the digest flow of the calling thread."""
+        yield from self._auth().sync_auth_flow(request)
+
+
+class _Transport:
+    """Bind a pooled httpx client to the digest auth of one host.
+
+    Stands in for the private httpx clients of hikvision_isapi_cli.Client, so
+    the generated API functions and Session keep working unchanged.
+    """
+
+    def __init__(
+        self,
+        client: httpx.Client | httpx.AsyncClient,
+        auth: httpx.Auth,
+        breaker: CircuitBreaker,
+        metrics: HostMetrics,
+    ) -> None:
+        self._client = client
+        self._auth = auth
+        self._breaker = breaker
+        self._metrics = metrics
+        self.cookies: dict[str, str] = {}
+        self.last_success: float = 0
+
+    def _admit(self, kwargs: dict[str, Any]) -> bool:
+        """Fail fast on an open circuit and shorten the connect timeout."""
+        probe = self._breaker.before_request()
+        timeout = BREAKER_PROBE_TIMEOUT if probe else kwargs.get("timeout")
+        if isinstance(timeout, (int, float)):
+            kwargs["timeout"] = httpx.Timeout(
+                timeout, connect=min(timeout, DEFAULT_CONNECT_TIMEOUT)
+            )
+        return probe
+
+    def _failed(
+        self, url: str, started: float | None, error: BaseException, probe: bool
+    ) -> None:
+        # A request cancelled while queued never reached the device.
+        if started is not None:
+            self._metrics.record(url, time.perf_counter() - started, True)
+        if isinstance(error, httpx.TransportError):
+            self._breaker.record_failure(probe)
+        elif probe:
+            self._breaker.cancel_probe()
+
+    def _record(
+        self, url: str, started: float, response: httpx.Response, probe: bool
+    ) -> None:
+        self._metrics.record(
+            url, time.perf_counter() - started, response.status_code >= 400
+        )
+        self._breaker.record_success(probe)
+        if response.status_code < 500:
+            self.last_success = time.monotonic()
+
+    def stream(self, method: str, url: str, **kwargs: Any):
+        """Open a streaming response context."""
+        # Long-lived streams wait for regular requests to close the circuit.
+        self._breaker.check()
+        return self._client.stream(method, url, auth=self._auth, **kwargs)
+
+
+class _SyncTransport(_Transport):
+    """Transport used by the blocking calls made from the executor."""
+
+    def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request."""
+        probe = self._admit(kwargs)
+        started = time.perf_counter()
+        try:
+            response = self._client.request(method, url, auth=self._auth, **kwargs)
+        except BaseException as err:
+            self._failed(url, started, err, probe)
+            raise
+        self._record(url, started, response, probe)
+        return response
+
+
+class _AsyncTransport(_Transport):
+    """Transport used by the asyncio API functions."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        auth: httpx.Auth,
+        breaker: CircuitBreaker,
+        metrics: HostMetrics,
+        scheduler: RequestScheduler,
+    ) -> None:
+        super().__init__(client, auth, breaker, metrics)
+        self._scheduler = scheduler
+        self.renewal: SessionRenewal | None = None
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request, once more after renewing an expired session."""
+        renewal = self.renewal
+        generation = renewal.generation if renewal is not None else 0
+        response = await self._request(method, url, dict(kwargs))
+        if (
+            response.status_code != HTTPStatus.UNAUTHORIZED
+            or renewal is None
+            or not await renewal.async_renew(generation)
+        ):
+            return response
+        if "cookies" in kwargs:
+            kwargs["cookies"] = self.cookies
+        return await self._request(method, url, kwargs)
+
+    async def _request(
+        self, method: str, url: str, kwargs: dict[str, Any]
+    ) -> httpx.Response:
+        """Send a request once the host scheduler grants a slot."""
+        # Admitted before queueing so callers never wait on a dead device.
+        probe = self._admit(kwargs)
+        started = None
+        try:
+            async with self._scheduler.slot():
+                # Latency is measured once the slot is granted, queueing
+                # time belongs to the scheduler, not to the device.
+                started = time.perf_counter()
+                response = await self._client.request(
+                    method, url, auth=self._auth, **kwargs
+                )
+        except BaseException as err:
+            self._failed(url, started, err, probe)
+            raise
+        self._record(url, started, response, probe)
+        return response
+
+
+class PooledClient(Client):
+    """A hikvision_isapi_cli Client backed by the shared connection pool."""
+
+    def __init__(
+        self,
+        pool: HikvisionConnectionPool,
+        base_url: str,
+        username: str,
+        password: str,
+        verify_ssl: bool,
+        timeout: float,
+        max_in_flight: int,
+        on_circuit_change: Callable[[CircuitState], None] | None = None,
+    ) -> None:
+        """Initialize the client without opening private connections."""
+        # Client.__init__ is not called on purpose: it would create a pair of
+        # httpx clients per host that are never closed.
+        self.base_url = base_url
+        self.cookies = {}
+        self.headers = {}
+        self.timeout = timeout
+        self.verify_ssl = verify_ssl
+        self.raise_on_unexpected_status = False
+        self.username = username
+        self.password = password
+        self.keepalive_expiry = POOL_KEEPALIVE_EXPIRY
+
+        self.scheduler = RequestScheduler(max_in_flight)
+        self.metrics = HostMetrics()
+        self.breaker = CircuitBreaker(
+            base_url,
+            BREAKER_FAILURE_THRESHOLD,
+            BREAKER_RESET_TIMEOUT,
+            on_circuit_change,
+        )
+
+        sync_auth, async_auth = pool.digest_auth(base_url, username, password)
+        self._api = _SyncTransport(
+            pool.sync_client(verify_ssl), sync_auth, self.breaker, self.metrics
+        )
+        self._asyncio_api = _AsyncTransport(
+            pool.async_client(verify_ssl),
+            async_auth,
+            self.breaker,
+            self.metrics,
+            self.scheduler,
+        )
+
+    @property
+    def renewal(self) -> SessionRenewal | None:
+        """Return the session renewal used by the asyncio requests."""
+        return self._asyncio_api.renewal
+
+    @renewal.setter
+    def renewal(self, renewal: SessionRenewal | None) -> None:
+        self._asyncio_api.renewal = renewal
+
+    @property
+    def last_success(self) -> float:
+        """Return the monotonic time of the last answered request."""
+        return max(self._api.last_success, self._asyncio_api.last_success)
+
+
+class HikvisionConnectionPool:
+    """Bounded keep-alive pool and digest auth cache for the integration.
+
+    Digest challenges are remembered per host and credentials, so requests
+    reuse the last nonce instead of paying a 401 round-trip each time.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the pool."""
+        self._hass = hass
+        self._limits = httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+        )
+        self._async_clients: dict[bool, httpx.AsyncClient] = {}
+        self._sync_clients: dict[bool, httpx.Client] = {}
+        self._auths: dict[tuple[str, str, str], tuple[httpx.Auth, httpx.Auth]] = {}
+
+    def client(
+        self,
+        base_url: str,
+        username: str,
+        password: str,
+        verify_ssl: bool,
+        timeout: float,
+        max_in_flight: int,
+        on_circuit_change: Callable[[CircuitState], None] | None = None,
+    ) -> PooledClient:
+        """Return an API client for one host."""
+        return PooledClient(
+            self,
+            base_url,
+            username,
+            password,
+            verify_ssl,
+            timeout,
+            max_in_flight,
+            on_circuit_change,
+        )
+
+    def digest_auth(
+        self, base_url: str, username: str, password: str
+    ) -> tuple[httpx.Auth, httpx.Auth]:
+        """Return the sync and async digest auth of a host."""
+        key = (base_url, username, password)
+        if key not in self._auths:
+            # DigestAuth keeps a nonce counter without locking: the loop
+            # gets its own instance and each executor thread another one.
+            self._auths[key] = (
+                _ThreadLocalDigestAuth(username, password),
+                httpx.DigestAuth(username, password),
+            )
+        return self._auths[key]
+
+    def async_client(self, verify_ssl: bool) -> httpx.AsyncClient:
+        """Return the shared async client."""
+        # Not create_async_httpx_client, it does not accept custom limits.
+        if verify_ssl not in self._async_clients:
+            self._async_clients[verify_ssl] = httpx.AsyncClient(
+                headers={USER_AGENT: SERVER_SOFTWARE},
+                limits=self._limits,
+                verify=self._ssl_context(verify_ssl),
+            )
+        return self._async_clients[verify_ssl]
+
+    def sync_client(self, verify_ssl: bool) -> httpx.Client:
+        """Return the shared sync client, used from the executor."""
+        if verify_ssl not in self._sync_clients:
+            self._sync_clients[verify_ssl] = httpx.Client(
+                headers={USER_AGENT: SERVER_SOFTWARE},
+                limits=self._limits,
+                verify=self._ssl_context(verify_ssl),
+            )
+        return self._sync_clients[verify_ssl]
+
+    @staticmethod
+    def _ssl_context(verify_ssl: bool) -> ssl.SSLContext:
+        if verify_ssl:
+            return get_default_context()
+        return get_default_no_verify_context()
+
+    async def async_close(self) -> None:
+        """Close every client of the pool."""
+        for client in self._sync_clients.values():
+            client.close()
+        self._sync_clients.clear()
+        for async_client in self._async_clients.values():
+            await async_client.aclose()
+        self._async_clients.clear()
+
+
+@singleton(DATA_CONNECTION_POOL)
+@callback
+def async_get_connection_pool(hass: HomeAssistant) -> HikvisionConnectionPool:
+    """Return the connection pool of the integration."""
+    pool = HikvisionConnectionPool(hass)
+
+    async def _async_close(_event: Event) -> None:
+        await pool.async_close()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close)
+    return pool
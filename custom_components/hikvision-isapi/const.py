@@ -1,5 +1,7 @@
 from typing import Final
 
+from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_PORT, CONF_USERNAME
+
 DOMAIN: Final = "hikvision-isapi"
 MANUFACTURER: Final = "Hikvision"
 PLATFORMS: Final = ["lock", "sensor", "camera"]
@@ -8,6 +10,15 @@ BASE_URL: Final = "http://192.0.0.65:8000"
 CONF_VERIFY_SSL: Final = "verify_ssl"
 CONF_DOOR_LATCH: Final = "latch"
 CONF_KEEPALIVE: Final = "keepalive"
+CONF_SNAPSHOT_MODE: Final = "snapshot_mode"
+CONF_MAX_REQUESTS: Final = "max_requests"
+# Changing any of these reconnects, other options are applied in place.
+CONNECTION_KEYS: Final = (CONF_HOST, CONF_PORT, CONF_USERNAME, CONF_PASSWORD, CONF_VERIFY_SSL)
+
+SNAPSHOT_MODE_HTTP: Final = "http"
+# Retired: it read the picture endpoint too, stored values become http.
+SNAPSHOT_MODE_RTSP: Final = "rtsp"
+SNAPSHOT_MODES: Final = [SNAPSHOT_MODE_HTTP]
 
 DEFAULT_TIMEOUT: Final = 30
 DEFAULT_USERNAME: Final = "admin"
@@ -16,3 +27,120 @@ DEFAULT_PORT: Final = "8000"
 DEFAULT_VERIFY_SSL: Final = False
 DEFAULT_DOOR_LATCH: Final = 0
 DEFAULT_KEEPALIVE: Final = 5
+DEFAULT_SNAPSHOT_MODE: Final = SNAPSHOT_MODE_HTTP
+DEFAULT_MAX_REQUESTS: Final = 3
+
+SNAPSHOT_CACHE_TTL: Final = 2
+
+ALERT_STREAM_READ_TIMEOUT: Final = 60
+ALERT_STREAM_RETRY_MIN: Final = 1
+ALERT_STREAM_RETRY_MAX: Final = 60
+
+PREVIEW_CONNECT_TIMEOUT: Final = 10
+PREVIEW_READ_TIMEOUT: Final = 10
+# Chunks queued for one viewer before it is dropped as too slow.
+PREVIEW_VIEWER_BACKLOG: Final = 64
+
+# Refreshes requested by events within this many seconds share one request.
+STATUS_REFRESH_COOLDOWN: Final = 1
+
+EVENT_HIKVISION: Final = f"{DOMAIN}_event"
+EVENT_HIKVISION_ACS: Final = f"{DOMAIN}_acs_event"
+EVENT_KIND_UNLOCKED: Final = "unlocked"
+EVENT_KIND_LOCKED: Final = "locked"
+EVENT_KIND_DOOR_OPEN: Final = "door_open"
+EVENT_KIND_DOOR_CLOSE: Final = "door_close"
+EVENT_KIND_CALL: Final = "call"
+EVENT_KIND_TAMPER: Final = "tamper"
+EVENT_KIND_MOTION: Final = "motion"
+
+# Events that capture a frame right away, kept per camera in a ring buffer.
+EVENT_SNAPSHOT_KINDS: Final = frozenset(
+    (EVENT_KIND_CALL, EVENT_KIND_MOTION, EVENT_KIND_DOOR_OPEN, EVENT_KIND_UNLOCKED)
+)
+EVENT_SNAPSHOT_HISTORY: Final = 5
+# Repeats of the same kind within this many seconds reuse the last frame.
+EVENT_SNAPSHOT_INTERVAL: Final = 2
+
+# AccessControllerEvent (majorEventType, subEventType) pairs.
+ACS_EVENT_KINDS: Final = {
+    (5, 0x15): EVENT_KIND_UNLOCKED,
+    (5, 0x16): EVENT_KIND_LOCKED,
+    (5, 0x19): EVENT_KIND_DOOR_OPEN,
+    (5, 0x1A): EVENT_KIND_DOOR_CLOSE,
+    (5, 0x1B): EVENT_KIND_DOOR_OPEN,
+    (1, 0x404): EVENT_KIND_TAMPER,
+    (1, 0x406): EVENT_KIND_TAMPER,
+}
+CALL_EVENT_TYPES: Final = ("videointercomevent", "doorbellringing", "callringing")
+TAMPER_EVENT_TYPES: Final = ("tamperdetection", "shelteralarm")
+MOTION_EVENT_TYPES: Final = ("vmd", "pir")
+
+CAPABILITY_RETRY_MIN: Final = 30
+CAPABILITY_RETRY_MAX: Final = 600
+
+POOL_MAX_CONNECTIONS: Final = 100
+POOL_MAX_KEEPALIVE: Final = 40
+POOL_KEEPALIVE_EXPIRY: Final = 30
+
+HEARTBEAT_BACKOFF_MAX: Final = 300
+HEARTBEAT_JITTER: Final = 0.1
+
+DEFAULT_CONNECT_TIMEOUT: Final = 5
+BREAKER_FAILURE_THRESHOLD: Final = 3
+BREAKER_RESET_TIMEOUT: Final = 30
+BREAKER_PROBE_TIMEOUT: Final = 3
+
+LATENCY_BUCKETS: Final = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+ACS_EVENT_PAGE_SIZE: Final = 30
+ACS_EVENT_POLL_INTERVAL: Final = 300
+ACS_EVENT_COOLDOWN: Final = 2
+
+# (major, minor) -> logbook description of the AcsEvent log records.
+ACS_EVENT_DESCRIPTIONS: Final = {
+    (1, 0x404): "reported tampering",
+    (2, 0x27): "lost the network",
+    (3, 0x7C): "was opened remotely",
+    (3, 0x7D): "was closed remotely",
+    (5, 0x01): "granted a valid card",
+    (5, 0x09): "refused an unknown card",
+    (5, 0x15): "was unlocked",
+    (5, 0x16): "was locked",
+    (5, 0x19): "was opened",
+    (5, 0x1A): "was closed",
+    (5, 0x1B): "was opened abnormally",
+    (5, 0x26): "granted a fingerprint",
+    (5, 0x27): "refused a fingerprint",
+    (5, 0x4B): "granted a face",
+    (5, 0x4C): "refused a face",
+}
+
+USERS_PAGE_SIZE: Final = 30
+USERS_CHECK_INTERVAL: Final = 900
+USERS_FULL_SYNC_INTERVAL: Final = 86400
+
+ATTR_QUERY: Final = "query"
+SERVICE_SEARCH_USERS: Final = "search_users"
+SERVICE_SYNC_USERS: Final = "sync_users"
+
+CONF_NETWORK: Final = "network"
+CONF_DEVICE: Final = "device"
+# A /24 is probed in a few rounds of connect timeouts.
+DISCOVERY_CONCURRENCY: Final = 64
+DISCOVERY_CONNECT_TIMEOUT: Final = 1
+DISCOVERY_PROBE_TIMEOUT: Final = 3
+DISCOVERY_MAX_HOSTS: Final = 1024
+
+# Seconds a host validated by the config flow waits for the entry setup.
+HANDOFF_TTL: Final = 60
+
+# Seconds after a failed re-login before the next one is attempted.
+RELOGIN_COOLDOWN: Final = 30
+
+DOOR_COMMANDS: Final = ("open", "close", "alwaysOpen", "alwaysClose")
+# Door commands in flight across every host during a bulk call.
+DOOR_BULK_CONCURRENCY: Final = 32
+
+ATTR_COMMAND: Final = "command"
+SERVICE_CONTROL_DOORS: Final = "control_doors"
@@ -0,0 +1,50 @@
+"""Diagnostics support for Hikvision ISAPI."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from . import HikvisionData
+from .const import DOMAIN
+
+TO_REDACT = {
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    "macAddress",
+    "serialNumber",
+    "deviceID",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    hikvision_data: HikvisionData = hass.data[DOMAIN][config_entry.entry_id]
+    host = hikvision_data.host
+
+    return {
+        "entry": {
+            "data": async_redact_data(config_entry.data, TO_REDACT),
+            "options": async_redact_data(config_entry.options, TO_REDACT),
+        },
+        "capabilities": async_redact_data(host.capabilities, TO_REDACT),
+        "circuit_state": host.breaker.state,
+        "scheduler": {
+            "in_flight": host.scheduler.in_flight,
+            "max_in_flight": host.scheduler.max_in_flight,
+        },
+        "heartbeat": {
+            "interval": host.heartbeat.interval,
+            "failures": host.heartbeat.failures,
+        },
+        "session_renewal": host.renewal.as_dict(),
+        "coordinator": {
+            "last_update_success": hikvision_data.device_coordinator.last_update_success,
+        },
+        "requests": host.metrics.as_dict(),
+    }
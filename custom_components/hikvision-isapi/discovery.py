@@ -0,0 +1,144 @@
+"""Discovery of ISAPI devices on the local network."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from http import HTTPStatus
+from ipaddress import ip_address, ip_network, summarize_address_range
+import logging
+from xml.parsers.expat import ExpatError
+
+import httpx
+import xmltodict
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import format_mac
+from homeassistant.helpers.httpx_client import get_async_client
+
+from .const import (
+    DISCOVERY_CONCURRENCY,
+    DISCOVERY_CONNECT_TIMEOUT,
+    DISCOVERY_MAX_HOSTS,
+    DISCOVERY_PROBE_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_TIMEOUT = httpx.Timeout(DISCOVERY_PROBE_TIMEOUT, connect=DISCOVERY_CONNECT_TIMEOUT)
+
+
+@dataclass(frozen=True)
+class DiscoveredDevice:
+    """A device that answered deviceInfo."""
+
+    host: str
+    mac: str
+    name: str
+    model: str | None
+
+
+def probe_targets(value: str) -> list[str]:
+    """Expand comma separated addresses, networks and first-last ranges.
+
+    Raises ValueError on a malformed target or when the targets exceed
+    DISCOVERY_MAX_HOSTS addresses.
+    """
+    hosts: dict[str, None] = {}
+    for target in (part.strip() for part in value.split(",")):
+        if not target:
+            continue
+        if "/" in target:
+            network = ip_network(target, strict=False)
+            if network.num_addresses > DISCOVERY_MAX_HOSTS:
+                raise ValueError(f"{target} is larger than {DISCOVERY_MAX_HOSTS} hosts")
+            addresses: Iterable = network.hosts() if network.num_addresses > 2 else network
+        elif "-" in target:
+            first, last = (ip_address(part.strip()) for part in target.split("-", 1))
+            if int(last) - int(first) >= DISCOVERY_MAX_HOSTS:
+                raise ValueError(f"{target} is larger than {DISCOVERY_MAX_HOSTS} hosts")
+            addresses = (
+                address
+                for network in summarize_address_range(first, last)
+                for address in network
+            )
+        else:
+            addresses = [ip_address(target)]
+        hosts.update(dict.fromkeys(map(str, addresses)))
+        if len(hosts) > DISCOVERY_MAX_HOSTS:
+            raise ValueError(f"More than {DISCOVERY_MAX_HOSTS} hosts")
+    return list(hosts)
+
+
+async def _async_probe(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    address: str,
+    port: int,
+    username: str,
+    password: str,
+) -> DiscoveredDevice | None:
+    """Read deviceInfo of one address, None when it is not an ISAPI device."""
+    url = f"http://{address}:{port}/ISAPI/System/deviceInfo"
+    async with semaphore:
+        try:
+            # DigestAuth keeps the nonce of one host, it is not shared.
+            response = await client.get(
+                url, auth=httpx.DigestAuth(username, password), timeout=_TIMEOUT
+            )
+        except httpx.HTTPError:
+            return None
+    if response.status_code != HTTPStatus.OK:
+        if response.status_code == HTTPStatus.UNAUTHORIZED:
+            _LOGGER.debug("%s rejected the discovery credentials", address)
+        return None
+    try:
+        info = xmltodict.parse(response.content)["DeviceInfo"]
+        mac = info["macAddress"]
+    except (ExpatError, KeyError, TypeError):
+        return None
+    return DiscoveredDevice(
+        host=f"http://{address}",
+        mac=format_mac(mac),
+        name=info.get("deviceName") or address,
+        model=info.get("model"),
+    )
+
+
+async def async_discover(
+    hass: HomeAssistant,
+    addresses: list[str],
+    port: int,
+    username: str,
+    password: str,
+    known: set[str],
+    on_found: Callable[[DiscoveredDevice], None] | None = None,
+) -> dict[str, DiscoveredDevice]:
+    """Probe the addresses concurrently, return the new devices by MAC.
+
+    At most DISCOVERY_CONCURRENCY probes are in flight and ``on_found`` is
+    called as soon as each device answers. Devices whose MAC is in ``known``
+    or was already found on another address are left out.
+    """
+    client = get_async_client(hass, verify_ssl=False)
+    semaphore = asyncio.Semaphore(DISCOVERY_CONCURRENCY)
+    found: dict[str, DiscoveredDevice] = {}
+    probes = [
+        asyncio.create_task(
+            _async_probe(client, semaphore, address, port, username, password)
+        )
+        for address in addresses
+    ]
+    try:
+        for probe in asyncio.as_completed(probes):
+            device = await probe
+            if device is None or device.mac in known or device.mac in found:
+                continue
+            found[device.mac] = device
+            if on_found is not None:
+                on_found(device)
+    finally:
+        # An aborted flow cancels the scan, stop the probes still waiting.
+        for task in probes:
+            task.cancel()
+    return found
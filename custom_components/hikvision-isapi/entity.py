@@ -4,7 +4,9 @@ from typing import Any
 
 from homeassistant.components.lock import LockEntity, LockEntityFeature
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import callback
 from homeassistant.exceptions import ConfigEntryError
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import (
@@ -12,14 +14,13 @@ from homeassistant.helpers.update_coordinator import (
 )
 
 from . import HikvisionData
+from .alert_stream import HikvisionEvent
+from .breaker import CircuitState
 from hikvision_isapi_cli.errors import UnexpectedStatus
 from hikvision_isapi_cli.types import Response
-from hikvision_isapi_cli.api.isapi import door
-from hikvision_isapi_cli.models import (
-    RootTypeForXMLRemoteControlDoor,
-    RootTypeForXMLRemoteControlDoorRemoteControlDoor,
-)
-from .const import DOMAIN, MANUFACTURER
+from .const import CONF_DOOR_LATCH, DOMAIN, EVENT_KIND_LOCKED, EVENT_KIND_UNLOCKED, MANUFACTURER
+from .isapi import remote_control_door
+from .scheduler import RequestPriority, request_priority
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -38,6 +39,25 @@ class HikvisionCoordinatorEntity(CoordinatorEntity):
 
         self._host = hikvision_data.host
 
+    async def async_added_to_hass(self) -> None:
+        """Follow the circuit breaker of the device."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, self._host.circuit_signal, self.async_write_ha_state
+            )
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return False while the device is known to be unreachable."""
+        return super().available and self._host.breaker.state != CircuitState.OPEN
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the circuit state of the device."""
+        return {"circuit_state": self._host.breaker.state}
+
 
 class HikvisionLock(HikvisionCoordinatorEntity, LockEntity):
     """
@@ -55,46 +75,89 @@ class HikvisionLock(HikvisionCoordinatorEntity, LockEntity):
         HikvisionCoordinatorEntity.__init__(self, hikvision_data, config_entry)
         LockEntity.__init__(self)
         self._attr_supported_features = LockEntityFeature(1)
-        self._attr_is_locked = True
         self._lock = lock
         self._latch = latch
+        self._attr_is_locked = self._door_locked()
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to the device events."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, self._host.event_signal, self._handle_event
+            )
+        )
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, self._host.options_signal, self._handle_options
+            )
+        )
 
-    async def async_open(self, **kwargs: Any) -> None:
-        self.unlock(**kwargs)
-
-    async def _lock_delay(self, _now):
-        self._attr_is_locking = True
-        self.async_write_ha_state()
-        await self.async_lock()
-
-    async def _locked(self, _now, **kwargs):
-        """Set Lock Entity status to locked."""
+    @callback
+    def _handle_options(self, config: dict[str, Any]) -> None:
+        """Use the new latch from the next unlock on."""
+        self._latch = config[CONF_DOOR_LATCH]
+
+    def _door_locked(self) -> bool | None:
+        """Return the relay state of this door from the coordinator data."""
+        status = self.coordinator.data
+        if status is None:
+            # No AcsWorkStatus on this device, keep the last known state.
+            return True if self._attr_is_locked is None else self._attr_is_locked
+        if self._lock > len(status.door_lock_status):
+            return None
+        return status.door_lock_status[self._lock - 1] == "0"
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Refresh the lock state from the shared AcsWorkStatus."""
         self._attr_is_locking = False
-        self._attr_is_locked = True
+        self._attr_is_unlocking = False
+        self._attr_is_locked = self._door_locked()
+        super()._handle_coordinator_update()
+
+    async def _async_refresh(self, _now) -> None:
+        """Read back the door state once the latch has elapsed."""
+        if self.coordinator.data is None:
+            # Nothing to read back without AcsWorkStatus, the latch relocks.
+            self._attr_is_locked = True
+            self.async_write_ha_state()
+            return
+        await self.coordinator.async_request_refresh()
+
+    @callback
+    def _handle_event(self, event: HikvisionEvent) -> None:
+        """Update the lock state from a door event."""
+        if event.door != self._lock:
+            return
+        if event.kind == EVENT_KIND_UNLOCKED:
+            self._attr_is_unlocking = False
+            self._attr_is_locked = False
+        elif event.kind == EVENT_KIND_LOCKED:
+            self._attr_is_locking = False
+            self._attr_is_locked = True
+        else:
+            return
         self.async_write_ha_state()
 
+    async def async_open(self, **kwargs: Any) -> None:
+        await self.async_unlock(**kwargs)
+
     async def async_lock(self, **kwargs: Any) -> None:
         if self._latch > 0:
             if self._attr_is_locked:
                 await self.async_unlock(**kwargs)
             else:
-                async_call_later(self.hass, delay=self._latch, action=self._locked)
+                await self.coordinator.async_request_refresh()
 
     async def async_unlock(self, **kwargs: Any) -> None:
         try:
             self._attr_is_unlocking = True
             self.async_write_ha_state()
-            request = RootTypeForXMLRemoteControlDoor()
-            request.remote_control_door = (
-                RootTypeForXMLRemoteControlDoorRemoteControlDoor()
-            )
-            request.remote_control_door.cmd = "open"
-            request.remote_control_door.version = "2.0"
-            request.remote_control_door.xmlns = "http://www.isapi.org/ver20/XMLSchema"
-
-            response: Response = await door.asyncio_detailed(
-                door_id=self._lock, client=self._host.api, json_body=request
-            )
+            with request_priority(RequestPriority.DOOR_CONTROL):
+                response: Response = await remote_control_door(
+                    self._lock, "open", client=self._host.api
+                )
 
             if response.status_code == HTTPStatus.OK:
                 self._attr_is_unlocking = False
@@ -102,10 +165,11 @@ class HikvisionLock(HikvisionCoordinatorEntity, LockEntity):
                 self.async_write_ha_state()
                 if self._latch > 0:
                     async_call_later(
-                        self.hass, delay=self._latch, action=self._lock_delay
+                        self.hass, delay=self._latch, action=self._async_refresh
                     )
             else:
-                self._attr_is_locked = True
+                self._attr_is_unlocking = False
+                self.async_write_ha_state()
                 _LOGGER.error(response.content)
 
         except (UnexpectedStatus, Exception) as err:
@@ -148,7 +212,7 @@ class HikvisionLock(HikvisionCoordinatorEntity, LockEntity):
 
     @property
     def assumed_state(self):
-        return True
+        return self.coordinator.data is None
 
     @property
     def icon(self):
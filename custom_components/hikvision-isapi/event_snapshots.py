@@ -0,0 +1,95 @@
+"""Frames captured as soon as the device reports a call, motion or door event."""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from http import HTTPStatus
+import time
+from typing import Any
+
+from aiohttp import web
+
+from homeassistant.components.camera import DOMAIN as CAMERA_DOMAIN
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .const import DOMAIN, EVENT_SNAPSHOT_HISTORY, EVENT_SNAPSHOT_INTERVAL
+
+
+@dataclass(frozen=True)
+class EventSnapshot:
+    """One frame and the event that triggered it."""
+
+    kind: str
+    time: datetime
+    image: bytes
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the event without the image."""
+        return {"kind": self.kind, "time": self.time.isoformat()}
+
+
+class EventSnapshots:
+    """Ring buffer of the latest event frames of one camera.
+
+    The oldest frame is dropped once ``size`` frames are kept, so memory is
+    bounded whatever the event rate.
+    """
+
+    def __init__(self, size: int = EVENT_SNAPSHOT_HISTORY) -> None:
+        """Initialize an empty buffer."""
+        self._frames: deque[EventSnapshot] = deque(maxlen=size)
+        self._claimed: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        """Return the number of frames kept."""
+        return len(self._frames)
+
+    def claim(self, kind: str) -> bool:
+        """Return False when the kind already triggered a capture recently.
+
+        Devices repeat motion and call events every second while they last.
+        """
+        now = time.monotonic()
+        claimed = self._claimed.get(kind)
+        if claimed is not None and now - claimed < EVENT_SNAPSHOT_INTERVAL:
+            return False
+        self._claimed[kind] = now
+        return True
+
+    def add(self, kind: str, image: bytes) -> None:
+        """Keep a frame, dropping the oldest when full."""
+        self._frames.append(EventSnapshot(kind, dt_util.utcnow(), image))
+
+    def get(self, index: int = 0) -> EventSnapshot | None:
+        """Return a frame, 0 being the latest."""
+        if not 0 <= index < len(self._frames):
+            return None
+        return self._frames[-1 - index]
+
+    def as_list(self) -> list[dict[str, Any]]:
+        """Return the kept events, latest first."""
+        return [frame.as_dict() for frame in reversed(self._frames)]
+
+
+class HikvisionEventSnapshotView(HomeAssistantView):
+    """Serve the frames captured on the latest events of a camera."""
+
+    url = f"/api/{DOMAIN}/event_snapshot/{{entity_id}}/{{index}}"
+    name = f"api:{DOMAIN}:event_snapshot"
+
+    async def get(
+        self, request: web.Request, entity_id: str, index: str
+    ) -> web.Response:
+        """Return a kept frame, index 0 being the latest event."""
+        hass: HomeAssistant = request.app["hass"]
+        component = hass.data.get(CAMERA_DOMAIN)
+        entity = component.get_entity(entity_id) if component else None
+        snapshots: EventSnapshots | None = getattr(entity, "event_snapshots", None)
+        if snapshots is None or not index.isdigit():
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+        if (frame := snapshots.get(int(index))) is None:
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+        return web.Response(body=frame.image, content_type="image/jpeg")
@@ -0,0 +1,68 @@
+"""Field extraction from ISAPI XML without building a document tree."""
+from __future__ import annotations
+
+from collections.abc import Collection
+from xml.parsers import expat
+
+
+class XmlFields:
+    """Text of the requested elements of one document, by local name.
+
+    Elements are matched by local name at any depth, a repeated element
+    keeps every value in document order.
+    """
+
+    __slots__ = ("root", "_values")
+
+    def __init__(self, root: str | None, values: dict[str, list[str]]) -> None:
+        """Initialize the extracted fields."""
+        self.root = root
+        self._values = values
+
+    def get(self, name: str) -> str | None:
+        """Return the first value of an element, None when empty."""
+        values = self._values.get(name)
+        return values[0] or None if values else None
+
+    def getall(self, name: str) -> list[str]:
+        """Return every value of an element."""
+        return self._values.get(name, [])
+
+    def __contains__(self, name: str) -> bool:
+        """Return True when the element was present."""
+        return name in self._values
+
+
+def scan(body: bytes | str, names: Collection[str]) -> XmlFields:
+    """Collect the text of the ``names`` elements in one expat pass.
+
+    Raises ExpatError on malformed documents, like xmltodict.parse.
+    """
+    values: dict[str, list[str]] = {}
+    root: str | None = None
+    text: list[str] | None = None
+
+    def start(tag: str, _attrs: dict[str, str]) -> None:
+        nonlocal root, text
+        local = tag.rpartition(":")[2]
+        if root is None:
+            root = local
+        # Only leaf text is kept, a nested start discards what was buffered.
+        text = [] if local in names else None
+
+    def end(tag: str) -> None:
+        nonlocal text
+        if text is not None:
+            values.setdefault(tag.rpartition(":")[2], []).append("".join(text).strip())
+            text = None
+
+    def data(chunk: str) -> None:
+        if text is not None:
+            text.append(chunk)
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = data
+    parser.Parse(body, True)
+    return XmlFields(root, values)
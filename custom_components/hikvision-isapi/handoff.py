@@ -0,0 +1,91 @@
+"""Handoff of the hosts validated by the config flow to the entry setup."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from functools import partial
+import logging
+from typing import Any
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.singleton import singleton
+
+from .const import DOMAIN, HANDOFF_TTL
+from .host import HikvisionHost
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_HANDOFF = f"{DOMAIN}_handoff"
+
+HandoffKey = frozenset[tuple[str, Any]]
+
+
+def _key(config: Mapping[str, Any]) -> HandoffKey:
+    return frozenset(config.items())
+
+
+class HikvisionHostHandoff:
+    """Keep validated hosts, logged in and bootstrapped, for a short time.
+
+    A host is keyed by the exact config it was built from, so the setup of
+    an entry with that data takes over its session and capabilities instead
+    of logging in and fetching deviceInfo again. Hosts not taken within
+    HANDOFF_TTL seconds are stopped.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize an empty handoff."""
+        self._hass = hass
+        self._hosts: dict[HandoffKey, tuple[HikvisionHost, CALLBACK_TYPE]] = {}
+
+    @callback
+    def async_put(self, config: Mapping[str, Any], host: HikvisionHost) -> None:
+        """Offer a validated host to the setup of an entry with ``config``."""
+        key = _key(config)
+        self._async_discard(key)
+        self._hosts[key] = (
+            host,
+            async_call_later(self._hass, HANDOFF_TTL, partial(self._expire, key)),
+        )
+
+    @callback
+    def async_take(self, config: Mapping[str, Any]) -> HikvisionHost | None:
+        """Return the host validated with ``config``, if it is still alive."""
+        if (handoff := self._hosts.pop(_key(config), None)) is None:
+            return None
+        host, cancel = handoff
+        cancel()
+        return host
+
+    @callback
+    def _expire(self, key: HandoffKey, _now: Any) -> None:
+        self._async_discard(key)
+
+    @callback
+    def _async_discard(self, key: HandoffKey) -> None:
+        if (handoff := self._hosts.pop(key, None)) is not None:
+            host, cancel = handoff
+            cancel()
+            _LOGGER.debug("Closing unused session of %s", host.hostname)
+            self._hass.async_create_task(host.stop())
+
+    async def async_close(self) -> None:
+        """Stop every host still waiting."""
+        while self._hosts:
+            _, (host, cancel) = self._hosts.popitem()
+            cancel()
+            await host.stop()
+
+
+@singleton(DATA_HANDOFF)
+@callback
+def async_get_handoff(hass: HomeAssistant) -> HikvisionHostHandoff:
+    """Return the host handoff of the integration."""
+    handoff = HikvisionHostHandoff(hass)
+
+    async def _async_close(_event: Event) -> None:
+        await handoff.async_close()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_close)
+    return handoff
@@ -0,0 +1,104 @@
+"""Adaptive session heartbeat for Hikvision hosts."""
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+import logging
+import random
+import time
+
+import httpx
+from hikvision_isapi_cli.errors import UnexpectedStatus
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+from homeassistant.helpers.event import async_call_later
+
+from .const import HEARTBEAT_BACKOFF_MAX, HEARTBEAT_JITTER
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HeartbeatScheduler:
+    """Send a heartbeat only when the session has been idle.
+
+    Any answered request within the interval counts as a heartbeat. While the
+    device does not answer the delay doubles up to HEARTBEAT_BACKOFF_MAX, and
+    every delay is jittered so hosts do not beat in lockstep.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        interval: float,
+        heartbeat: Callable[[], Awaitable[bool]],
+        last_success: Callable[[], float],
+    ) -> None:
+        """Initialize the scheduler."""
+        self._hass = hass
+        self._interval = interval
+        self._heartbeat = heartbeat
+        self._last_success = last_success
+        self._failures = 0
+        self._unsub: CALLBACK_TYPE | None = None
+        self._stopped = True
+        self.sent = 0
+        self.failed = 0
+
+    @property
+    def failures(self) -> int:
+        """Return the number of consecutive failed heartbeats."""
+        return self._failures
+
+    @property
+    def interval(self) -> float:
+        """Return the idle interval before a heartbeat is sent."""
+        return self._interval
+
+    @interval.setter
+    def interval(self, interval: float) -> None:
+        self._interval = interval
+
+    def start(self) -> None:
+        """Schedule the first heartbeat at a random point of the interval."""
+        self.stop()
+        self._stopped = False
+        self._schedule(random.uniform(0, self._interval))
+
+    def stop(self) -> None:
+        """Cancel the next heartbeat, a tick in progress does not reschedule."""
+        self._stopped = True
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    def _schedule(self, delay: float) -> None:
+        if self._stopped:
+            return
+        self._unsub = async_call_later(self._hass, delay, self._async_tick)
+
+    async def _async_tick(self, _now) -> None:
+        self._unsub = None
+        idle = time.monotonic() - self._last_success()
+        if idle < self._interval:
+            # Other traffic proved the session alive, wait for the rest.
+            self._schedule(self._jitter(self._interval - idle))
+            return
+
+        self.sent += 1
+        try:
+            alive = await self._heartbeat()
+        except (UnexpectedStatus, httpx.HTTPError) as err:
+            _LOGGER.debug("Heartbeat failed: %s", err)
+            alive = False
+
+        if alive:
+            self._failures = 0
+            delay = self._interval
+        else:
+            self.failed += 1
+            self._failures += 1
+            delay = min(self._interval * 2**self._failures, HEARTBEAT_BACKOFF_MAX)
+        self._schedule(self._jitter(delay))
+
+    @staticmethod
+    def _jitter(delay: float) -> float:
+        return delay * random.uniform(1 - HEARTBEAT_JITTER, 1 + HEARTBEAT_JITTER)
@@ -1,6 +1,7 @@
 """This component encapsulates the Hikvision ISAPI."""
 from __future__ import annotations
 
+import asyncio
 from collections.abc import Mapping
 from http import HTTPStatus
 import logging
@@ -9,18 +10,43 @@ from urllib.parse import urlparse
 
 from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_PORT, CONF_USERNAME
 from homeassistant.helpers.device_registry import CONNECTION_NETWORK_MAC
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.device_registry import format_mac
-from hikvision_isapi_cli.client import Client
 from hikvision_isapi_sk.session import Session
-from hikvision_isapi_cli.api.default import session_heartbeat
-from hikvision_isapi_cli.api.isapi import usercheck, deviceinfo
+from hikvision_isapi_cli.api.isapi import (
+    deviceinfo,
+    door_capabilities,
+    get_isapi_streaming_channels as streaming,
+    usercheck,
+)
 from hikvision_isapi_cli.models import (
-    RootTypeForXMLDeviceInfo,
     RootTypeForXMLDeviceInfoDeviceInfo,
+    RootTypeForXMLStreamingChannel,
+)
+from .alert_stream import HikvisionAlertStream, HikvisionEvent
+from .breaker import CircuitBreaker, CircuitState
+from .channels import CameraChannels, group_channels
+from .const import (
+    CONF_KEEPALIVE,
+    CONF_MAX_REQUESTS,
+    CONF_VERIFY_SSL,
+    DEFAULT_KEEPALIVE,
+    DEFAULT_MAX_REQUESTS,
+    DEFAULT_TIMEOUT,
+    DOMAIN,
+    EVENT_HIKVISION,
+    MANUFACTURER,
 )
-from .const import CONF_VERIFY_SSL, MANUFACTURER, DEFAULT_TIMEOUT
+from .connection import async_get_connection_pool
+from .heartbeat import HeartbeatScheduler
+from .isapi import AcsWorkStatus, acs_work_status, session_heartbeat
+from .metrics import HostMetrics
+from .preview import HikvisionPreviews
+from .renewal import SessionRenewal
+from .scheduler import RequestPriority, RequestScheduler, request_priority
+from .snapshot import HikvisionSnapshots
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -38,17 +64,34 @@ class HikvisionHost:
         self._hass: HomeAssistant = hass
         self._unique_id: str = ""
         self._device_info: RootTypeForXMLDeviceInfoDeviceInfo
+        self._doors: int = 0
+        self._streaming_channels: list[RootTypeForXMLStreamingChannel] = []
+        self._cameras: list[CameraChannels] = []
         self._base_url = config[CONF_HOST] + ":" + str(config[CONF_PORT])
         self._hostname = urlparse(config[CONF_HOST]).hostname
 
-        self._api = Client(
+        self._api = async_get_connection_pool(hass).client(
             base_url=self._base_url,
             username=config[CONF_USERNAME],
             password=config[CONF_PASSWORD],
             verify_ssl=config[CONF_VERIFY_SSL],
             timeout=DEFAULT_TIMEOUT,
+            max_in_flight=config.get(CONF_MAX_REQUESTS, DEFAULT_MAX_REQUESTS),
+            on_circuit_change=self._circuit_changed,
         )
         self._session = Session(self._api)
+        self._renewal = SessionRenewal(self._async_login)
+        self._api.renewal = self._renewal
+        self._snapshots = HikvisionSnapshots(hass)
+        self._previews = HikvisionPreviews(hass, self._api)
+        self._alert_stream = HikvisionAlertStream(hass, self._api, self._handle_event)
+        self._access_control = True
+        self._heartbeat = HeartbeatScheduler(
+            hass,
+            config.get(CONF_KEEPALIVE, DEFAULT_KEEPALIVE),
+            self._async_heartbeat,
+            lambda: self._api.last_success,
+        )
 
     @property
     def unique_id(self) -> str:
@@ -60,6 +103,76 @@ class HikvisionHost:
         """Return the API object."""
         return self._api
 
+    @property
+    def doors(self) -> int:
+        """Return the number of doors found while bootstrapping."""
+        return self._doors
+
+    @property
+    def streaming_channels(self) -> list[RootTypeForXMLStreamingChannel]:
+        """Return the streaming channels found while bootstrapping."""
+        return self._streaming_channels
+
+    @property
+    def cameras(self) -> list[CameraChannels]:
+        """Return the streaming channels grouped by camera."""
+        return self._cameras
+
+    @property
+    def scheduler(self) -> RequestScheduler:
+        """Return the request scheduler of the device."""
+        return self._api.scheduler
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """Return the circuit breaker of the device."""
+        return self._api.breaker
+
+    @property
+    def alert_stream(self) -> HikvisionAlertStream:
+        """Return the alertStream subscription."""
+        return self._alert_stream
+
+    @property
+    def heartbeat(self) -> HeartbeatScheduler:
+        """Return the heartbeat scheduler of the session."""
+        return self._heartbeat
+
+    @property
+    def renewal(self) -> SessionRenewal:
+        """Return the single-flight session renewal of the device."""
+        return self._renewal
+
+    @property
+    def metrics(self) -> HostMetrics:
+        """Return the request statistics of the device."""
+        return self._api.metrics
+
+    @property
+    def snapshots(self) -> HikvisionSnapshots:
+        """Return the shared snapshot pipeline."""
+        return self._snapshots
+
+    @property
+    def previews(self) -> HikvisionPreviews:
+        """Return the shared MJPEG preview streams."""
+        return self._previews
+
+    @property
+    def event_signal(self) -> str:
+        """Return the dispatcher signal carrying this device's events."""
+        return f"{DOMAIN}_{self._unique_id}_event"
+
+    @property
+    def circuit_signal(self) -> str:
+        """Return the dispatcher signal sent when the circuit changes state."""
+        return f"{DOMAIN}_{self._unique_id}_circuit"
+
+    @property
+    def options_signal(self) -> str:
+        """Return the dispatcher signal carrying options applied in place."""
+        return f"{DOMAIN}_{self._unique_id}_options"
+
     @property
     def hostname(self):
         """Return the device Hostname."""
@@ -82,30 +195,132 @@ class HikvisionHost:
             + self._device_info.firmware_released_date,
         )
 
+    @property
+    def capabilities(self) -> dict[str, Any]:
+        """Return the bootstrap results in a JSON serializable form."""
+        return {
+            "firmware": self.device_info["sw_version"],
+            "device_info": self._device_info.to_dict(),
+            "doors": self._doors,
+            "streaming_channels": [
+                channel.to_dict() for channel in self._streaming_channels
+            ],
+        }
+
+    def restore_capabilities(self, capabilities: Mapping[str, Any]) -> None:
+        """Rebuild the bootstrap results from a cached copy."""
+        device_info = RootTypeForXMLDeviceInfoDeviceInfo.from_dict(
+            capabilities["device_info"]
+        )
+        self._unique_id = format_mac(device_info.mac_address)
+        self._device_info = device_info
+        self._doors = int(capabilities["doors"])
+        self._streaming_channels = [
+            RootTypeForXMLStreamingChannel.from_dict(channel)
+            for channel in capabilities["streaming_channels"]
+        ]
+        self._cameras = group_channels(self._streaming_channels)
+
     async def async_init(self) -> bool:
-        """Connect to Hikvision host."""
+        """Connect to Hikvision host and fetch its capabilities."""
 
         if not await usercheck.asyncio(client=self._api):
             return False
 
-        self._session.start()
-        device: RootTypeForXMLDeviceInfo = await deviceinfo.asyncio(client=self._api)
+        # A host set up from cache logs in through the renewal as soon as its
+        # first request is rejected, do not open a second session.
+        if not self._renewal.generation:
+            await self._hass.async_add_executor_job(self._session.start)
 
-        if device.device_info.mac_address is None:
+        # Every capability document is independent, fetch them in one round.
+        device, door_cap, channels = await asyncio.gather(
+            deviceinfo.asyncio(client=self._api),
+            door_capabilities.asyncio_detailed(client=self._api),
+            streaming.asyncio(client=self._api),
+        )
+        if device is None or device.device_info.mac_address is None:
             return False
 
         self._unique_id = format_mac(device.device_info.mac_address)
         self._device_info = device.device_info
 
+        if door_cap.status_code == HTTPStatus.OK and door_cap.parsed is not None:
+            self._doors = int(door_cap.parsed.remote_control_door.door_no.max_)
+        else:
+            _LOGGER.debug("No remote door control on %s: %s", self._hostname, door_cap)
+
+        if channels is not None and channels.streaming_channel_list:
+            self._streaming_channels = (
+                channels.streaming_channel_list.streaming_channel or []
+            )
+            self._cameras = group_channels(self._streaming_channels)
+
         _LOGGER.info("Device initialized %s", self.device_info["name"])
 
         return True
 
-    async def stop(self) -> bool:
+    def start(self) -> None:
+        """Start the heartbeat and subscribe to the device alertStream."""
+        self._heartbeat.start()
+        self._alert_stream.start()
+
+    @callback
+    def _handle_event(self, event: HikvisionEvent) -> None:
+        """Forward an alertStream event to entities and the event bus."""
+        _LOGGER.debug("Event from %s: %s", self._hostname, event)
+        async_dispatcher_send(self._hass, self.event_signal, event)
+        if event.kind is not None:
+            self._hass.bus.async_fire(
+                EVENT_HIKVISION,
+                {
+                    "mac": self._unique_id,
+                    "kind": event.kind,
+                    "event_type": event.event_type,
+                    "state": event.state,
+                    "channel": event.channel,
+                    "door": event.door,
+                    "date_time": event.date_time,
+                },
+            )
+
+    def _circuit_changed(self, state: CircuitState) -> None:
+        """Let entities refresh their availability, from any thread."""
+        self._hass.loop.call_soon_threadsafe(
+            async_dispatcher_send, self._hass, self.circuit_signal
+        )
+
+    async def stop(self, *_: Any) -> bool:
         """Stop the Hikvision session"""
+        self._heartbeat.stop()
+        await self._alert_stream.stop()
         self._session.stop()
+        self._snapshots.clear()
+        self._previews.close()
         return True
 
-    async def update_states(self) -> bool:
-        """Keep Hikvision alive ."""
-        return await self._session.heartbeat()
+    async def _async_login(self) -> bool:
+        """Open a new web session, Session.start is blocking."""
+        _LOGGER.info("Session of %s expired, logging in again", self._hostname)
+        return bool(await self._hass.async_add_executor_job(self._session.start))
+
+    async def _async_heartbeat(self) -> bool:
+        """Send a session heartbeat with the lowest priority."""
+        with request_priority(RequestPriority.HEARTBEAT):
+            response = await session_heartbeat(client=self._api)
+        return response.status_code == HTTPStatus.OK
+
+    async def update_states(self) -> AcsWorkStatus | None:
+        """Read the status of every door at once."""
+        if not self._access_control:
+            return None
+
+        response = await acs_work_status(client=self._api)
+        if response.status_code == HTTPStatus.OK:
+            return response.parsed
+
+        if response.status_code in (HTTPStatus.NOT_FOUND, HTTPStatus.FORBIDDEN):
+            _LOGGER.info("%s has no access control status", self._hostname)
+            self._access_control = False
+        else:
+            _LOGGER.error("AcsWorkStatus of %s: %s", self._hostname, response)
+        return None
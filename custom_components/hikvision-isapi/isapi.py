@@ -0,0 +1,390 @@
+"""ISAPI endpoints not covered by hikvision_isapi_cli."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import cache
+from http import HTTPStatus
+from typing import Any
+
+import httpx
+import xmltodict
+from hikvision_isapi_cli.client import Client
+from hikvision_isapi_cli.types import Response
+
+from .fastxml import scan
+
+
+def _build_response(response: httpx.Response) -> Response[Any]:
+    return Response(
+        status_code=HTTPStatus(response.status_code),
+        content=response.content,
+        headers=response.headers,
+        parsed=None,
+    )
+
+
+def _optional_int(value: Any) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def picture(
+    channel_id: int | str,
+    *,
+    client: Client,
+    width: int | None = None,
+    height: int | None = None,
+) -> Response[Any]:
+    """Grab a JPEG from /ISAPI/Streaming/channels/{channelId}/picture.
+
+    The device scales the image when width and height are provided.
+    """
+    params: dict[str, Any] = {}
+    if width:
+        params["videoResolutionWidth"] = width
+    if height:
+        params["videoResolutionHeight"] = height
+
+    response = await client._asyncio_api.request(
+        method="get",
+        url=f"{client.base_url}/ISAPI/Streaming/channels/{channel_id}/picture",
+        params=params,
+        headers=client.get_headers(),
+        cookies=client.get_cookies(),
+        timeout=client.get_timeout(),
+    )
+    return _build_response(response)
+
+
+def _values(value: Any) -> list[str]:
+    """Normalize a per-door field, repeated elements or comma separated."""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    return [item.strip() for item in str(value).split(",") if item.strip()]
+
+
+@dataclass
+class AcsWorkStatus:
+    """Subset of AcsWorkStatus used by the lock and sensor platforms.
+
+    Per-door lists are ordered by door number, index 0 being door 1.
+    """
+
+    door_lock_status: list[str] = field(default_factory=list)
+    door_status: list[str] = field(default_factory=list)
+    magnetic_status: list[str] = field(default_factory=list)
+    anti_sneak_status: str | None = None
+    host_anti_dismantle_status: str | None = None
+
+    @property
+    def doors(self) -> int:
+        """Return the number of doors reported by the device."""
+        return max(
+            len(self.door_lock_status), len(self.door_status), len(self.magnetic_status)
+        )
+
+    @classmethod
+    def from_xml(cls, body: bytes) -> AcsWorkStatus:
+        """Build the status straight from the response body."""
+        fields = scan(body, _ACS_WORK_STATUS_FIELDS)
+
+        def per_door(name: str) -> list[str]:
+            values = fields.getall(name)
+            # A single element may carry every door, comma separated.
+            return _values(values[0] if len(values) == 1 else values)
+
+        return cls(
+            door_lock_status=per_door("doorLockStatus"),
+            door_status=per_door("doorStatus"),
+            magnetic_status=per_door("magneticStatus"),
+            anti_sneak_status=fields.get("antiSneakStatus"),
+            host_anti_dismantle_status=fields.get("hostAntiDismantleStatus"),
+        )
+
+
+_ACS_WORK_STATUS_FIELDS = frozenset(
+    (
+        "doorLockStatus",
+        "doorStatus",
+        "magneticStatus",
+        "antiSneakStatus",
+        "hostAntiDismantleStatus",
+    )
+)
+
+
+async def acs_work_status(*, client: Client) -> Response[AcsWorkStatus]:
+    """Read the status of every door from /ISAPI/AccessControl/AcsWorkStatus."""
+    response = await client._asyncio_api.request(
+        method="get",
+        url=f"{client.base_url}/ISAPI/AccessControl/AcsWorkStatus",
+        headers=client.get_headers(),
+        cookies=client.get_cookies(),
+        timeout=client.get_timeout(),
+    )
+    result = _build_response(response)
+    if response.status_code == HTTPStatus.OK:
+        result.parsed = AcsWorkStatus.from_xml(response.content)
+    return result
+
+
+@dataclass
+class ResponseStatus:
+    """The fields of a ResponseStatus reply that callers check."""
+
+    status_code: int | None = None
+    sub_status_code: str | None = None
+
+    @classmethod
+    def from_xml(cls, body: bytes) -> ResponseStatus:
+        """Build the status straight from the response body."""
+        fields = scan(body, _RESPONSE_STATUS_FIELDS)
+        status_code = fields.get("statusCode")
+        return cls(
+            status_code=int(status_code) if status_code else None,
+            sub_status_code=fields.get("subStatusCode"),
+        )
+
+
+_RESPONSE_STATUS_FIELDS = frozenset(("statusCode", "subStatusCode"))
+
+
+async def session_heartbeat(*, client: Client) -> Response[ResponseStatus]:
+    """Keep the web session alive with PUT /ISAPI/Security/sessionHeartbeat."""
+    response = await client._asyncio_api.request(
+        method="put",
+        url=f"{client.base_url}/ISAPI/Security/sessionHeartbeat",
+        headers=client.get_headers(),
+        cookies=client.get_cookies(),
+        timeout=client.get_timeout(),
+    )
+    result = _build_response(response)
+    if response.status_code == HTTPStatus.OK:
+        result.parsed = ResponseStatus.from_xml(response.content)
+    return result
+
+
+@dataclass
+class AcsEventRecord:
+    """One entry of the access control event log."""
+
+    major: int
+    minor: int
+    time: str
+    serial_no: int | None = None
+    door: int | None = None
+    card_no: str | None = None
+    name: str | None = None
+    employee_no: str | None = None
+
+    @classmethod
+    def from_dict(cls, src_dict: dict[str, Any]) -> AcsEventRecord:
+        """Build the record from an InfoList item."""
+        return cls(
+            major=int(src_dict["major"]),
+            minor=int(src_dict["minor"]),
+            time=src_dict["time"],
+            serial_no=src_dict.get("serialNo"),
+            door=src_dict.get("doorNo"),
+            card_no=src_dict.get("cardNo") or None,
+            name=src_dict.get("name") or None,
+            employee_no=src_dict.get("employeeNoString") or None,
+        )
+
+
+@dataclass
+class AcsEventPage:
+    """One page of an AcsEvent search."""
+
+    more: bool
+    total_matches: int
+    records: list[AcsEventRecord] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, src_dict: dict[str, Any]) -> AcsEventPage:
+        """Build the page from the JSON search result."""
+        result = src_dict.get("AcsEvent") or {}
+        return cls(
+            more=result.get("responseStatusStrg") == "MORE",
+            total_matches=int(result.get("totalMatches", 0)),
+            records=[
+                AcsEventRecord.from_dict(item) for item in result.get("InfoList", [])
+            ],
+        )
+
+
+async def acs_event_search(
+    *,
+    client: Client,
+    search_id: str,
+    position: int,
+    max_results: int,
+    start_time: str,
+) -> Response[AcsEventPage]:
+    """Read one page of /ISAPI/AccessControl/AcsEvent, oldest events first."""
+    response = await client._asyncio_api.request(
+        method="post",
+        url=f"{client.base_url}/ISAPI/AccessControl/AcsEvent",
+        params={"format": "json"},
+        json={
+            "AcsEventCond": {
+                "searchID": search_id,
+                "searchResultPosition": position,
+                "maxResults": max_results,
+                "major": 0,
+                "minor": 0,
+                "startTime": start_time,
+                "timeReverseOrder": False,
+            }
+        },
+        headers=client.get_headers(),
+        cookies=client.get_cookies(),
+        timeout=client.get_timeout(),
+    )
+    result = _build_response(response)
+    if response.status_code == HTTPStatus.OK:
+        result.parsed = AcsEventPage.from_dict(response.json())
+    return result
+
+
+@dataclass
+class SearchPage:
+    """One page of a UserInfo or CardInfo search."""
+
+    more: bool
+    total_matches: int
+    items: list[dict[str, Any]] = field(default_factory=list)
+
+
+async def _search(
+    client: Client,
+    path: str,
+    name: str,
+    search_id: str,
+    position: int,
+    max_results: int,
+) -> Response[SearchPage]:
+    response = await client._asyncio_api.request(
+        method="post",
+        url=f"{client.base_url}{path}/Search",
+        params={"format": "json"},
+        json={
+            f"{name}SearchCond": {
+                "searchID": search_id,
+                "searchResultPosition": position,
+                "maxResults": max_results,
+            }
+        },
+        headers=client.get_headers(),
+        cookies=client.get_cookies(),
+        timeout=client.get_timeout(),
+    )
+    result = _build_response(response)
+    if response.status_code == HTTPStatus.OK:
+        search = response.json().get(f"{name}Search") or {}
+        result.parsed = SearchPage(
+            more=search.get("responseStatusStrg") == "MORE",
+            total_matches=int(search.get("totalMatches", 0)),
+            items=search.get(name) or [],
+        )
+    return result
+
+
+async def user_info_search(
+    *, client: Client, search_id: str, position: int, max_results: int
+) -> Response[SearchPage]:
+    """Read one page of /ISAPI/AccessControl/UserInfo/Search."""
+    return await _search(
+        client,
+        "/ISAPI/AccessControl/UserInfo",
+        "UserInfo",
+        search_id,
+        position,
+        max_results,
+    )
+
+
+async def card_info_search(
+    *, client: Client, search_id: str, position: int, max_results: int
+) -> Response[SearchPage]:
+    """Read one page of /ISAPI/AccessControl/CardInfo/Search."""
+    return await _search(
+        client,
+        "/ISAPI/AccessControl/CardInfo",
+        "CardInfo",
+        search_id,
+        position,
+        max_results,
+    )
+
+
+@dataclass
+class UserCounts:
+    """The UserInfo/Count totals, None for those the firmware omits."""
+
+    users: int
+    card_users: int | None = None
+    face_users: int | None = None
+
+
+async def user_info_count(*, client: Client) -> Response[UserCounts]:
+    """Read the user totals from /ISAPI/AccessControl/UserInfo/Count.
+
+    One request covers the users and how many of them have a card or a face.
+    """
+    response = await client._asyncio_api.request(
+        method="get",
+        url=f"{client.base_url}/ISAPI/AccessControl/UserInfo/Count",
+        params={"format": "json"},
+        headers=client.get_headers(),
+        cookies=client.get_cookies(),
+        timeout=client.get_timeout(),
+    )
+    result = _build_response(response)
+    if response.status_code == HTTPStatus.OK:
+        count = response.json()["UserInfoCount"]
+        result.parsed = UserCounts(
+            users=int(count["userNumber"]),
+            card_users=_optional_int(count.get("bindCardUserNumber")),
+            face_users=_optional_int(count.get("bindFaceUserNumber")),
+        )
+    return result
+
+
+@cache
+def door_payload(cmd: str) -> bytes:
+    """Return the encoded RemoteControlDoor body of a command.
+
+    The body does not depend on the door, the door id is in the URL.
+    """
+    return xmltodict.unparse(
+        {
+            "RemoteControlDoor": {
+                "@version": "2.0",
+                "@xmlns": "http://www.isapi.org/ver20/XMLSchema",
+                "cmd": cmd,
+            }
+        }
+    ).encode()
+
+
+async def remote_control_door(
+    door_id: int, cmd: str, *, client: Client
+) -> Response[ResponseStatus]:
+    """Send a command to /ISAPI/AccessControl/RemoteControl/door/{doorId}."""
+    response = await client._asyncio_api.request(
+        method="put",
+        url=f"{client.base_url}/ISAPI/AccessControl/RemoteControl/door/{door_id}",
+        headers=client.get_headers(),
+        cookies=client.get_cookies(),
+        timeout=client.get_timeout(),
+        content=door_payload(cmd),
+    )
+    result = _build_response(response)
+    if response.status_code == HTTPStatus.OK:
+        result.parsed = ResponseStatus.from_xml(response.content)
+    return result
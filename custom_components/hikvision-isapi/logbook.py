@@ -0,0 +1,38 @@
+"""Describe Hikvision ISAPI logbook events."""
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from homeassistant.components.logbook import LOGBOOK_ENTRY_MESSAGE, LOGBOOK_ENTRY_NAME
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+
+from .const import ACS_EVENT_DESCRIPTIONS, DOMAIN, EVENT_HIKVISION_ACS
+
+
+@callback
+def async_describe_events(
+    hass: HomeAssistant,
+    async_describe_event: Callable[[str, str, Callable[[Event], dict[str, str]]], None],
+) -> None:
+    """Describe the access control log records."""
+    device_registry = dr.async_get(hass)
+
+    @callback
+    def async_describe_acs_event(event: Event) -> dict[str, str]:
+        data = event.data
+        device = device_registry.async_get_device(identifiers={(DOMAIN, data["mac"])})
+        name = (device.name_by_user or device.name) if device else data["mac"]
+
+        major, minor = data["major"], data["minor"]
+        message = ACS_EVENT_DESCRIPTIONS.get(
+            (major, minor), f"logged event {major}/{minor:#x}"
+        )
+        if data.get("door"):
+            message = f"door {data['door']} {message}"
+        if who := data.get("name") or data.get("employee_no") or data.get("card_no"):
+            message = f"{message} for {who}"
+
+        return {LOGBOOK_ENTRY_NAME: name, LOGBOOK_ENTRY_MESSAGE: message}
+
+    async_describe_event(DOMAIN, EVENT_HIKVISION_ACS, async_describe_acs_event)
@@ -0,0 +1,127 @@
+"""Per-endpoint request statistics of a Hikvision host."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from functools import lru_cache
+import re
+import threading
+from typing import Any
+
+import httpx
+
+from .const import LATENCY_BUCKETS
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+@lru_cache(maxsize=64)
+def endpoint(url: str) -> str:
+    """Return the path of a request with numeric ids folded into {id}."""
+    return _ID_SEGMENT.sub("/{id}", httpx.URL(url).path)
+
+
+class EndpointStats:
+    """Request count, error count and latency histogram of one endpoint.
+
+    Latencies are counted in the fixed LATENCY_BUCKETS, in milliseconds, so
+    memory does not grow with the number of requests.
+    """
+
+    __slots__ = ("count", "errors", "total", "buckets")
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, elapsed: float, error: bool) -> None:
+        """Count a request that took ``elapsed`` seconds."""
+        self.count += 1
+        self.errors += error
+        self.total += elapsed
+        self.buckets[bisect_left(LATENCY_BUCKETS, elapsed * 1000)] += 1
+
+    def merge(self, other: EndpointStats) -> None:
+        """Add the statistics of another endpoint."""
+        self.count += other.count
+        self.errors += other.errors
+        self.total += other.total
+        for index, count in enumerate(other.buckets):
+            self.buckets[index] += count
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean latency in milliseconds."""
+        if not self.count:
+            return None
+        return self.total * 1000 / self.count
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate a latency quantile in milliseconds from the histogram."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            if seen + count >= rank and count:
+                if index == len(LATENCY_BUCKETS):
+                    return float(LATENCY_BUCKETS[-1])
+                lower = LATENCY_BUCKETS[index - 1] if index else 0
+                upper = LATENCY_BUCKETS[index]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return float(LATENCY_BUCKETS[-1])
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics in a JSON serializable form."""
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": self.mean,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "histogram_ms": dict(
+                zip([*map(str, LATENCY_BUCKETS), "+Inf"], self.buckets)
+            ),
+        }
+
+
+class HostMetrics:
+    """Statistics of every endpoint called on one host.
+
+    Requests are recorded from the event loop and from executor threads.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self._lock = threading.Lock()
+        self._endpoints: dict[str, EndpointStats] = {}
+
+    def record(self, url: str, elapsed: float, error: bool) -> None:
+        """Count a request to ``url``."""
+        name = endpoint(url)
+        with self._lock:
+            if (stats := self._endpoints.get(name)) is None:
+                stats = self._endpoints[name] = EndpointStats()
+            stats.record(elapsed, error)
+
+    @property
+    def endpoints(self) -> dict[str, EndpointStats]:
+        """Return the statistics per endpoint."""
+        with self._lock:
+            return dict(self._endpoints)
+
+    def total(self) -> EndpointStats:
+        """Return the statistics of every endpoint added together."""
+        total = EndpointStats()
+        with self._lock:
+            for stats in self._endpoints.values():
+                total.merge(stats)
+        return total
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics in a JSON serializable form."""
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in self._endpoints.items()}
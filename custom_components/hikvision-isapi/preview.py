@@ -0,0 +1,174 @@
+"""MJPEG live preview relayed from the device httpPreview stream."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from aiohttp import web
+from aiohttp.hdrs import CONTENT_TYPE
+import httpx
+from hikvision_isapi_cli.client import Client
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    PREVIEW_CONNECT_TIMEOUT,
+    PREVIEW_READ_TIMEOUT,
+    PREVIEW_VIEWER_BACKLOG,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+Viewer = asyncio.Queue[bytes | None]
+
+
+class PreviewStream:
+    """One upstream httpPreview connection shared by every viewer.
+
+    Chunks are forwarded as read, the same bytes object is queued for each
+    viewer without decoding or copying. A viewer joining mid-part receives
+    the rest of that part as multipart preamble, which clients skip. The
+    connection is closed when the last viewer leaves.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: Client, channel_id: str) -> None:
+        """Initialize the stream of a channel."""
+        self._hass = hass
+        self._client = client
+        self._channel_id = channel_id
+        self._viewers: set[Viewer] = set()
+        self._task: asyncio.Task | None = None
+        self._content_type: asyncio.Future[str | None] | None = None
+
+    @property
+    def viewers(self) -> int:
+        """Return the number of connected viewers."""
+        return len(self._viewers)
+
+    @property
+    def connected(self) -> bool:
+        """Return True while the upstream connection is open."""
+        return self._task is not None and not self._task.done()
+
+    def subscribe(self) -> Viewer:
+        """Add a viewer, connecting upstream for the first one."""
+        viewer: Viewer = asyncio.Queue(PREVIEW_VIEWER_BACKLOG)
+        if not self.connected:
+            # Each connection serves its own viewers, the end of a previous
+            # one must not reach the viewers of the next.
+            self._viewers = set()
+            self._content_type = self._hass.loop.create_future()
+            self._task = self._hass.async_create_background_task(
+                self._async_relay(self._viewers, self._content_type),
+                f"hikvision httpPreview {self._client.base_url} {self._channel_id}",
+            )
+        self._viewers.add(viewer)
+        return viewer
+
+    def unsubscribe(self, viewer: Viewer) -> None:
+        """Remove a viewer, disconnecting upstream after the last one."""
+        self._viewers.discard(viewer)
+        if not self._viewers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def async_content_type(self) -> str | None:
+        """Wait for the upstream connection, None when it failed."""
+        if self._content_type is None:
+            return None
+        try:
+            async with asyncio.timeout(PREVIEW_CONNECT_TIMEOUT):
+                return await asyncio.shield(self._content_type)
+        except TimeoutError:
+            return None
+
+    def close(self) -> None:
+        """Disconnect every viewer and the upstream connection."""
+        self._publish(self._viewers, None)
+        self._viewers.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _async_relay(
+        self, viewers: set[Viewer], content_type: asyncio.Future[str | None]
+    ) -> None:
+        try:
+            async with self._client._asyncio_api.stream(
+                "GET",
+                f"{self._client.base_url}/ISAPI/Streaming/channels/"
+                f"{self._channel_id}/httpPreview",
+                headers=self._client.get_headers(),
+                cookies=self._client.get_cookies(),
+                timeout=httpx.Timeout(
+                    self._client.get_timeout(), read=PREVIEW_READ_TIMEOUT
+                ),
+            ) as response:
+                response.raise_for_status()
+                content_type.set_result(response.headers[CONTENT_TYPE])
+                async for chunk in response.aiter_raw():
+                    self._publish(viewers, chunk)
+        except (httpx.HTTPError, KeyError) as err:
+            _LOGGER.debug("httpPreview of %s ended: %s", self._channel_id, err)
+        finally:
+            if not content_type.done():
+                content_type.set_result(None)
+            # Ends the responses of the viewers still attached.
+            self._publish(viewers, None)
+
+    def _publish(self, viewers: set[Viewer], chunk: bytes | None) -> None:
+        for viewer in list(viewers):
+            try:
+                viewer.put_nowait(chunk)
+            except asyncio.QueueFull:
+                _LOGGER.debug(
+                    "Dropping a slow httpPreview viewer of %s", self._channel_id
+                )
+                viewers.discard(viewer)
+                viewer.get_nowait()
+                viewer.put_nowait(None)
+
+
+class HikvisionPreviews:
+    """The httpPreview streams of one host, by channel."""
+
+    def __init__(self, hass: HomeAssistant, client: Client) -> None:
+        """Initialize the previews of a host."""
+        self._hass = hass
+        self._client = client
+        self._streams: dict[str, PreviewStream] = {}
+
+    def stream(self, channel_id: str) -> PreviewStream:
+        """Return the shared stream of a channel."""
+        if (stream := self._streams.get(channel_id)) is None:
+            stream = self._streams[channel_id] = PreviewStream(
+                self._hass, self._client, channel_id
+            )
+        return stream
+
+    async def async_handle(
+        self, request: web.Request, channel_id: str
+    ) -> web.StreamResponse | None:
+        """Relay the live preview, None when the channel has none."""
+        stream = self.stream(channel_id)
+        viewer = stream.subscribe()
+        try:
+            if (content_type := await stream.async_content_type()) is None:
+                return None
+            response = web.StreamResponse(headers={CONTENT_TYPE: content_type})
+            await response.prepare(request)
+            try:
+                while (chunk := await viewer.get()) is not None:
+                    await response.write(chunk)
+            except ConnectionResetError:
+                # The viewer went away.
+                pass
+            return response
+        finally:
+            stream.unsubscribe(viewer)
+
+    def close(self) -> None:
+        """Disconnect every viewer and upstream connection."""
+        for stream in self._streams.values():
+            stream.close()
+        self._streams.clear()
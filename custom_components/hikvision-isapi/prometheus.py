@@ -0,0 +1,128 @@
+"""Prometheus text exposition of the Hikvision fleet metrics."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from http import HTTPStatus
+from itertools import accumulate
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant
+
+from .breaker import CircuitState
+from .const import DOMAIN, LATENCY_BUCKETS
+from .host import HikvisionHost
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "hikvision_isapi"
+
+_LE = [f"{bucket / 1000:g}" for bucket in LATENCY_BUCKETS] + ["+Inf"]
+
+# Metric name -> (type, help).
+METRICS = {
+    "requests_total": ("counter", "ISAPI requests sent to the device."),
+    "request_errors_total": ("counter", "ISAPI requests that failed."),
+    "request_duration_seconds": ("histogram", "ISAPI request latency."),
+    "heartbeats_total": ("counter", "Session heartbeats sent."),
+    "heartbeat_failures_total": ("counter", "Session heartbeats that failed."),
+    "session_logins_total": ("counter", "Logins after an expired session."),
+    "session_login_waits_total": ("counter", "Requests that reused another login."),
+    "session_login_failures_total": ("counter", "Logins that failed."),
+    "circuit_state": ("gauge", "Circuit breaker state of the device."),
+    "snapshot_cache_hits_total": ("counter", "Snapshots served without a request."),
+    "snapshot_cache_misses_total": ("counter", "Snapshots fetched from the device."),
+    "snapshot_cache_hit_ratio": ("gauge", "Share of snapshots served from cache."),
+    "event_stream_connected": ("gauge", "Whether the alertStream is connected."),
+    "events_total": ("counter", "Events received on the alertStream."),
+    "event_stream_lag_seconds": ("gauge", "Delay of the last event, device clock."),
+}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value: float) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _samples(host: HikvisionHost) -> Iterable[tuple[str, str, float]]:
+    """Yield (metric, labels, value) of one host, from its running counters."""
+    device = _labels(device=host.unique_id)
+
+    for endpoint, stats in host.metrics.endpoints.items():
+        labels = f"{device},{_labels(endpoint=endpoint)}"
+        yield "requests_total", labels, stats.count
+        yield "request_errors_total", labels, stats.errors
+        for le, count in zip(_LE, accumulate(stats.buckets)):
+            yield "request_duration_seconds_bucket", f'{labels},le="{le}"', count
+        yield "request_duration_seconds_sum", labels, stats.total
+        yield "request_duration_seconds_count", labels, stats.count
+
+    yield "heartbeats_total", device, host.heartbeat.sent
+    yield "heartbeat_failures_total", device, host.heartbeat.failed
+
+    yield "session_logins_total", device, host.renewal.logins
+    yield "session_login_waits_total", device, host.renewal.joined
+    yield "session_login_failures_total", device, host.renewal.failed
+
+    state = host.breaker.state
+    for circuit in CircuitState:
+        yield "circuit_state", f'{device},state="{circuit}"', int(circuit == state)
+
+    snapshots = host.snapshots
+    yield "snapshot_cache_hits_total", device, snapshots.hits
+    yield "snapshot_cache_misses_total", device, snapshots.misses
+    if served := snapshots.hits + snapshots.misses:
+        yield "snapshot_cache_hit_ratio", device, snapshots.hits / served
+
+    stream = host.alert_stream
+    yield "event_stream_connected", device, int(stream.connected)
+    yield "events_total", device, stream.events
+    if stream.lag is not None:
+        yield "event_stream_lag_seconds", device, stream.lag
+
+
+def render(hosts: Iterable[HikvisionHost]) -> str:
+    """Render the metrics of every host in the text exposition format."""
+    grouped: dict[str, list[str]] = {name: [] for name in METRICS}
+    for host in hosts:
+        for name, labels, value in _samples(host):
+            family = name
+            for suffix in ("_bucket", "_sum", "_count"):
+                if name.endswith(suffix) and name not in METRICS:
+                    family = name.removesuffix(suffix)
+            grouped[family].append(f"{PREFIX}_{name}{{{labels}}} {_format(value)}")
+
+    lines = []
+    for name, samples in grouped.items():
+        if not samples:
+            continue
+        kind, description = METRICS[name]
+        lines.append(f"# HELP {PREFIX}_{name} {description}")
+        lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+        lines.extend(samples)
+    lines.append("")
+    return "\n".join(lines)
+
+
+class HikvisionMetricsView(HomeAssistantView):
+    """Serve the metrics of every configured Hikvision host."""
+
+    url = f"/api/{DOMAIN}/metrics"
+    name = f"api:{DOMAIN}:metrics"
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Render the current counters, nothing is fetched from the devices."""
+        hass: HomeAssistant = request.app["hass"]
+        hosts = [data.host for data in hass.data.get(DOMAIN, {}).values()]
+        return web.Response(
+            status=HTTPStatus.OK,
+            body=render(hosts).encode(),
+            headers={"Content-Type": CONTENT_TYPE},
+        )
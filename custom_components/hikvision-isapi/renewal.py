@@ -0,0 +1,74 @@
+"""Single-flight renewal of the web session of a Hikvision host."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+import time
+from typing import Any
+
+from .const import RELOGIN_COOLDOWN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SessionRenewal:
+    """Log in again once for every request rejected with an expired session.
+
+    Requests remember the generation of the session they were sent with.
+    The first rejected request starts the login and the others wait for it,
+    a request sent before a completed login retries without logging in.
+    After a failed login no other is attempted for RELOGIN_COOLDOWN
+    seconds, so a wrong password does not trip the device lockout.
+    """
+
+    def __init__(self, login: Callable[[], Awaitable[bool]]) -> None:
+        """Initialize the renewal with the coroutine that logs in."""
+        self._login = login
+        self._task: asyncio.Task[bool] | None = None
+        self._failed_at: float | None = None
+        self.generation = 0
+        self.logins = 0
+        self.joined = 0
+        self.failed = 0
+
+    async def async_renew(self, generation: int) -> bool:
+        """Return True once the request may be retried with a new session."""
+        if generation != self.generation:
+            # Another request logged in after this one was sent.
+            self.joined += 1
+            return True
+        if self._task is None:
+            if (
+                self._failed_at is not None
+                and time.monotonic() - self._failed_at < RELOGIN_COOLDOWN
+            ):
+                return False
+            self._task = asyncio.get_running_loop().create_task(self._async_login())
+        else:
+            self.joined += 1
+        # A cancelled caller must not cancel the login the others wait for.
+        return await asyncio.shield(self._task)
+
+    async def _async_login(self) -> bool:
+        self.logins += 1
+        try:
+            renewed = bool(await self._login())
+        except Exception as err:  # pylint: disable=broad-except
+            # Session.start fails with whatever the device answers.
+            _LOGGER.debug("Session renewal failed: %s", err)
+            renewed = False
+        finally:
+            self._task = None
+
+        if renewed:
+            self.generation += 1
+            self._failed_at = None
+        else:
+            self.failed += 1
+            self._failed_at = time.monotonic()
+        return renewed
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters in a JSON serializable form."""
+        return {"logins": self.logins, "joined": self.joined, "failed": self.failed}
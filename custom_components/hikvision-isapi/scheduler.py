@@ -0,0 +1,103 @@
+"""Per-host request scheduling with priority classes."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+import heapq
+import itertools
+
+
+class RequestPriority(IntEnum):
+    """Priority classes, lower values are served first."""
+
+    DOOR_CONTROL = 0
+    EVENTS = 1
+    STATUS = 2
+    SNAPSHOT = 3
+    HEARTBEAT = 4
+
+
+_PRIORITY: ContextVar[RequestPriority] = ContextVar(
+    "hikvision_request_priority", default=RequestPriority.STATUS
+)
+
+
+@contextmanager
+def request_priority(priority: RequestPriority) -> Iterator[None]:
+    """Run the requests issued inside the block with the given priority."""
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+class RequestScheduler:
+    """Cap the requests in flight to one device.
+
+    When every slot is taken, waiting requests are granted in priority order
+    and in arrival order within the same priority.
+    """
+
+    def __init__(self, max_in_flight: int) -> None:
+        """Initialize the scheduler."""
+        self._max_in_flight = max(max_in_flight, 1)
+        self._in_flight = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of requests holding a slot."""
+        return self._in_flight
+
+    @property
+    def max_in_flight(self) -> int:
+        """Return the number of slots."""
+        return self._max_in_flight
+
+    @max_in_flight.setter
+    def max_in_flight(self, max_in_flight: int) -> None:
+        self._max_in_flight = max(max_in_flight, 1)
+        while self._in_flight < self._max_in_flight and self._wake_next():
+            self._in_flight += 1
+
+    @asynccontextmanager
+    async def slot(self, priority: RequestPriority | None = None) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block."""
+        await self._acquire(_PRIORITY.get() if priority is None else priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: RequestPriority) -> None:
+        if self._in_flight < self._max_in_flight and not self._waiters:
+            self._in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over right before the cancellation.
+                self._release()
+            raise
+
+    def _wake_next(self) -> bool:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return True
+        return False
+
+    def _release(self) -> None:
+        # The slot is handed over to the next waiter, if any.
+        if self._in_flight > self._max_in_flight or not self._wake_next():
+            self._in_flight -= 1
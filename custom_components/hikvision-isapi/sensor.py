@@ -0,0 +1,289 @@
+"""This component provides the Hikvision access control status sensors."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import logging
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from . import HikvisionData
+from .alert_stream import HikvisionEvent
+from .const import (
+    DOMAIN,
+    EVENT_KIND_DOOR_CLOSE,
+    EVENT_KIND_DOOR_OPEN,
+    EVENT_KIND_LOCKED,
+    EVENT_KIND_TAMPER,
+    EVENT_KIND_UNLOCKED,
+    MANUFACTURER,
+)
+from .entity import HikvisionCoordinatorEntity
+from .isapi import AcsWorkStatus
+from .metrics import EndpointStats
+
+_LOGGER = logging.getLogger(__name__)
+
+# doorLockStatus and magneticStatus share the same codes.
+CIRCUIT_STATUS = {
+    "0": "closed",
+    "1": "open",
+    "2": "short_circuit",
+    "3": "broken_circuit",
+    "4": "exception",
+}
+DOOR_STATUS = {
+    "1": "sleep",
+    "2": "remain_open",
+    "3": "remain_closed",
+    "4": "normal",
+}
+SWITCH_STATUS = {"open": "open", "close": "closed"}
+
+
+@dataclass
+class HikvisionSensorEntityDescription(SensorEntityDescription):
+    """Describe a sensor fed by AcsWorkStatus."""
+
+    value_fn: Callable[[AcsWorkStatus, int], str | None] = lambda status, door: None
+    # alertStream events that refresh the status right away.
+    event_kinds: frozenset[str] = frozenset()
+
+
+@dataclass
+class HikvisionMetricSensorEntityDescription(SensorEntityDescription):
+    """Describe a diagnostic sensor fed by the request statistics."""
+
+    metric_fn: Callable[[EndpointStats], float | int | None] = lambda stats: None
+
+
+def _door_value(field: str, mapping: dict[str, str]):
+    def value(status: AcsWorkStatus, door: int) -> str | None:
+        values = getattr(status, field)
+        if door > len(values):
+            return None
+        return mapping.get(values[door - 1])
+
+    return value
+
+
+DOOR_SENSORS: tuple[HikvisionSensorEntityDescription, ...] = (
+    HikvisionSensorEntityDescription(
+        key="lock_status",
+        name="lock status",
+        icon="mdi:lock-question",
+        device_class=SensorDeviceClass.ENUM,
+        options=list(CIRCUIT_STATUS.values()),
+        value_fn=_door_value("door_lock_status", CIRCUIT_STATUS),
+        event_kinds=frozenset((EVENT_KIND_UNLOCKED, EVENT_KIND_LOCKED)),
+    ),
+    HikvisionSensorEntityDescription(
+        key="magnetic_status",
+        name="magnetic contact",
+        icon="mdi:door",
+        device_class=SensorDeviceClass.ENUM,
+        options=list(CIRCUIT_STATUS.values()),
+        value_fn=_door_value("magnetic_status", CIRCUIT_STATUS),
+        event_kinds=frozenset((EVENT_KIND_DOOR_OPEN, EVENT_KIND_DOOR_CLOSE)),
+    ),
+    HikvisionSensorEntityDescription(
+        key="door_status",
+        name="door mode",
+        icon="mdi:door-closed-lock",
+        device_class=SensorDeviceClass.ENUM,
+        options=list(DOOR_STATUS.values()),
+        value_fn=_door_value("door_status", DOOR_STATUS),
+    ),
+)
+
+DEVICE_SENSORS: tuple[HikvisionSensorEntityDescription, ...] = (
+    HikvisionSensorEntityDescription(
+        key="anti_sneak_status",
+        name="Anti-sneak",
+        icon="mdi:account-arrow-right",
+        device_class=SensorDeviceClass.ENUM,
+        options=list(SWITCH_STATUS.values()),
+        value_fn=lambda status, _: SWITCH_STATUS.get(status.anti_sneak_status),
+    ),
+    HikvisionSensorEntityDescription(
+        key="host_anti_dismantle_status",
+        name="Tamper",
+        icon="mdi:shield-alert",
+        device_class=SensorDeviceClass.ENUM,
+        options=list(SWITCH_STATUS.values()),
+        value_fn=lambda status, _: SWITCH_STATUS.get(
+            status.host_anti_dismantle_status
+        ),
+        event_kinds=frozenset((EVENT_KIND_TAMPER,)),
+    ),
+)
+
+
+METRIC_SENSORS: tuple[HikvisionMetricSensorEntityDescription, ...] = (
+    HikvisionMetricSensorEntityDescription(
+        key="requests",
+        name="Requests",
+        icon="mdi:swap-horizontal",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        metric_fn=lambda stats: stats.count,
+    ),
+    HikvisionMetricSensorEntityDescription(
+        key="request_errors",
+        name="Request errors",
+        icon="mdi:alert-circle-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        metric_fn=lambda stats: stats.errors,
+    ),
+    HikvisionMetricSensorEntityDescription(
+        key="request_latency_p95",
+        name="Request latency p95",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        metric_fn=lambda stats: stats.quantile(0.95),
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the Hikvision access control sensors."""
+    hikvision_data: HikvisionData = hass.data[DOMAIN][config_entry.entry_id]
+    status: AcsWorkStatus | None = hikvision_data.device_coordinator.data
+
+    sensors: list[HikvisionSensor] = [
+        HikvisionMetricSensor(hikvision_data, config_entry, description, None)
+        for description in METRIC_SENSORS
+    ]
+    if status is None and not hikvision_data.host.doors:
+        async_add_entities(sensors)
+        return
+    doors = status.doors if status is not None else hikvision_data.host.doors
+
+    sensors.extend(
+        HikvisionSensor(hikvision_data, config_entry, description, None)
+        for description in DEVICE_SENSORS
+    )
+    for door in range(1, doors + 1):
+        sensors.extend(
+            HikvisionSensor(hikvision_data, config_entry, description, door)
+            for description in DOOR_SENSORS
+        )
+
+    async_add_entities(sensors)
+
+
+class HikvisionSensor(HikvisionCoordinatorEntity, SensorEntity):
+    """A value of the AcsWorkStatus shared by the device coordinator."""
+
+    entity_description: HikvisionSensorEntityDescription
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        hikvision_data: HikvisionData,
+        config_entry: ConfigEntry,
+        description: HikvisionSensorEntityDescription,
+        door: int | None,
+    ) -> None:
+        """Initialize the sensor."""
+        HikvisionCoordinatorEntity.__init__(self, hikvision_data, config_entry)
+        self.entity_description = description
+        self._door = door
+
+        if door is None:
+            self._attr_name = description.name
+            self._attr_unique_id = f"{self._host.unique_id}_{description.key}"
+        else:
+            self._attr_name = f"Door {door} {description.name}"
+            self._attr_unique_id = f"{self._host.unique_id}_{door}_{description.key}"
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the device events that change this status."""
+        await super().async_added_to_hass()
+        if getattr(self.entity_description, "event_kinds", None):
+            self.async_on_remove(
+                async_dispatcher_connect(
+                    self.hass, self._host.event_signal, self._handle_event
+                )
+            )
+
+    @callback
+    def _handle_event(self, event: HikvisionEvent) -> None:
+        """Read the status now instead of at the next poll."""
+        if event.kind not in self.entity_description.event_kinds:
+            return
+        if self._door is not None and event.door not in (None, self._door):
+            return
+        # The coordinator debouncer turns the sensors of one event into
+        # a single AcsWorkStatus request.
+        self.hass.async_create_task(self.coordinator.async_request_refresh())
+
+    @property
+    def native_value(self) -> str | None:
+        """Return the value from the last AcsWorkStatus."""
+        if self.coordinator.data is None:
+            return None
+        return self.entity_description.value_fn(self.coordinator.data, self._door)
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return the device info object."""
+
+        return DeviceInfo(
+            configuration_url=self._host.api.base_url,
+            identifiers={(DOMAIN, self._host.unique_id)},
+            connections=self._host.device_info["connections"],
+            name=self._host.device_info["name"],
+            manufacturer=MANUFACTURER,
+            model=self._host.device_info["model"],
+            hw_version=self._host.device_info["hw_version"],
+            sw_version=self._host.device_info["sw_version"],
+        )
+
+
+class HikvisionMetricSensor(HikvisionSensor):
+    """Request statistics of the device, refreshed with the coordinator."""
+
+    entity_description: HikvisionMetricSensorEntityDescription
+
+    @property
+    def available(self) -> bool:
+        """Return True, statistics stay readable while the device is down."""
+        return True
+
+    @property
+    def native_value(self) -> float | int | None:
+        """Return the value from the request statistics of every endpoint."""
+        return self.entity_description.metric_fn(self._host.metrics.total())
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the value per endpoint."""
+        return {
+            name: self.entity_description.metric_fn(stats)
+            for name, stats in self._host.metrics.endpoints.items()
+        }
@@ -0,0 +1,92 @@
+"""Snapshot pipeline shared by the Hikvision camera entities."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+import logging
+import time
+
+from homeassistant.core import HomeAssistant
+
+from .const import SNAPSHOT_CACHE_TTL
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HikvisionSnapshots:
+    """Coalesce and cache still images per channel.
+
+    Concurrent requests for the same key share a single in-flight fetch and
+    the resulting frame is served from memory for ``ttl`` seconds. A caller
+    passing ``max_age`` only accepts frames, and fetches, started within
+    that many seconds, 0 forcing a fetch started after the call.
+    """
+
+    def __init__(self, hass: HomeAssistant, ttl: float = SNAPSHOT_CACHE_TTL) -> None:
+        """Initialize the snapshot pipeline."""
+        self._hass = hass
+        self._ttl = ttl
+        # Frames and fetches are stamped with the time the fetch started.
+        self._frames: dict[Hashable, tuple[float, bytes]] = {}
+        self._inflight: dict[Hashable, tuple[float, asyncio.Task]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def async_peek(self, key: Hashable) -> bytes | None:
+        """Return a fresh frame of a key or join its fetch, never start one."""
+        cached = self._frames.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self._ttl:
+            self.hits += 1
+            return cached[1]
+        if (inflight := self._inflight.get(key)) is None:
+            return None
+        self.hits += 1
+        return await asyncio.shield(inflight[1])
+
+    async def async_get(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[bytes | None]],
+        max_age: float | None = None,
+    ) -> bytes | None:
+        """Return a cached frame or join/start a fetch for the given key."""
+        now = time.monotonic()
+        limit = self._ttl if max_age is None else max_age
+        cached = self._frames.get(key)
+        if cached is not None and now - cached[0] < limit:
+            self.hits += 1
+            return cached[1]
+
+        inflight = self._inflight.get(key)
+        if inflight is None or (max_age is not None and now - inflight[0] > max_age):
+            self.misses += 1
+            task = self._hass.async_create_task(self._async_fetch(key, fetch, now))
+            self._inflight[key] = (now, task)
+        else:
+            self.hits += 1
+            task = inflight[1]
+
+        # Shield the shared fetch so a cancelled caller does not cancel it
+        # for every other caller waiting on the same channel.
+        return await asyncio.shield(task)
+
+    async def _async_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[bytes | None]],
+        started: float,
+    ) -> bytes | None:
+        """Fetch a frame and store it in the cache, unless a newer one is."""
+        try:
+            image = await fetch()
+            cached = self._frames.get(key)
+            if image and (cached is None or cached[0] <= started):
+                self._frames[key] = (started, image)
+            return image
+        finally:
+            if (inflight := self._inflight.get(key)) and inflight[0] == started:
+                del self._inflight[key]
+
+    def clear(self) -> None:
+        """Drop every cached frame."""
+        self._frames.clear()
@@ -0,0 +1,49 @@
+"""Persistent cache of the Hikvision capability documents."""
+from __future__ import annotations
+
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .host import HikvisionHost
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+
+class HikvisionCapabilityCache:
+    """Store deviceInfo, door capabilities and channels of one device.
+
+    The cached copy lets entities be created before the device answers, it
+    is replaced whenever the device reports different capabilities or
+    firmware.
+    """
+
+    def __init__(self, hass: HomeAssistant, mac: str) -> None:
+        """Initialize the cache of the device with the given MAC."""
+        self._store: Store = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{mac.replace(':', '')}"
+        )
+
+    async def async_restore(self, host: HikvisionHost) -> bool:
+        """Load the cached capabilities into the host, if any."""
+        data = await self._store.async_load()
+        if not data:
+            return False
+        try:
+            host.restore_capabilities(data)
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid capability cache: %s", err)
+            return False
+        return True
+
+    async def async_save(self, host: HikvisionHost) -> None:
+        """Persist the capabilities currently known by the host."""
+        await self._store.async_save(host.capabilities)
+
+    async def async_remove(self) -> None:
+        """Delete the cached capabilities."""
+        await self._store.async_remove()
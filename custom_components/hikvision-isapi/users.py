@@ -0,0 +1,257 @@
+"""Local index of the users and cards stored on a Hikvision device."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import timedelta
+import hashlib
+from http import HTTPStatus
+import json
+import logging
+import time
+from typing import Any
+import uuid
+
+import httpx
+from hikvision_isapi_cli.errors import UnexpectedStatus
+from hikvision_isapi_cli.types import Response
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    USERS_CHECK_INTERVAL,
+    USERS_FULL_SYNC_INTERVAL,
+    USERS_PAGE_SIZE,
+)
+from .host import HikvisionHost
+from .isapi import SearchPage, card_info_search, user_info_count, user_info_search
+from .scheduler import RequestPriority, request_priority
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10
+
+SearchFunction = Callable[..., Awaitable[Response[SearchPage]]]
+
+
+def _store(hass: HomeAssistant, mac: str) -> Store:
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{mac.replace(':', '')}.users")
+
+
+async def async_remove_index(hass: HomeAssistant, mac: str) -> None:
+    """Delete the persisted index of a device."""
+    await _store(hass, mac).async_remove()
+
+
+def _int(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _digest(record: dict[str, Any]) -> str:
+    return hashlib.blake2b(
+        json.dumps(record, sort_keys=True).encode(), digest_size=8
+    ).hexdigest()
+
+
+class HikvisionUserDirectory:
+    """Keep a local copy of UserInfo and CardInfo in sync with the device.
+
+    A full sync streams the search pages and hashes every record, only
+    records whose hash changed are replaced and the index is written once
+    per full sync. Between full syncs a periodic check reads
+    UserInfo/Count once and stops there when its totals match the index.
+
+    Faces are tracked through the numOfFace of each user and the count of
+    users with a face, the face pictures themselves are not synced.
+    """
+
+    def __init__(self, hass: HomeAssistant, host: HikvisionHost) -> None:
+        """Initialize the directory of the host."""
+        self._hass = hass
+        self._host = host
+        self._store = _store(hass, host.unique_id)
+        self._users: dict[str, dict[str, Any]] = {}
+        self._cards: dict[str, dict[str, Any]] = {}
+        self._hashes: dict[str, str] = {}
+        # Wall-clock time of the last full sync, persisted with the index.
+        self._synced_at = 0.0
+        # Searches answered with 404/403, by record prefix.
+        self._unsupported: set[str] = set()
+        self._unsub: CALLBACK_TYPE | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def users(self) -> dict[str, dict[str, Any]]:
+        """Return the UserInfo records by employeeNo."""
+        return self._users
+
+    @property
+    def cards(self) -> dict[str, dict[str, Any]]:
+        """Return the CardInfo records by cardNo."""
+        return self._cards
+
+    async def async_start(self) -> None:
+        """Load the index and check it periodically."""
+        if data := await self._store.async_load():
+            self._users = data["users"]
+            self._cards = data["cards"]
+            self._hashes = data["hashes"]
+            self._synced_at = data.get("synced_at", 0.0)
+        self._unsub = async_track_time_interval(
+            self._hass,
+            self._async_check,
+            timedelta(seconds=USERS_CHECK_INTERVAL),
+            name=f"{DOMAIN} users {self._host.hostname}",
+        )
+        self._hass.async_create_task(self._async_check())
+
+    async def async_stop(self) -> None:
+        """Stop checking the device."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    def search(self, query: str | None = None) -> list[dict[str, Any]]:
+        """Return the users matching a name, employee or card number."""
+        cards: dict[str, list[str]] = {}
+        for card_no, card in self._cards.items():
+            cards.setdefault(card.get("employeeNo", ""), []).append(card_no)
+
+        query = (query or "").casefold()
+        results = []
+        for employee_no, user in self._users.items():
+            user_cards = cards.get(employee_no, [])
+            haystack = [employee_no, user.get("name", ""), *user_cards]
+            if query and not any(query in value.casefold() for value in haystack):
+                continue
+            results.append(
+                {
+                    "employee_no": employee_no,
+                    "name": user.get("name"),
+                    "user_type": user.get("userType"),
+                    "valid": user.get("Valid"),
+                    "cards": user_cards,
+                }
+            )
+        return results
+
+    async def _async_check(self, _now=None) -> None:
+        """Run a full sync only when the counts differ or it is due."""
+        if "user" in self._unsupported:
+            return
+        try:
+            if time.time() - self._synced_at < USERS_FULL_SYNC_INTERVAL:
+                if await self._async_counts_match():
+                    return
+            await self.async_sync()
+        except (UnexpectedStatus, httpx.HTTPError) as err:
+            _LOGGER.debug("User sync of %s interrupted: %s", self._host.hostname, err)
+
+    async def _async_counts_match(self) -> bool:
+        with request_priority(RequestPriority.STATUS):
+            response = await user_info_count(client=self._host.api)
+        if (counts := response.parsed) is None or counts.users != len(self._users):
+            return False
+        if (
+            counts.card_users is not None
+            and "card" not in self._unsupported
+            and counts.card_users
+            != len({card.get("employeeNo") for card in self._cards.values()})
+        ):
+            return False
+        return counts.face_users is None or counts.face_users == sum(
+            1 for user in self._users.values() if _int(user.get("numOfFace"))
+        )
+
+    async def async_sync(self) -> tuple[int, int, int]:
+        """Diff the device records with the index, return added/changed/removed."""
+        async with self._lock:
+            return await self._async_sync()
+
+    async def _async_sync(self) -> tuple[int, int, int]:
+        added = changed = removed = 0
+        for prefix, index, key, search in (
+            ("user", self._users, "employeeNo", user_info_search),
+            ("card", self._cards, "cardNo", card_info_search),
+        ):
+            if prefix in self._unsupported:
+                continue
+            seen: set[str] = set()
+            async for record in self._async_records(prefix, search):
+                record_id = str(record.get(key))
+                seen.add(record_id)
+                digest = _digest(record)
+                if self._hashes.get(f"{prefix}:{record_id}") == digest:
+                    continue
+                if record_id in index:
+                    changed += 1
+                else:
+                    added += 1
+                index[record_id] = record
+                self._hashes[f"{prefix}:{record_id}"] = digest
+            if prefix == "user" and prefix in self._unsupported:
+                # No user database at all, nothing to index or save.
+                return added, changed, removed
+            for record_id in index.keys() - seen:
+                del index[record_id]
+                del self._hashes[f"{prefix}:{record_id}"]
+                removed += 1
+
+        self._synced_at = time.time()
+        if added or changed or removed:
+            _LOGGER.debug(
+                "Users of %s: %s added, %s changed, %s removed",
+                self._host.hostname,
+                added,
+                changed,
+                removed,
+            )
+        # Also saved when nothing changed, so a restart knows a full sync is
+        # not due yet. Full syncs run daily at most unless asked for.
+        self._store.async_delay_save(self._data, STORAGE_SAVE_DELAY)
+        return added, changed, removed
+
+    async def _async_records(
+        self, prefix: str, search: SearchFunction
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Stream the records of a search, one page at a time."""
+        search_id = uuid.uuid4().hex
+        position = 0
+        while True:
+            with request_priority(RequestPriority.STATUS):
+                response = await search(
+                    client=self._host.api,
+                    search_id=search_id,
+                    position=position,
+                    max_results=USERS_PAGE_SIZE,
+                )
+            if response.status_code in (HTTPStatus.NOT_FOUND, HTTPStatus.FORBIDDEN):
+                _LOGGER.info("%s has no %s search", self._host.hostname, prefix)
+                # Leaves no record seen, so the index of this search is emptied.
+                self._unsupported.add(prefix)
+                return
+            if response.status_code != HTTPStatus.OK or response.parsed is None:
+                # Aborts the sync before unseen records are removed.
+                raise UnexpectedStatus(f"Unexpected status code: {response.status_code}")
+
+            page = response.parsed
+            for item in page.items:
+                yield item
+            if not page.more or not page.items:
+                return
+            position += len(page.items)
+
+    def _data(self) -> dict[str, Any]:
+        return {
+            "users": self._users,
+            "cards": self._cards,
+            "hashes": self._hashes,
+            "synced_at": self._synced_at,
+        }
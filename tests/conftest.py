@@ -0,0 +1,54 @@
+"""Fixtures for the Hikvision ISAPI tests."""
+import pytest
+
+from .emulator import IsapiEmulator
+
+BENCHMARKS: dict[str, str] = {}
+
+
+def pytest_addoption(parser):
+    """Add the opt-in flag of the timing budgets."""
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        help="run the time, CPU and memory budgets of the benchmark suite",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip the timing budgets unless they were asked for."""
+    if config.getoption("--benchmark") or "benchmark" in config.getoption("-m"):
+        return
+    skip = pytest.mark.skip(reason="timing budget, run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Print the numbers measured by the benchmark suite."""
+    if BENCHMARKS:
+        terminalreporter.section("hikvision-isapi benchmarks")
+        for name, value in BENCHMARKS.items():
+            terminalreporter.write_line(f"{name:<24}{value}")
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable the integration under custom_components."""
+    yield
+
+
+@pytest.fixture
+def benchmark_report():
+    """Record a formatted measurement for the terminal summary."""
+    return BENCHMARKS.__setitem__
+
+
+@pytest.fixture
+async def emulator(socket_enabled):
+    """Start one emulated device."""
+    device = IsapiEmulator()
+    await device.start()
+    yield device
+    await device.stop()
@@ -0,0 +1,436 @@
+"""Offline stand-in for a Hikvision ISAPI device.
+
+Serves the endpoints used by the integration from a local aiohttp server,
+with digest authentication, configurable latency and injected errors.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+import hashlib
+import re
+import secrets
+
+from aiohttp import web
+
+BOUNDARY = "boundary"
+JPEG = b"\xff\xd8\xff\xe0" + bytes(1024) + b"\xff\xd9"
+REALM = "DS-emulator"
+XMLNS = "http://www.isapi.org/ver20/XMLSchema"
+
+_DIGEST_FIELD = re.compile(r'(\w+)=(?:"([^"]*)"|([^,\s]*))')
+
+
+def _md5(value: str) -> str:
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def _xml(body: str, status: int = 200) -> web.Response:
+    return web.Response(
+        status=status,
+        text=f'<?xml version="1.0" encoding="UTF-8"?>\n{body}',
+        content_type="application/xml",
+    )
+
+
+def _response_status(url: str, code: int = 1, string: str = "OK") -> str:
+    return (
+        f'<ResponseStatus version="2.0" xmlns="{XMLNS}">'
+        f"<requestURL>{url}</requestURL>"
+        f"<statusCode>{code}</statusCode>"
+        f"<statusString>{string}</statusString>"
+        "<subStatusCode>ok</subStatusCode>"
+        "</ResponseStatus>"
+    )
+
+
+class IsapiEmulator:
+    """A single emulated access control terminal.
+
+    ``latency`` delays every answer, ``errors`` maps a path to the HTTP status
+    it answers with and ``offline`` drops every connection.
+    """
+
+    def __init__(
+        self,
+        *,
+        username: str = "admin",
+        password: str = "password",
+        mac: str = "44:47:cc:00:00:01",
+        doors: int = 2,
+        channels: tuple[int, ...] = (101, 102),
+        latency: float = 0,
+    ) -> None:
+        """Initialize the emulator."""
+        self.username = username
+        self.password = password
+        self.mac = mac
+        self.doors = doors
+        self.channels = channels
+        self.latency = latency
+        self.errors: dict[str, int] = {}
+        self.offline = False
+        self.requests: Counter[str] = Counter()
+        self.door_commands: list[tuple[int, str]] = []
+        self.acs_events: list[dict[str, object]] = []
+        self.users: list[dict[str, object]] = []
+        self.cards: list[dict[str, object]] = []
+        self.previews = 0
+        self.tampered = False
+        self.preview_interval = 0.01
+        self.port = 0
+        self._nonces: set[str] = set()
+        self._sessions: set[str] | None = None
+        self._subscribers: set[asyncio.Queue[bytes | None]] = set()
+        self._stopping = asyncio.Event()
+        self._runner: web.AppRunner | None = None
+
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.router.add_get("/ISAPI/Security/userCheck", self._user_check)
+        self.app.router.add_get(
+            "/ISAPI/Security/sessionLogin/capabilities", self._session_capabilities
+        )
+        self.app.router.add_post("/ISAPI/Security/sessionLogin", self._session_login)
+        self.app.router.add_put("/ISAPI/Security/sessionHeartbeat", self._ok)
+        self.app.router.add_get("/ISAPI/System/deviceInfo", self._device_info)
+        self.app.router.add_get(
+            "/ISAPI/AccessControl/RemoteControl/door/capabilities",
+            self._door_capabilities,
+        )
+        self.app.router.add_put(
+            "/ISAPI/AccessControl/RemoteControl/door/{door}", self._door
+        )
+        self.app.router.add_get(
+            "/ISAPI/AccessControl/AcsWorkStatus", self._acs_work_status
+        )
+        self.app.router.add_post("/ISAPI/AccessControl/AcsEvent", self._acs_event)
+        for name, field in (("UserInfo", "userNumber"), ("CardInfo", "cardNumber")):
+            self.app.router.add_post(
+                f"/ISAPI/AccessControl/{name}/Search", self._search(name)
+            )
+            self.app.router.add_get(
+                f"/ISAPI/AccessControl/{name}/Count", self._count(name, field)
+            )
+        self.app.router.add_get("/ISAPI/Streaming/channels", self._channels)
+        self.app.router.add_get(
+            "/ISAPI/Streaming/channels/{channel}/picture", self._picture
+        )
+        self.app.router.add_get(
+            "/ISAPI/Streaming/channels/{channel}/httpPreview", self._http_preview
+        )
+        self.app.router.add_get(
+            "/ISAPI/Event/notification/alertStream", self._alert_stream
+        )
+
+    @property
+    def host(self) -> str:
+        """Return the host as entered in the config flow."""
+        return "http://127.0.0.1"
+
+    @property
+    def config(self) -> dict[str, object]:
+        """Return the config entry data pointing at this device."""
+        return {
+            "host": self.host,
+            "port": self.port,
+            "username": self.username,
+            "password": self.password,
+            "verify_ssl": False,
+            "latch": 0,
+            "keepalive": 5,
+        }
+
+    async def start(self) -> None:
+        """Listen on a free local port."""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Close the alert and preview streams and the server."""
+        self._stopping.set()
+        for queue in self._subscribers:
+            queue.put_nowait(None)
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def push_event(self, body: str, content_type: str = "application/xml") -> None:
+        """Send one part to every alertStream subscriber."""
+        payload = body.encode()
+        part = (
+            f"--{BOUNDARY}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n"
+        ).encode() + payload + b"\r\n"
+        for queue in self._subscribers:
+            queue.put_nowait(part)
+
+    def expire_sessions(self) -> None:
+        """Reject every open web session, as a reboot does."""
+        self._sessions = set()
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        if self.offline:
+            request.transport.close()
+            raise asyncio.CancelledError
+        self.requests[request.path] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if not self._authorized(request):
+            nonce = secrets.token_hex(16)
+            self._nonces.add(nonce)
+            return web.Response(
+                status=401,
+                headers={
+                    "WWW-Authenticate": f'Digest qop="auth", realm="{REALM}", '
+                    f'nonce="{nonce}", stale="FALSE"'
+                },
+            )
+        if (
+            self._sessions is not None
+            and not request.path.startswith("/ISAPI/Security/sessionLogin")
+            and not self._sessions.intersection(request.cookies.values())
+        ):
+            return web.Response(status=401)
+        if (status := self.errors.get(request.path)) is not None:
+            return _xml(_response_status(request.path, 4, "Invalid Operation"), status)
+        return await handler(request)
+
+    def _authorized(self, request: web.Request) -> bool:
+        header = request.headers.get("Authorization", "")
+        if not header.startswith("Digest "):
+            return False
+        fields = {
+            key: quoted or bare
+            for key, quoted, bare in _DIGEST_FIELD.findall(header[7:])
+        }
+        if fields.get("username") != self.username:
+            return False
+        if fields.get("nonce") not in self._nonces:
+            return False
+        ha1 = _md5(f"{self.username}:{REALM}:{self.password}")
+        ha2 = _md5(f"{request.method}:{fields.get('uri')}")
+        expected = _md5(
+            f"{ha1}:{fields['nonce']}:{fields.get('nc')}:{fields.get('cnonce')}:"
+            f"{fields.get('qop')}:{ha2}"
+        )
+        return secrets.compare_digest(expected, fields.get("response", ""))
+
+    async def _ok(self, request: web.Request) -> web.Response:
+        return _xml(_response_status(request.path))
+
+    async def _user_check(self, request: web.Request) -> web.Response:
+        return _xml(
+            f'<userCheck version="2.0" xmlns="{XMLNS}">'
+            "<statusValue>200</statusValue><statusString>OK</statusString>"
+            "<isDefaultPassword>false</isDefaultPassword>"
+            "</userCheck>"
+        )
+
+    async def _session_capabilities(self, request: web.Request) -> web.Response:
+        return _xml(
+            f'<SessionLoginCap version="2.0" xmlns="{XMLNS}">'
+            f"<sessionID>{secrets.token_hex(32)}</sessionID>"
+            f"<challenge>{secrets.token_hex(16)}</challenge>"
+            "<iterations>100</iterations>"
+            "<isIrreversible>true</isIrreversible>"
+            f"<salt>{secrets.token_hex(32)}</salt>"
+            "</SessionLoginCap>"
+        )
+
+    async def _session_login(self, request: web.Request) -> web.Response:
+        response = _xml(
+            f'<SessionLogin version="2.0" xmlns="{XMLNS}">'
+            "<statusValue>200</statusValue><statusString>OK</statusString>"
+            "</SessionLogin>"
+        )
+        session = secrets.token_hex(32)
+        if self._sessions is not None:
+            self._sessions.add(session)
+        response.headers["Set-Cookie"] = (
+            f"WebSession_{secrets.token_hex(5)}={session}; HttpOnly"
+        )
+        return response
+
+    async def _device_info(self, request: web.Request) -> web.Response:
+        return _xml(
+            f'<DeviceInfo version="2.0" xmlns="{XMLNS}">'
+            f"<deviceName>Emulator {self.mac[-2:]}</deviceName>"
+            "<deviceID>emulator</deviceID>"
+            "<model>DS-K1T341AM</model>"
+            f"<serialNumber>EMU{self.mac.replace(':', '')}</serialNumber>"
+            f"<macAddress>{self.mac}</macAddress>"
+            "<firmwareVersion>V3.2.30</firmwareVersion>"
+            "<firmwareReleasedDate>build 220923</firmwareReleasedDate>"
+            "<hardwareVersion>0x0</hardwareVersion>"
+            "<deviceType>ACS</deviceType>"
+            "</DeviceInfo>"
+        )
+
+    async def _door_capabilities(self, request: web.Request) -> web.Response:
+        return _xml(
+            f'<RemoteControlDoor version="2.0" xmlns="{XMLNS}">'
+            f'<doorNo min="1" max="{self.doors}"></doorNo>'
+            '<cmd opt="open,close,alwaysOpen,alwaysClose"></cmd>'
+            "</RemoteControlDoor>"
+        )
+
+    async def _door(self, request: web.Request) -> web.Response:
+        door = int(request.match_info["door"])
+        if not 1 <= door <= self.doors:
+            return _xml(_response_status(request.path, 4, "Invalid Content"), 400)
+        body = await request.text()
+        command = re.search(r"<cmd>([^<]*)</cmd>", body)
+        self.door_commands.append((door, command.group(1) if command else ""))
+        return _xml(_response_status(request.path))
+
+    async def _acs_work_status(self, request: web.Request) -> web.Response:
+        doors = "".join(
+            f"<doorLockStatus>0</doorLockStatus>" for _ in range(self.doors)
+        )
+        return _xml(
+            f'<AcsWorkStatus version="2.0" xmlns="{XMLNS}">'
+            f"{doors}"
+            "<antiSneakStatus>close</antiSneakStatus>"
+            f"<hostAntiDismantleStatus>{'open' if self.tampered else 'close'}"
+            "</hostAntiDismantleStatus>"
+            "</AcsWorkStatus>"
+        )
+
+    def add_acs_event(self, major: int, minor: int, time: str, **fields) -> None:
+        """Append a record to the access control event log."""
+        self.acs_events.append(
+            {
+                "major": major,
+                "minor": minor,
+                "time": time,
+                "serialNo": len(self.acs_events) + 1,
+                **fields,
+            }
+        )
+
+    async def _acs_event(self, request: web.Request) -> web.Response:
+        cond = (await request.json())["AcsEventCond"]
+        matches = [
+            event for event in self.acs_events if event["time"] >= cond["startTime"]
+        ]
+        position = cond["searchResultPosition"]
+        page = matches[position : position + min(cond["maxResults"], 30)]
+        more = position + len(page) < len(matches)
+        return web.json_response(
+            {
+                "AcsEvent": {
+                    "searchID": cond["searchID"],
+                    "responseStatusStrg": "MORE"
+                    if more
+                    else ("OK" if matches else "NO MATCH"),
+                    "numOfMatches": len(page),
+                    "totalMatches": len(matches),
+                    "InfoList": page,
+                }
+            }
+        )
+
+    def _records(self, name: str) -> list[dict[str, object]]:
+        return self.users if name == "UserInfo" else self.cards
+
+    def _search(self, name: str):
+        async def search(request: web.Request) -> web.Response:
+            cond = (await request.json())[f"{name}SearchCond"]
+            records = self._records(name)
+            position = cond["searchResultPosition"]
+            page = records[position : position + min(cond["maxResults"], 30)]
+            more = position + len(page) < len(records)
+            return web.json_response(
+                {
+                    f"{name}Search": {
+                        "searchID": cond["searchID"],
+                        "responseStatusStrg": "MORE"
+                        if more
+                        else ("OK" if records else "NO MATCH"),
+                        "numOfMatches": len(page),
+                        "totalMatches": len(records),
+                        name: page,
+                    }
+                }
+            )
+
+        return search
+
+    def _count(self, name: str, field: str):
+        async def count(request: web.Request) -> web.Response:
+            totals = {field: len(self._records(name))}
+            if name == "UserInfo":
+                totals["bindCardUserNumber"] = len(
+                    {card["employeeNo"] for card in self.cards}
+                )
+                totals["bindFaceUserNumber"] = sum(
+                    1 for user in self.users if user.get("numOfFace")
+                )
+            return web.json_response({f"{name}Count": totals})
+
+        return count
+
+    async def _channels(self, request: web.Request) -> web.Response:
+        channels = "".join(
+            "<StreamingChannel>"
+            f"<id>{channel}</id><channelName>Camera 01</channelName>"
+            "<enabled>true</enabled>"
+            "<Video><enabled>true</enabled>"
+            f"<videoResolutionWidth>{1920 if channel % 100 == 1 else 640}"
+            "</videoResolutionWidth>"
+            f"<videoResolutionHeight>{1080 if channel % 100 == 1 else 480}"
+            "</videoResolutionHeight>"
+            f"<constantBitRate>{2048 if channel % 100 == 1 else 512}"
+            "</constantBitRate>"
+            "</Video>"
+            "</StreamingChannel>"
+            for channel in self.channels
+        )
+        return _xml(
+            f'<StreamingChannelList version="2.0" xmlns="{XMLNS}">'
+            f"{channels}</StreamingChannelList>"
+        )
+
+    async def _picture(self, request: web.Request) -> web.Response:
+        if int(request.match_info["channel"]) not in self.channels:
+            return _xml(_response_status(request.path, 4, "Invalid Operation"), 404)
+        return web.Response(body=JPEG, content_type="image/jpeg")
+
+    async def _http_preview(self, request: web.Request) -> web.StreamResponse:
+        if int(request.match_info["channel"]) not in self.channels:
+            return _xml(_response_status(request.path, 4, "Invalid Operation"), 404)
+        response = web.StreamResponse(
+            headers={"Content-Type": f"multipart/x-mixed-replace; boundary={BOUNDARY}"}
+        )
+        await response.prepare(request)
+        part = (
+            f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+            f"Content-Length: {len(JPEG)}\r\n\r\n"
+        ).encode() + JPEG + b"\r\n"
+        self.previews += 1
+        try:
+            while not self._stopping.is_set():
+                await response.write(part)
+                await asyncio.sleep(self.preview_interval)
+        except ConnectionResetError:
+            pass
+        finally:
+            self.previews -= 1
+        return response
+
+    async def _alert_stream(self, request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(
+            headers={"Content-Type": f"multipart/mixed; boundary={BOUNDARY}"}
+        )
+        await response.prepare(request)
+        queue: asyncio.Queue[bytes | None] = asyncio.Queue()
+        self._subscribers.add(queue)
+        try:
+            while (part := await queue.get()) is not None:
+                await response.write(part)
+        finally:
+            self._subscribers.discard(queue)
+        return response
@@ -0,0 +1,78 @@
+"""Test the incremental access control event log sync."""
+from importlib import import_module
+from unittest.mock import Mock
+
+import pytest
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_capture_events,
+)
+
+const = import_module("custom_components.hikvision-isapi.const")
+
+
+async def _async_setup(hass, emulator) -> MockConfigEntry:
+    entry = MockConfigEntry(
+        domain=const.DOMAIN, data=emulator.config, unique_id=emulator.mac
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+async def test_sync_pages_from_the_cursor(hass, emulator, hass_storage):
+    """Only records after the cursor are fired, paging through the log."""
+    key = f"{const.DOMAIN}.{emulator.mac.replace(':', '')}.acs_events"
+    hass_storage[key] = {
+        "version": 1,
+        "key": key,
+        "data": {"time": "2024-01-01T00:00:00+00:00", "serial_no": 5},
+    }
+    for minute in range(70):
+        emulator.add_acs_event(
+            5,
+            0x4B,
+            f"2024-01-01T00:{minute // 60:02d}:{minute % 60:02d}+00:00",
+            doorNo=1,
+            name="Alice",
+        )
+    events = async_capture_events(hass, const.EVENT_HIKVISION_ACS)
+
+    entry = await _async_setup(hass, emulator)
+
+    assert [event.data["serial_no"] for event in events] == list(range(6, 71))
+    assert events[0].data["name"] == "Alice"
+    # Three pages of at most 30 records.
+    assert emulator.requests["/ISAPI/AccessControl/AcsEvent"] == 3
+
+    data = hass.data[const.DOMAIN][entry.entry_id]
+    emulator.add_acs_event(5, 0x15, "2024-01-01T00:02:00+00:00", doorNo=1)
+    await data.acs_events.async_sync()
+    await hass.async_block_till_done()
+    assert events[-1].data["serial_no"] == 71
+    assert len(events) == 66
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    assert hass_storage[key]["data"]["serial_no"] == 71
+
+
+async def test_logbook_description(hass, emulator):
+    """Log records are described with the door and the person."""
+    pytest.importorskip("homeassistant.components.logbook")
+    logbook = import_module("custom_components.hikvision-isapi.logbook")
+    entry = await _async_setup(hass, emulator)
+    described = {}
+    logbook.async_describe_events(
+        hass, lambda domain, event, fn: described.setdefault(event, fn)
+    )
+
+    event = Mock(
+        data={"mac": emulator.mac, "major": 5, "minor": 0x4B, "door": 1, "name": "Alice"}
+    )
+    result = described[const.EVENT_HIKVISION_ACS](event)
+
+    assert result["name"] == "Emulator 01"
+    assert result["message"] == "door 1 granted a face for Alice"
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,128 @@
+"""Test the alertStream multipart and event parsing."""
+import asyncio
+from importlib import import_module
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+alert_stream = import_module("custom_components.hikvision-isapi.alert_stream")
+const = import_module("custom_components.hikvision-isapi.const")
+DOMAIN = const.DOMAIN
+
+DOOR_UNLOCKED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<EventNotificationAlert version="2.0" xmlns="http://www.isapi.org/ver20/XMLSchema">
+<channelID>1</channelID>
+<dateTime>2023-05-04T10:11:12+02:00</dateTime>
+<eventType>AccessControllerEvent</eventType>
+<eventState>active</eventState>
+<AccessControllerEvent>
+<majorEventType>5</majorEventType>
+<subEventType>21</subEventType>
+<doorNo>2</doorNo>
+</AccessControllerEvent>
+</EventNotificationAlert>"""
+
+
+def _part(body: bytes, content_type: str = "application/xml") -> bytes:
+    return (
+        b"--boundary\r\nContent-Type: "
+        + content_type.encode()
+        + b"\r\nContent-Length: "
+        + str(len(body)).encode()
+        + b"\r\n\r\n"
+        + body
+        + b"\r\n"
+    )
+
+
+def test_multipart_parser_split_chunks():
+    """Parts are emitted only once complete, whatever the chunking."""
+    stream = _part(DOOR_UNLOCKED) + _part(b'{"eventType": "VMD"}', "application/json")
+    parser = alert_stream.MultipartParser("boundary")
+
+    parts = []
+    for index in range(0, len(stream), 7):
+        parts.extend(parser.feed(stream[index : index + 7]))
+
+    assert [body for _, body in parts] == [DOOR_UNLOCKED, b'{"eventType": "VMD"}']
+    assert parts[1][0]["content-type"] == "application/json"
+
+
+def test_parse_access_controller_event():
+    """Door events carry the door number and the classified kind."""
+    event = alert_stream.parse_event("application/xml", DOOR_UNLOCKED)
+
+    assert event.kind == "unlocked"
+    assert event.door == 2
+    assert event.channel == 1
+    assert event.state == "active"
+
+
+def test_parse_json_motion_event():
+    """JSON firmwares are parsed too, unknown events have no kind."""
+    motion = alert_stream.parse_event("application/json", b'{"eventType": "VMD"}')
+    other = alert_stream.parse_event("application/json", b'{"eventType": "foo"}')
+
+    assert motion.kind == "motion"
+    assert other.kind is None
+    assert alert_stream.parse_event("image/jpeg", b"\xff\xd8") is None
+
+
+def test_parse_malformed_json_parts():
+    """JSON parts that are not an alert object are skipped, not raised."""
+    for body in (
+        b'[{"eventType": "VMD"}]',
+        b'{"eventType": 5}',
+        b'"VMD"',
+        b"null",
+    ):
+        assert alert_stream.parse_event("application/json", body) is None
+    event = alert_stream.parse_event(
+        "application/json", b'{"eventType": "VMD", "AccessControllerEvent": []}'
+    )
+    assert event.kind == "motion"
+    assert event.door is None
+
+
+async def test_backoff_reset_on_connect(hass, emulator):
+    """A stream that connected reconnects after the shortest delay."""
+    entry = MockConfigEntry(domain=DOMAIN, data=emulator.config, unique_id=emulator.mac)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    host = hass.data[DOMAIN][entry.entry_id].host
+
+    stream = alert_stream.HikvisionAlertStream(hass, host.api, lambda event: None)
+    stream._retry = const.ALERT_STREAM_RETRY_MAX
+    stream.start()
+    async with asyncio.timeout(5):
+        while not stream.connected:
+            await asyncio.sleep(0.01)
+    assert stream._retry == const.ALERT_STREAM_RETRY_MIN
+
+    await stream.stop()
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_tamper_event_refreshes_sensor(hass, emulator):
+    """A tamper event reads the status right away instead of at the next poll."""
+    entry = MockConfigEntry(domain=DOMAIN, data=emulator.config, unique_id=emulator.mac)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    host = hass.data[DOMAIN][entry.entry_id].host
+    assert hass.states.get("sensor.emulator_01_tamper").state == "closed"
+
+    emulator.tampered = True
+    async with asyncio.timeout(2):
+        while not host.alert_stream.connected:
+            await asyncio.sleep(0.01)
+        emulator.push_event(
+            "<EventNotificationAlert><eventType>tamperDetection</eventType>"
+            "<eventState>active</eventState></EventNotificationAlert>"
+        )
+        while hass.states.get("sensor.emulator_01_tamper").state != "open":
+            await asyncio.sleep(0.01)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,334 @@
+"""Performance regression gate, run against emulated devices.
+
+Every device answers after DEVICE_LATENCY. Request counts are checked in
+every run. The time, CPU and memory budgets are marked ``benchmark`` and only
+run with ``--benchmark`` or ``-m benchmark``, on a quiet machine.
+"""
+import asyncio
+from importlib import import_module
+import time
+import tracemalloc
+
+from hikvision_isapi_cli.models import RootTypeForXMLResponseStatus
+from homeassistant.components.camera import async_get_image
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+import xmltodict
+
+from .emulator import IsapiEmulator
+
+alert_stream = import_module("custom_components.hikvision-isapi.alert_stream")
+const = import_module("custom_components.hikvision-isapi.const")
+isapi = import_module("custom_components.hikvision-isapi.isapi")
+DOMAIN = const.DOMAIN
+
+DEVICE_LATENCY = 0.05
+DEVICES = 10
+
+SETUP_BUDGET = 3.0
+HEARTBEAT_BUDGET = DEVICE_LATENCY + 0.05
+UNLOCK_BUDGET = DEVICE_LATENCY + 0.1
+# Half of what opening the doors one by one takes.
+BULK_OPEN_BUDGET = DEVICES * 2 * DEVICE_LATENCY / 2
+SNAPSHOT_MIN_FPS = 50
+PARSE_ROUNDS = 2000
+
+XMLNS = "http://www.isapi.org/ver20/XMLSchema"
+RESPONSE_STATUS = (
+    f'<?xml version="1.0" encoding="UTF-8"?><ResponseStatus version="2.0" xmlns="{XMLNS}">'
+    "<requestURL>/ISAPI/Security/sessionHeartbeat</requestURL>"
+    "<statusCode>1</statusCode><statusString>OK</statusString>"
+    "<subStatusCode>ok</subStatusCode></ResponseStatus>"
+).encode()
+ACS_WORK_STATUS = (
+    f'<?xml version="1.0" encoding="UTF-8"?><AcsWorkStatus version="2.0" xmlns="{XMLNS}">'
+    + "<doorLockStatus>0</doorLockStatus>" * 2
+    + "<doorStatus>4</doorStatus>" * 2
+    + "<magneticStatus>0</magneticStatus>" * 2
+    + "<caseStatus>0</caseStatus>" * 4
+    + "<batteryVoltage>0</batteryVoltage><batteryLowVoltage>false</batteryLowVoltage>"
+    "<powerSupplyStatus>ACPowerSupply</powerSupplyStatus>"
+    "<multiDoorInterlockStatus>close</multiDoorInterlockStatus>"
+    "<antiSneakStatus>close</antiSneakStatus>"
+    "<hostAntiDismantleStatus>close</hostAntiDismantleStatus>"
+    + "<cardReaderOnlineStatus>1</cardReaderOnlineStatus>" * 4
+    + "<cardReaderAntiDismantleStatus>0</cardReaderAntiDismantleStatus>" * 4
+    + "<cardReaderVerifyMode>cardOrFace</cardReaderVerifyMode>" * 4
+    + "<cardNum>120</cardNum><netStatus>connected</netStatus>"
+    "<InterfaceStatusList><InterfaceStatus><id>1</id><netStatus>connected</netStatus>"
+    "</InterfaceStatus></InterfaceStatusList>"
+    "<sipStatus>unregistered</sipStatus><ezvizStatus>disconnected</ezvizStatus>"
+    "</AcsWorkStatus>"
+).encode()
+ALERT_EVENT = (
+    f'<?xml version="1.0" encoding="UTF-8"?><EventNotificationAlert version="2.0" xmlns="{XMLNS}">'
+    "<ipAddress>192.168.1.64</ipAddress><portNo>80</portNo><protocol>HTTP</protocol>"
+    "<macAddress>44:47:cc:00:00:01</macAddress><channelID>1</channelID>"
+    "<dateTime>2023-05-04T10:11:12+02:00</dateTime><activePostCount>1</activePostCount>"
+    "<eventType>AccessControllerEvent</eventType><eventState>active</eventState>"
+    "<eventDescription>Access Controller Event</eventDescription>"
+    "<AccessControllerEvent><deviceName>Door</deviceName>"
+    "<majorEventType>5</majorEventType><subEventType>21</subEventType>"
+    "<cardReaderKind>1</cardReaderKind><cardReaderNo>1</cardReaderNo>"
+    "<verifyNo>0</verifyNo><doorNo>1</doorNo><serialNo>1234</serialNo>"
+    "<currentVerifyMode>cardOrFace</currentVerifyMode><mask>unknown</mask>"
+    "<picturesNumber>0</picturesNumber></AccessControllerEvent>"
+    "</EventNotificationAlert>"
+).encode()
+
+
+async def _async_start_devices(count: int) -> list[IsapiEmulator]:
+    devices = [
+        IsapiEmulator(mac=f"44:47:cc:00:00:{index:02x}", latency=DEVICE_LATENCY)
+        for index in range(1, count + 1)
+    ]
+    await asyncio.gather(*(device.start() for device in devices))
+    return devices
+
+
+async def _async_setup(hass, devices: list[IsapiEmulator]) -> list[MockConfigEntry]:
+    entries = []
+    for device in devices:
+        entry = MockConfigEntry(domain=DOMAIN, data=device.config, unique_id=device.mac)
+        entry.add_to_hass(hass)
+        entries.append(entry)
+    results = await asyncio.gather(
+        *(hass.config_entries.async_setup(entry.entry_id) for entry in entries)
+    )
+    assert all(results)
+    await hass.async_block_till_done()
+    return entries
+
+
+async def _async_teardown(hass, entries, devices) -> None:
+    for entry in entries:
+        assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    await asyncio.gather(*(device.stop() for device in devices))
+
+
+@pytest.mark.benchmark
+async def test_setup_latency(hass, socket_enabled, benchmark_report):
+    """N devices are set up concurrently."""
+    devices = await _async_start_devices(DEVICES)
+
+    start = time.perf_counter()
+    entries = await _async_setup(hass, devices)
+    elapsed = time.perf_counter() - start
+
+    benchmark_report("setup latency", f"{elapsed * 1000:.0f} ms for {DEVICES} devices")
+    await _async_teardown(hass, entries, devices)
+    assert elapsed < SETUP_BUDGET
+
+
+async def _async_heartbeats(hass) -> tuple[float, float]:
+    """Return the seconds and requests taken by one heartbeat."""
+    devices = await _async_start_devices(1)
+    entries = await _async_setup(hass, devices)
+    host = hass.data[DOMAIN][entries[0].entry_id].host
+    path = "/ISAPI/Security/sessionHeartbeat"
+    sent = devices[0].requests[path]
+
+    beats = 20
+    start = time.perf_counter()
+    for _ in range(beats):
+        assert await host._async_heartbeat()
+    elapsed = (time.perf_counter() - start) / beats
+    requests = (devices[0].requests[path] - sent) / beats
+
+    await _async_teardown(hass, entries, devices)
+    return elapsed, requests
+
+
+async def test_heartbeat_requests(hass, socket_enabled):
+    """A heartbeat costs one request, the digest nonce is reused."""
+    _, requests = await _async_heartbeats(hass)
+    assert requests == 1
+
+
+@pytest.mark.benchmark
+async def test_heartbeat_overhead(hass, socket_enabled, benchmark_report):
+    """A heartbeat takes one device round-trip."""
+    elapsed, requests = await _async_heartbeats(hass)
+    benchmark_report(
+        "heartbeat overhead", f"{elapsed * 1000:.1f} ms, {requests:.2f} requests"
+    )
+    assert elapsed < HEARTBEAT_BUDGET
+
+
+async def _async_unlocks(hass) -> tuple[float, list[tuple[int, str]]]:
+    """Return the seconds taken by one unlock and the commands received."""
+    devices = await _async_start_devices(1)
+    entries = await _async_setup(hass, devices)
+
+    unlocks = 10
+    start = time.perf_counter()
+    for _ in range(unlocks):
+        await hass.services.async_call(
+            "lock", "unlock", {"entity_id": "lock.emulator_01_1"}, blocking=True
+        )
+    elapsed = (time.perf_counter() - start) / unlocks
+
+    commands = list(devices[0].door_commands)
+    await _async_teardown(hass, entries, devices)
+    return elapsed, commands
+
+
+async def test_unlock_commands(hass, socket_enabled):
+    """Every lock service call reaches the device once."""
+    _, commands = await _async_unlocks(hass)
+    assert commands == [(1, "open")] * 10
+
+
+@pytest.mark.benchmark
+async def test_unlock_round_trip(hass, socket_enabled, benchmark_report):
+    """Time from the lock service call to the device acknowledgement."""
+    elapsed, _ = await _async_unlocks(hass)
+    benchmark_report("unlock round-trip", f"{elapsed * 1000:.1f} ms")
+    assert elapsed < UNLOCK_BUDGET
+
+
+async def _async_bulk_open(hass) -> tuple[float, list[dict], list[list]]:
+    """Return the seconds taken, the service response and the commands received."""
+    devices = await _async_start_devices(DEVICES)
+    entries = await _async_setup(hass, devices)
+
+    start = time.perf_counter()
+    response = await hass.services.async_call(
+        DOMAIN,
+        const.SERVICE_CONTROL_DOORS,
+        {"command": "open"},
+        blocking=True,
+        return_response=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    commands = [device.door_commands for device in devices]
+    await _async_teardown(hass, entries, devices)
+    return elapsed, response["doors"], commands
+
+
+async def test_bulk_open_commands(hass, socket_enabled):
+    """Every door of every device is opened once."""
+    _, doors, commands = await _async_bulk_open(hass)
+    assert len(doors) == DEVICES * 2
+    assert all(door["success"] for door in doors)
+    assert all(sorted(device) == [(1, "open"), (2, "open")] for device in commands)
+
+
+@pytest.mark.benchmark
+async def test_bulk_open(hass, socket_enabled, benchmark_report):
+    """Every door of every device is opened concurrently."""
+    elapsed, doors, _ = await _async_bulk_open(hass)
+    benchmark_report("bulk open", f"{elapsed * 1000:.0f} ms for {len(doors)} doors")
+    assert elapsed < BULK_OPEN_BUDGET
+
+
+async def _async_view_snapshots(hass, viewers: int, frames: int) -> tuple[float, int]:
+    """Return the frames per second served and the device picture requests."""
+    devices = await _async_start_devices(1)
+    entries = await _async_setup(hass, devices)
+    entity_id = hass.states.async_entity_ids("camera")[0]
+
+    async def view() -> None:
+        for _ in range(frames):
+            image = await async_get_image(hass, entity_id)
+            assert image.content.startswith(b"\xff\xd8")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(view() for _ in range(viewers)))
+    fps = viewers * frames / (time.perf_counter() - start)
+    pictures = sum(
+        count
+        for path, count in devices[0].requests.items()
+        if path.endswith("/picture")
+    )
+
+    await _async_teardown(hass, entries, devices)
+    return fps, pictures
+
+
+async def test_snapshot_sharing(hass, socket_enabled):
+    """Concurrent viewers of one camera share the device snapshots."""
+    viewers, frames = 5, 20
+    _, pictures = await _async_view_snapshots(hass, viewers, frames)
+    assert 0 < pictures < viewers * frames
+
+
+@pytest.mark.benchmark
+async def test_snapshot_throughput(hass, socket_enabled, benchmark_report):
+    """Shared snapshots are served faster than the device answers."""
+    fps, pictures = await _async_view_snapshots(hass, 5, 20)
+    benchmark_report(
+        "snapshot throughput",
+        f"{fps:.0f} frames/s, {pictures} device requests",
+    )
+    assert fps > SNAPSHOT_MIN_FPS
+
+
+def _cost(parse, body: bytes) -> tuple[float, int]:
+    """Return the CPU microseconds and peak bytes allocated by one parse."""
+    start = time.process_time()
+    for _ in range(PARSE_ROUNDS):
+        parse(body)
+    cpu = (time.process_time() - start) / PARSE_ROUNDS * 1e6
+
+    tracemalloc.start()
+    try:
+        parse(body)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return cpu, peak
+
+
+def _work_status_from_dict(body: bytes) -> isapi.AcsWorkStatus:
+    """Build the status through the xmltodict tree, as before the field scan."""
+    status = xmltodict.parse(body.decode()).get("AcsWorkStatus") or {}
+    return isapi.AcsWorkStatus(
+        door_lock_status=isapi._values(status.get("doorLockStatus")),
+        door_status=isapi._values(status.get("doorStatus")),
+        magnetic_status=isapi._values(status.get("magneticStatus")),
+        anti_sneak_status=status.get("antiSneakStatus"),
+        host_anti_dismantle_status=status.get("hostAntiDismantleStatus"),
+    )
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    ("name", "body", "model", "fast"),
+    [
+        (
+            "heartbeat",
+            RESPONSE_STATUS,
+            lambda body: RootTypeForXMLResponseStatus.from_dict(
+                xmltodict.parse(body.decode())
+            ),
+            isapi.ResponseStatus.from_xml,
+        ),
+        (
+            "work status",
+            ACS_WORK_STATUS,
+            _work_status_from_dict,
+            isapi.AcsWorkStatus.from_xml,
+        ),
+        (
+            "alert event",
+            ALERT_EVENT,
+            lambda body: xmltodict.parse(body).get("EventNotificationAlert"),
+            lambda body: alert_stream.parse_event("application/xml", body),
+        ),
+    ],
+)
+def test_parser_cost(name, body, model, fast, benchmark_report):
+    """The field scan beats building the document tree on CPU and memory."""
+    model_cpu, model_peak = _cost(model, body)
+    fast_cpu, fast_peak = _cost(fast, body)
+
+    benchmark_report(
+        f"{name} parse",
+        f"{model_cpu:.0f} -> {fast_cpu:.0f} us, "
+        f"{model_peak / 1024:.1f} -> {fast_peak / 1024:.1f} KiB peak",
+    )
+    assert fast_cpu < model_cpu
+    assert fast_peak < model_peak
@@ -0,0 +1,45 @@
+"""Test the per-host circuit breaker."""
+from importlib import import_module
+from unittest.mock import patch
+
+import pytest
+
+breaker = import_module("custom_components.hikvision-isapi.breaker")
+CircuitState = breaker.CircuitState
+
+
+def test_circuit_opens_and_probes():
+    """Consecutive failures open the circuit, a single probe closes it."""
+    changes = []
+    circuit = breaker.CircuitBreaker("host", 2, 30, changes.append)
+
+    with patch.object(breaker.time, "monotonic", return_value=100):
+        circuit.record_failure(circuit.before_request())
+        assert circuit.state == CircuitState.CLOSED
+        circuit.record_failure(circuit.before_request())
+        assert circuit.state == CircuitState.OPEN
+        with pytest.raises(breaker.CircuitOpenError):
+            circuit.before_request()
+
+    with patch.object(breaker.time, "monotonic", return_value=130):
+        assert circuit.before_request() is True
+        # Only one probe at a time.
+        with pytest.raises(breaker.CircuitOpenError):
+            circuit.before_request()
+        circuit.record_success(True)
+
+    assert circuit.state == CircuitState.CLOSED
+    assert changes == [CircuitState.OPEN, CircuitState.HALF_OPEN, CircuitState.CLOSED]
+
+
+def test_failed_probe_reopens_the_circuit():
+    """A probe failing reopens the circuit for another reset timeout."""
+    circuit = breaker.CircuitBreaker("host", 1, 30)
+
+    with patch.object(breaker.time, "monotonic", return_value=100):
+        circuit.record_failure()
+    with patch.object(breaker.time, "monotonic", return_value=130):
+        circuit.record_failure(circuit.before_request())
+        assert circuit.state == CircuitState.OPEN
+        with pytest.raises(breaker.CircuitOpenError):
+            circuit.check()
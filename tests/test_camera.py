@@ -0,0 +1,26 @@
+"""Test the camera snapshots."""
+from importlib import import_module
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+const = import_module("custom_components.hikvision-isapi.const")
+DOMAIN = const.DOMAIN
+
+
+async def test_failed_snapshot_is_not_cached(hass, emulator):
+    """An error reply is never served as a frame."""
+    entry = MockConfigEntry(domain=DOMAIN, data=emulator.config, unique_id=emulator.mac)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    (entity_id,) = hass.states.async_entity_ids("camera")
+    camera = hass.data["camera"].get_entity(entity_id)
+
+    emulator.errors["/ISAPI/Streaming/channels/102/picture"] = 404
+    assert await camera.async_camera_image() is None
+
+    del emulator.errors["/ISAPI/Streaming/channels/102/picture"]
+    assert (await camera.async_camera_image()).startswith(b"\xff\xd8")
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
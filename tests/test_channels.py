@@ -0,0 +1,85 @@
+"""Test the grouping of streaming channels by camera."""
+from importlib import import_module
+
+from hikvision_isapi_cli.models import RootTypeForXMLStreamingChannel
+from homeassistant.components.camera import async_get_image
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+channels = import_module("custom_components.hikvision-isapi.channels")
+const = import_module("custom_components.hikvision-isapi.const")
+DOMAIN = const.DOMAIN
+
+
+def _channel(channel_id: str, width: int = 1920, enabled: str = "true"):
+    return RootTypeForXMLStreamingChannel.from_dict(
+        {
+            "id": channel_id,
+            "channelName": "Camera",
+            "enabled": enabled,
+            "Video": {
+                "videoResolutionWidth": str(width),
+                "videoResolutionHeight": str(width * 9 // 16),
+            },
+        }
+    )
+
+
+def test_group_channels():
+    """x01 is the main stream, x02 its sub-stream when enabled."""
+    grouped = channels.group_channels(
+        [
+            _channel("101"),
+            _channel("102", 640),
+            _channel("201"),
+            _channel("202", 640, enabled="false"),
+            _channel("303", 640),
+            _channel("main"),
+        ]
+    )
+
+    assert [(camera.main.id, camera.sub and camera.sub.id) for camera in grouped] == [
+        ("main", None),
+        ("101", "102"),
+        ("201", None),
+        ("303", None),
+    ]
+
+
+def test_for_size():
+    """The sub-stream serves every size it covers, the main stream the rest."""
+    camera = channels.CameraChannels(1, _channel("101"), _channel("102", 640))
+
+    assert camera.preview.id == "102"
+    assert camera.for_size().id == "102"
+    assert camera.for_size(320, 180).id == "102"
+    assert camera.for_size(1280).id == "101"
+    assert channels.CameraChannels(2, _channel("201")).for_size().id == "201"
+
+
+async def test_camera_uses_sub_stream(hass, emulator):
+    """One camera per main stream, snapshots come from the sub-stream."""
+    entry = MockConfigEntry(domain=DOMAIN, data=emulator.config, unique_id=emulator.mac)
+    entry.add_to_hass(hass)
+    registry = er.async_get(hass)
+    stale = registry.async_get_or_create(
+        "camera", DOMAIN, "44:47:cc:00:00:01_102_Camera 01", config_entry=entry
+    )
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert registry.async_get(stale.entity_id) is None
+    (entity_id,) = hass.states.async_entity_ids("camera")
+    assert registry.async_get(entity_id).unique_id == "44:47:cc:00:00:01_101_Camera 01"
+    assert hass.states.get(entity_id).attributes["sub_stream"] == "102"
+
+    await async_get_image(hass, entity_id)
+    assert emulator.requests["/ISAPI/Streaming/channels/102/picture"] == 1
+    await async_get_image(hass, entity_id, width=1920)
+    assert emulator.requests["/ISAPI/Streaming/channels/101/picture"] == 1
+
+    camera = hass.data["camera"].get_entity(entity_id)
+    assert (await camera.stream_source()).endswith("/ISAPI/streaming/channels/101")
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,177 @@
+"""Test the config flow."""
+from datetime import timedelta
+from importlib import import_module
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from homeassistant import config_entries
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.util.dt import utcnow
+
+config_flow = import_module("custom_components.hikvision-isapi.config_flow")
+const = import_module("custom_components.hikvision-isapi.const")
+discovery = import_module("custom_components.hikvision-isapi.discovery")
+handoff = import_module("custom_components.hikvision-isapi.handoff")
+
+
+def test_probe_targets():
+    """Networks, ranges and addresses are expanded without duplicates."""
+    assert len(discovery.probe_targets("192.168.1.0/24")) == 254
+    assert discovery.probe_targets("10.0.0.1-10.0.0.3, 10.0.0.2") == [
+        "10.0.0.1",
+        "10.0.0.2",
+        "10.0.0.3",
+    ]
+    for invalid in ("10.0.0.0/16", "10.0.0.300", "10.0.0.1-fe80::1"):
+        with pytest.raises((TypeError, ValueError)):
+            discovery.probe_targets(invalid)
+
+
+async def test_discover_skips_known(hass, emulator):
+    """Configured MACs are not reported again."""
+    args = (["127.0.0.1"], emulator.port, "admin", "password")
+    found = await discovery.async_discover(hass, *args, set())
+    assert list(found) == [emulator.mac]
+    assert found[emulator.mac].host == emulator.host
+    assert await discovery.async_discover(hass, *args, {emulator.mac}) == {}
+
+
+async def test_discover_flow(hass, emulator):
+    """A scanned device is picked and configured."""
+    result = await hass.config_entries.flow.async_init(
+        const.DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    assert result["type"] == FlowResultType.MENU
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"next_step_id": "discover"}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {
+            "network": "127.0.0.1",
+            "port": emulator.port,
+            "username": emulator.username,
+            "password": emulator.password,
+        },
+    )
+    assert result["type"] == FlowResultType.SHOW_PROGRESS
+    await hass.async_block_till_done()
+
+    result = await hass.config_entries.flow.async_configure(result["flow_id"])
+    assert result["step_id"] == "pick"
+    assert result["description_placeholders"] == {"found": "1"}
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"device": emulator.mac}
+    )
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert result["data"]["host"] == emulator.host
+    assert result["data"]["port"] == emulator.port
+    await hass.async_block_till_done()
+
+    entry = hass.config_entries.async_entries(const.DOMAIN)[0]
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_discover_flow_closed_during_scan(hass):
+    """A device found just before the flow is closed is dropped quietly."""
+    device = discovery.DiscoveredDevice(
+        host="http://127.0.0.1", mac="44:47:cc:00:00:01", name="Emulator", model=None
+    )
+
+    async def scan(hass, addresses, port, username, password, known, on_found):
+        on_found(device)
+        # The user closes the flow before the progress form is rendered again.
+        hass.config_entries.flow.async_abort(on_found.__self__.flow_id)
+        return {device.mac: device}
+
+    result = await hass.config_entries.flow.async_init(
+        const.DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"next_step_id": "discover"}
+    )
+    with patch.object(config_flow, "async_discover", scan):
+        await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            {"network": "127.0.0.1", "port": 80, "username": "admin", "password": "x"},
+        )
+        await hass.async_block_till_done()
+
+    assert not hass.config_entries.flow.async_progress()
+
+
+async def test_manual_flow_hands_off_session(hass, emulator):
+    """The entry setup reuses the session and deviceInfo of the flow."""
+    result = await hass.config_entries.flow.async_init(
+        const.DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"next_step_id": "manual"}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], emulator.config
+    )
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    await hass.async_block_till_done()
+
+    assert emulator.requests["/ISAPI/Security/sessionLogin"] == 1
+    assert emulator.requests["/ISAPI/System/deviceInfo"] == 1
+
+    entry = hass.config_entries.async_entries(const.DOMAIN)[0]
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_unused_handoff_expires(hass, emulator):
+    """A validated host nobody takes is stopped."""
+    host = Mock(hostname="device", stop=AsyncMock())
+    handoff.async_get_handoff(hass).async_put(emulator.config, host)
+
+    async_fire_time_changed(hass, utcnow() + timedelta(seconds=const.HANDOFF_TTL))
+    await hass.async_block_till_done()
+    host.stop.assert_awaited_once()
+    assert handoff.async_get_handoff(hass).async_take(emulator.config) is None
+
+
+async def test_options_flow_saves_address_in_data(hass, emulator):
+    """A new address goes to the data, where a later config flow updates it."""
+    # Older options flows saved the address in the options.
+    entry = MockConfigEntry(
+        domain=const.DOMAIN,
+        data={**emulator.config, "host": "http://192.0.2.1"},
+        options={"host": emulator.host},
+        unique_id=emulator.mac,
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert entry.data["host"] == emulator.host
+    assert entry.options == {}
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {**emulator.config, "host": "http://localhost", "latch": 2}
+    )
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    await hass.async_block_till_done()
+
+    assert entry.data["host"] == "http://localhost"
+    assert entry.options["latch"] == 2
+    assert not set(entry.options) & set(const.CONNECTION_KEYS)
+
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, "host": emulator.host}
+    )
+    await hass.async_block_till_done()
+    data = hass.data[const.DOMAIN][entry.entry_id]
+    assert data.config["host"] == emulator.host
+    assert data.config["latch"] == 2
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,40 @@
+"""Test the shared connection pool."""
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+import threading
+
+import httpx
+
+connection = import_module("custom_components.hikvision-isapi.connection")
+
+
+def test_sync_digest_auth_per_thread():
+    """Executor threads never share the nonce state of a DigestAuth."""
+    auth = connection._ThreadLocalDigestAuth("admin", "secret")
+    barrier = threading.Barrier(2)
+
+    def thread_auth():
+        barrier.wait()
+        return auth._auth()
+
+    with ThreadPoolExecutor(2) as executor:
+        first, second = executor.map(lambda _: thread_auth(), range(2))
+
+    assert isinstance(first, httpx.DigestAuth)
+    assert first is not second
+    assert auth._auth() is auth._auth()
+
+
+def test_sync_digest_auth_flow():
+    """The per-thread auth answers a digest challenge like DigestAuth."""
+    auth = connection._ThreadLocalDigestAuth("admin", "secret")
+    request = httpx.Request("GET", "http://127.0.0.1/ISAPI/System/status")
+    flow = auth.sync_auth_flow(request)
+
+    assert "Authorization" not in next(flow).headers
+    challenge = httpx.Response(
+        401,
+        headers={"WWW-Authenticate": 'Digest realm="r", nonce="n", qop="auth"'},
+        request=request,
+    )
+    assert flow.send(challenge).headers["Authorization"].startswith("Digest ")
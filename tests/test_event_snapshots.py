@@ -0,0 +1,99 @@
+"""Test the frames captured on device events."""
+import asyncio
+from importlib import import_module
+
+from aiohttp.test_utils import make_mocked_request
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+const = import_module("custom_components.hikvision-isapi.const")
+event_snapshots = import_module("custom_components.hikvision-isapi.event_snapshots")
+snapshot = import_module("custom_components.hikvision-isapi.snapshot")
+DOMAIN = const.DOMAIN
+
+CALL = """<EventNotificationAlert version="2.0" xmlns="http://www.isapi.org/ver20/XMLSchema">
+<channelID>1</channelID>
+<eventType>videoIntercomEvent</eventType>
+<eventState>active</eventState>
+</EventNotificationAlert>"""
+
+
+def test_ring_buffer_is_bounded():
+    """The oldest frame goes once the buffer is full, the latest comes first."""
+    snapshots = event_snapshots.EventSnapshots(size=2)
+    for index in range(3):
+        snapshots.add("motion", bytes([index]))
+
+    assert len(snapshots) == 2
+    assert snapshots.get(0).image == b"\x02"
+    assert snapshots.get(1).image == b"\x01"
+    assert snapshots.get(2) is None
+    assert [frame["kind"] for frame in snapshots.as_list()] == ["motion", "motion"]
+
+    assert snapshots.claim("call")
+    assert not snapshots.claim("call")
+    assert snapshots.claim("motion")
+
+
+async def test_fresh_fetch_does_not_join_an_older_one(hass):
+    """max_age=0 starts its own fetch, later callers join the newest one."""
+    snapshots = snapshot.HikvisionSnapshots(hass)
+    release = asyncio.Event()
+    frames = iter((b"before", b"after"))
+
+    async def fetch() -> bytes:
+        frame = next(frames)
+        await release.wait()
+        return frame
+
+    older = hass.async_create_task(snapshots.async_get("key", fetch))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0.001)
+    fresh = hass.async_create_task(snapshots.async_get("key", fetch, max_age=0))
+    await asyncio.sleep(0)
+    joined = hass.async_create_task(snapshots.async_get("key", fetch))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await older == b"before"
+    assert await fresh == b"after"
+    assert await joined == b"after"
+    assert await snapshots.async_get("key", fetch) == b"after"
+    assert snapshots.misses == 2
+
+
+async def test_call_captures_a_frame(hass, emulator):
+    """A doorbell call fetches a fresh sub-stream frame into the buffer."""
+    entry = MockConfigEntry(domain=DOMAIN, data=emulator.config, unique_id=emulator.mac)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    (entity_id,) = hass.states.async_entity_ids("camera")
+    camera = hass.data["camera"].get_entity(entity_id)
+
+    async with asyncio.timeout(5):
+        while not emulator._subscribers:
+            await asyncio.sleep(0.01)
+        emulator.push_event(CALL)
+        emulator.push_event(CALL)
+        while not len(camera.event_snapshots):
+            await asyncio.sleep(0.01)
+    await hass.async_block_till_done()
+
+    assert len(camera.event_snapshots) == 1
+    assert emulator.requests["/ISAPI/Streaming/channels/102/picture"] == 1
+    assert hass.states.get(entity_id).attributes["event_snapshots"][0]["kind"] == "call"
+    # The frame is cached, the next image request does not reach the device.
+    frame = camera.event_snapshots.get().image
+    assert await camera.async_camera_image() == frame
+    assert await camera.async_camera_image(320, 180) == frame
+    assert emulator.requests["/ISAPI/Streaming/channels/102/picture"] == 1
+
+    view = event_snapshots.HikvisionEventSnapshotView()
+    request = make_mocked_request("GET", "/", app={"hass": hass})
+    response = await view.get(request, entity_id, "0")
+    assert response.body == camera.event_snapshots.get().image
+    assert (await view.get(request, entity_id, "1")).status == 404
+    assert (await view.get(request, "camera.missing", "0")).status == 404
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
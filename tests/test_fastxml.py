@@ -0,0 +1,36 @@
+"""Test the field scan used for the hot ISAPI responses."""
+from importlib import import_module
+
+fastxml = import_module("custom_components.hikvision-isapi.fastxml")
+isapi = import_module("custom_components.hikvision-isapi.isapi")
+
+
+def test_scan_fields():
+    """Leaf elements are found at any depth, repeated ones keep every value."""
+    fields = fastxml.scan(
+        b'<Root xmlns="urn:x"><a>1</a><Nested><b> 2 </b><a>3</a></Nested>'
+        b"<c/><d>ignored</d></Root>",
+        {"a", "b", "c", "Nested"},
+    )
+    assert fields.root == "Root"
+    assert fields.getall("a") == ["1", "3"]
+    assert fields.get("b") == "2"
+    assert "c" in fields and fields.get("c") is None
+    assert "d" not in fields
+
+
+def test_work_status_door_lists():
+    """Repeated and comma separated door lists give the same status."""
+    for doors in (
+        "<doorLockStatus>0</doorLockStatus><doorLockStatus>1</doorLockStatus>",
+        "<doorLockStatus>0,1</doorLockStatus>",
+    ):
+        body = (
+            f"<AcsWorkStatus>{doors}<magneticStatus>1</magneticStatus>"
+            "<antiSneakStatus>close</antiSneakStatus></AcsWorkStatus>"
+        ).encode()
+        assert isapi.AcsWorkStatus.from_xml(body) == isapi.AcsWorkStatus(
+            door_lock_status=["0", "1"],
+            magnetic_status=["1"],
+            anti_sneak_status="close",
+        )
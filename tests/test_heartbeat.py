@@ -0,0 +1,32 @@
+"""Test the session heartbeat scheduler."""
+import asyncio
+from datetime import timedelta
+from importlib import import_module
+
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+heartbeat = import_module("custom_components.hikvision-isapi.heartbeat")
+
+
+async def test_stop_during_heartbeat(hass):
+    """A heartbeat in flight when stopped does not schedule another one."""
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def beat() -> bool:
+        started.set()
+        await release.wait()
+        return True
+
+    scheduler = heartbeat.HeartbeatScheduler(hass, 10, beat, lambda: 0.0)
+    scheduler.start()
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=20))
+    await asyncio.wait_for(started.wait(), 5)
+
+    scheduler.stop()
+    release.set()
+    await hass.async_block_till_done()
+
+    assert scheduler.sent == 1
+    assert scheduler._unsub is None
@@ -1,9 +1,161 @@
 """Test component setup."""
+import asyncio
+from importlib import import_module
+from unittest.mock import patch
+
+import httpx
+
 from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.hikvision-isapi.const import DOMAIN
+const = import_module("custom_components.hikvision-isapi.const")
+host_module = import_module("custom_components.hikvision-isapi.host")
+DOMAIN = const.DOMAIN
+DOMAIN_MODULE = "custom_components.hikvision-isapi"
 
 
 async def test_async_setup(hass):
     """Test the component gets setup."""
     assert await async_setup_component(hass, DOMAIN, {}) is True
+
+
+async def test_setup_and_unload_entry(hass, emulator):
+    """An entry pointing at the emulator creates locks, cameras and sensors."""
+    entry = MockConfigEntry(domain=DOMAIN, data=emulator.config, unique_id=emulator.mac)
+    entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert hass.states.get("lock.emulator_01_1").state == "locked"
+    assert len(hass.states.async_entity_ids("camera")) == 1
+    assert hass.states.get("sensor.emulator_01_tamper").state == "closed"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_setup_retries_on_unreachable_device(hass, emulator):
+    """An offline device leaves the entry in setup retry."""
+    emulator.offline = True
+    entry = MockConfigEntry(domain=DOMAIN, data=emulator.config, unique_id=emulator.mac)
+    entry.add_to_hass(hass)
+
+    assert not await hass.config_entries.async_setup(entry.entry_id)
+    assert entry.state.value == "setup_retry"
+
+
+async def test_setup_retries_on_odd_login_reply(hass, emulator):
+    """A login reply without the expected fields leaves the entry in retry."""
+    entry = MockConfigEntry(domain=DOMAIN, data=emulator.config, unique_id=emulator.mac)
+    entry.add_to_hass(hass)
+
+    with patch.object(host_module.Session, "start", side_effect=KeyError("sessionID")):
+        assert not await hass.config_entries.async_setup(entry.entry_id)
+    assert entry.state.value == "setup_retry"
+
+
+async def test_failed_first_refresh_stops_host(hass, emulator):
+    """A setup retry after the first status read fails closes the session."""
+    entry = MockConfigEntry(domain=DOMAIN, data=emulator.config, unique_id=emulator.mac)
+    entry.add_to_hass(hass)
+    stop = host_module.HikvisionHost.stop
+
+    with patch.object(
+        host_module.HikvisionHost,
+        "update_states",
+        side_effect=httpx.ConnectError("unreachable"),
+    ), patch.object(
+        host_module.HikvisionHost, "stop", autospec=True, side_effect=stop
+    ) as stopped:
+        assert not await hass.config_entries.async_setup(entry.entry_id)
+
+    assert entry.state.value == "setup_retry"
+    stopped.assert_awaited_once()
+    assert not stopped.call_args.args[0].alert_stream.running
+
+
+async def test_revalidation_logs_in_once(hass, emulator):
+    """A host set up from cache opens one session, and retries odd replies."""
+    entry = MockConfigEntry(domain=DOMAIN, data=emulator.config, unique_id=emulator.mac)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    emulator.expire_sessions()
+    emulator.requests.clear()
+    init = host_module.HikvisionHost.async_init
+    calls = []
+
+    async def flaky_init(host):
+        calls.append(host)
+        if len(calls) == 1:
+            raise KeyError("sessionID")
+        return await init(host)
+
+    with patch.object(
+        host_module.HikvisionHost, "async_init", autospec=True, side_effect=flaky_init
+    ), patch.object(import_module(DOMAIN_MODULE), "CAPABILITY_RETRY_MIN", 0):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        async with asyncio.timeout(5):
+            while emulator.requests["/ISAPI/System/deviceInfo"] == 0:
+                await asyncio.sleep(0.01)
+        await hass.async_block_till_done()
+
+    assert len(calls) == 2
+    assert emulator.requests["/ISAPI/Security/sessionLogin"] == 1
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_options_applied_in_place(hass, emulator):
+    """Options other than the address and login do not reconnect."""
+    entry = MockConfigEntry(domain=DOMAIN, data=emulator.config, unique_id=emulator.mac)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    data = hass.data[DOMAIN][entry.entry_id]
+
+    hass.config_entries.async_update_entry(
+        entry, options={**entry.data, "latch": 3, "keepalive": 20, "max_requests": 5}
+    )
+    await hass.async_block_till_done()
+    assert hass.data[DOMAIN][entry.entry_id] is data
+    assert emulator.requests["/ISAPI/Security/sessionLogin"] == 1
+    assert data.device_coordinator.update_interval.total_seconds() == 20
+    assert data.host.heartbeat.interval == 20
+    assert data.host.scheduler.max_in_flight == 5
+    lock = hass.data["lock"].get_entity("lock.emulator_01_1")
+    assert lock._latch == 3
+
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, "host": "http://localhost"}
+    )
+    await hass.async_block_till_done()
+    assert hass.data[DOMAIN][entry.entry_id] is not data
+    assert emulator.requests["/ISAPI/Security/sessionLogin"] == 2
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_rtsp_snapshot_mode_migrated(hass, emulator):
+    """Entries on the retired rtsp snapshot mode move to http."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={**emulator.config, const.CONF_SNAPSHOT_MODE: "rtsp"},
+        options={const.CONF_SNAPSHOT_MODE: "rtsp", "latch": 2},
+        unique_id=emulator.mac,
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.data[const.CONF_SNAPSHOT_MODE] == const.SNAPSHOT_MODE_HTTP
+    assert entry.options == {const.CONF_SNAPSHOT_MODE: const.SNAPSHOT_MODE_HTTP, "latch": 2}
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,37 @@
+"""Test the door lock entity."""
+from datetime import timedelta
+from importlib import import_module
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from homeassistant.util import dt as dt_util
+
+const = import_module("custom_components.hikvision-isapi.const")
+
+
+async def test_relocks_after_latch_without_status(hass, emulator):
+    """Without AcsWorkStatus the latch alone brings the door back to locked."""
+    emulator.errors["/ISAPI/AccessControl/AcsWorkStatus"] = 404
+    entry = MockConfigEntry(
+        domain=const.DOMAIN,
+        data={**emulator.config, const.CONF_DOOR_LATCH: 1},
+        unique_id=emulator.mac,
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert hass.states.get("lock.emulator_01_1").state == "locked"
+
+    await hass.services.async_call(
+        "lock", "unlock", {"entity_id": "lock.emulator_01_1"}, blocking=True
+    )
+    assert hass.states.get("lock.emulator_01_1").state == "unlocked"
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=2))
+    await hass.async_block_till_done()
+    assert hass.states.get("lock.emulator_01_1").state == "locked"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
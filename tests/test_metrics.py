@@ -0,0 +1,57 @@
+"""Test the request statistics and their diagnostics."""
+from importlib import import_module
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+const = import_module("custom_components.hikvision-isapi.const")
+diagnostics = import_module("custom_components.hikvision-isapi.diagnostics")
+metrics = import_module("custom_components.hikvision-isapi.metrics")
+
+
+def test_endpoint_ids_are_folded():
+    """Channel and door numbers do not create new endpoints."""
+    assert (
+        metrics.endpoint("http://host:80/ISAPI/Streaming/channels/101/picture?a=1")
+        == "/ISAPI/Streaming/channels/{id}/picture"
+    )
+    assert (
+        metrics.endpoint("http://host:80/ISAPI/AccessControl/RemoteControl/door/2")
+        == "/ISAPI/AccessControl/RemoteControl/door/{id}"
+    )
+
+
+def test_histogram_quantiles():
+    """Quantiles are interpolated within the fixed latency buckets."""
+    stats = metrics.EndpointStats()
+    for _ in range(90):
+        stats.record(0.005, False)
+    for _ in range(10):
+        stats.record(0.2, True)
+
+    assert stats.count == 100
+    assert stats.errors == 10
+    assert stats.quantile(0.5) < 10
+    assert 100 < stats.quantile(0.95) <= 250
+    assert sum(stats.buckets) == 100
+
+
+async def test_diagnostics(hass, emulator):
+    """Diagnostics carry per-endpoint statistics without credentials."""
+    emulator.errors["/ISAPI/AccessControl/AcsWorkStatus"] = 500
+    entry = MockConfigEntry(
+        domain=const.DOMAIN, data=emulator.config, unique_id=emulator.mac
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    result = await diagnostics.async_get_config_entry_diagnostics(hass, entry)
+
+    assert result["entry"]["data"]["password"] == "**REDACTED**"
+    assert result["circuit_state"] == "closed"
+    requests = result["requests"]
+    assert requests["/ISAPI/System/deviceInfo"]["count"] == 1
+    assert requests["/ISAPI/AccessControl/AcsWorkStatus"]["errors"] >= 1
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
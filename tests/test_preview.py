@@ -0,0 +1,113 @@
+"""Test the shared MJPEG preview relay."""
+import asyncio
+from importlib import import_module
+
+from aiohttp import ClientSession, web
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+const = import_module("custom_components.hikvision-isapi.const")
+DOMAIN = const.DOMAIN
+
+
+async def _setup(hass, emulator):
+    entry = MockConfigEntry(domain=DOMAIN, data=emulator.config, unique_id=emulator.mac)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry, hass.data[DOMAIN][entry.entry_id].host
+
+
+async def _until(predicate):
+    async with asyncio.timeout(5):
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+
+async def test_viewers_share_one_upstream(hass, emulator):
+    """Every viewer gets the same chunks, the device sees one connection."""
+    entry, host = await _setup(hass, emulator)
+    stream = host.previews.stream("101")
+
+    first = stream.subscribe()
+    second = stream.subscribe()
+    content_type = await stream.async_content_type()
+    assert content_type.startswith("multipart/x-mixed-replace")
+
+    chunks = [await first.get() for _ in range(3)]
+    assert [await second.get() for _ in range(3)] == chunks
+    assert b"\xff\xd8" in b"".join(chunks)
+    assert emulator.requests["/ISAPI/Streaming/channels/101/httpPreview"] == 1
+    assert emulator.previews == 1
+
+    stream.unsubscribe(first)
+    assert stream.connected
+    stream.unsubscribe(second)
+    assert not stream.connected
+    await _until(lambda: emulator.previews == 0)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_resubscribe_after_last_viewer(hass, emulator):
+    """A viewer joining right after the last one left is not ended."""
+    entry, host = await _setup(hass, emulator)
+    stream = host.previews.stream("101")
+
+    first = stream.subscribe()
+    assert await stream.async_content_type()
+    stream.unsubscribe(first)
+    second = stream.subscribe()
+    assert await stream.async_content_type()
+    await asyncio.sleep(0.05)
+
+    assert (await second.get()) is not None
+    stream.unsubscribe(second)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_unknown_channel_has_no_preview(hass, emulator):
+    """A failing upstream ends the wait of the viewer instead of hanging."""
+    entry, host = await _setup(hass, emulator)
+    stream = host.previews.stream("999")
+
+    viewer = stream.subscribe()
+    assert await stream.async_content_type() is None
+    assert await viewer.get() is None
+    stream.unsubscribe(viewer)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_camera_mjpeg_stream(hass, emulator):
+    """The camera relays the device multipart as is to each of its viewers."""
+    entry, _host = await _setup(hass, emulator)
+    entity_id = sorted(hass.states.async_entity_ids("camera"))[0]
+    camera = hass.data["camera"].get_entity(entity_id)
+
+    app = web.Application()
+    app.router.add_get("/", camera.handle_async_mjpeg_stream)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"
+
+    async with ClientSession() as session:
+        responses = [await session.get(url) for _ in range(2)]
+        for response in responses:
+            assert response.content_type == "multipart/x-mixed-replace"
+            assert b"\xff\xd8" in await response.content.readexactly(200)
+        assert emulator.previews == 1
+
+        for response in responses:
+            response.close()
+        await _until(lambda: emulator.previews == 0)
+
+    await runner.cleanup()
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
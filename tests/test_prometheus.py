@@ -0,0 +1,38 @@
+"""Test the Prometheus metrics view."""
+from importlib import import_module
+from unittest.mock import Mock
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+const = import_module("custom_components.hikvision-isapi.const")
+prometheus = import_module("custom_components.hikvision-isapi.prometheus")
+
+
+async def test_metrics_view(hass, emulator):
+    """The view renders the counters of every configured host."""
+    entry = MockConfigEntry(
+        domain=const.DOMAIN, data=emulator.config, unique_id=emulator.mac
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    view = prometheus.HikvisionMetricsView()
+    response = await view.get(Mock(app={"hass": hass}))
+    assert response.status == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    body = response.body.decode()
+
+    device = f'device="{emulator.mac}"'
+    endpoint = 'endpoint="/ISAPI/System/deviceInfo"'
+    assert "# TYPE hikvision_isapi_request_duration_seconds histogram" in body
+    assert f"hikvision_isapi_requests_total{{{device},{endpoint}}} 1" in body
+    assert (
+        f'hikvision_isapi_request_duration_seconds_bucket{{{device},{endpoint},le="+Inf"}} 1'
+        in body
+    )
+    assert f'hikvision_isapi_circuit_state{{{device},state="closed"}} 1' in body
+    assert f"hikvision_isapi_heartbeats_total{{{device}}} 0" in body
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
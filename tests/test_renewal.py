@@ -0,0 +1,56 @@
+"""Test the single-flight session renewal."""
+import asyncio
+from http import HTTPStatus
+from importlib import import_module
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+const = import_module("custom_components.hikvision-isapi.const")
+isapi = import_module("custom_components.hikvision-isapi.isapi")
+renewal = import_module("custom_components.hikvision-isapi.renewal")
+
+
+async def test_concurrent_callers_share_one_login():
+    """Only the first rejected request logs in, a failure is not retried."""
+    logins = []
+
+    async def login() -> bool:
+        logins.append(None)
+        await asyncio.sleep(0.01)
+        return len(logins) == 1
+
+    session = renewal.SessionRenewal(login)
+    assert await asyncio.gather(*(session.async_renew(0) for _ in range(5))) == [
+        True
+    ] * 5
+    assert (session.logins, session.joined, session.generation) == (1, 4, 1)
+
+    # Sent before the login completed, retried without another one.
+    assert await session.async_renew(0)
+    assert session.logins == 1
+
+    assert not await session.async_renew(1)
+    assert not await session.async_renew(1)
+    assert (session.logins, session.failed) == (2, 1)
+
+
+async def test_expired_session_is_renewed(hass, emulator):
+    """Requests rejected after a reboot succeed after a single login."""
+    entry = MockConfigEntry(
+        domain=const.DOMAIN, data=emulator.config, unique_id=emulator.mac
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    host = hass.data[const.DOMAIN][entry.entry_id].host
+
+    emulator.expire_sessions()
+    responses = await asyncio.gather(
+        *(isapi.acs_work_status(client=host.api) for _ in range(4))
+    )
+    assert all(response.status_code == HTTPStatus.OK for response in responses)
+    assert emulator.requests["/ISAPI/Security/sessionLogin"] == 2
+    assert host.renewal.logins == 1
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
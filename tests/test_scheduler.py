@@ -0,0 +1,63 @@
+"""Test the per-host request scheduler."""
+import asyncio
+from importlib import import_module
+
+scheduler = import_module("custom_components.hikvision-isapi.scheduler")
+RequestPriority = scheduler.RequestPriority
+
+
+async def test_waiters_are_served_by_priority():
+    """Door control overtakes snapshots and heartbeats queued before it."""
+    requests = scheduler.RequestScheduler(1)
+    order = []
+    release = asyncio.Event()
+
+    async def request(name, priority):
+        async with requests.slot(priority):
+            order.append(name)
+            if name == "first":
+                await release.wait()
+
+    first = asyncio.create_task(request("first", RequestPriority.STATUS))
+    await asyncio.sleep(0)
+    queued = [
+        asyncio.create_task(request("heartbeat", RequestPriority.HEARTBEAT)),
+        asyncio.create_task(request("snapshot", RequestPriority.SNAPSHOT)),
+        asyncio.create_task(request("door", RequestPriority.DOOR_CONTROL)),
+    ]
+    await asyncio.sleep(0)
+    assert requests.in_flight == 1
+
+    release.set()
+    await asyncio.gather(first, *queued)
+
+    assert order == ["first", "door", "snapshot", "heartbeat"]
+    assert requests.in_flight == 0
+
+
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    """A waiter cancelled while queued leaves the slot count untouched."""
+    requests = scheduler.RequestScheduler(1)
+    release = asyncio.Event()
+
+    async def hold():
+        async with requests.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    release.set()
+    await holder
+    await asyncio.gather(waiter, return_exceptions=True)
+
+    assert requests.in_flight == 0
+
+
+async def test_context_priority_is_used_by_default():
+    """request_priority sets the class of nested requests."""
+    with scheduler.request_priority(RequestPriority.DOOR_CONTROL):
+        assert scheduler._PRIORITY.get() is RequestPriority.DOOR_CONTROL
+    assert scheduler._PRIORITY.get() is RequestPriority.STATUS
@@ -0,0 +1,100 @@
+"""Test the diff-based user and card index."""
+from importlib import import_module
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+
+const = import_module("custom_components.hikvision-isapi.const")
+
+
+async def test_user_index_sync(hass, emulator):
+    """Only changed records are replaced, unchanged devices cost one count."""
+    emulator.users = [
+        {"employeeNo": str(number), "name": f"User {number}", "userType": "normal"}
+        for number in range(1, 46)
+    ]
+    emulator.cards = [{"employeeNo": "1", "cardNo": "0001", "cardType": "normalCard"}]
+    entry = MockConfigEntry(
+        domain=const.DOMAIN, data=emulator.config, unique_id=emulator.mac
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    users = hass.data[const.DOMAIN][entry.entry_id].users
+    assert len(users.users) == 45
+    assert users.search("0001")[0]["name"] == "User 1"
+
+    emulator.users[3]["name"] = "Renamed"
+    del emulator.users[10]
+    emulator.users.append({"employeeNo": "99", "name": "Newcomer"})
+    assert await users.async_sync() == (1, 1, 1)
+    assert await users.async_sync() == (0, 0, 0)
+
+    emulator.requests.clear()
+    await users._async_check()
+    assert set(emulator.requests) == {"/ISAPI/AccessControl/UserInfo/Count"}
+
+    # A new card or face changes the totals of the same single request.
+    emulator.cards.append({"employeeNo": "2", "cardNo": "0002"})
+    emulator.users[0]["numOfFace"] = 1
+    await users._async_check()
+    assert users.search("0002")[0]["employee_no"] == "2"
+    assert users.users["1"]["numOfFace"] == 1
+    assert users._data()["synced_at"] > 0
+
+    emulator.errors["/ISAPI/AccessControl/UserInfo/Search"] = 500
+    response = await hass.services.async_call(
+        const.DOMAIN,
+        const.SERVICE_SYNC_USERS,
+        {},
+        blocking=True,
+        return_response=True,
+    )
+    assert "error" in response[emulator.mac]
+    del emulator.errors["/ISAPI/AccessControl/UserInfo/Search"]
+
+    response = await hass.services.async_call(
+        const.DOMAIN,
+        const.SERVICE_SEARCH_USERS,
+        {"query": "renamed"},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["users"][0]["employee_no"] == "4"
+    assert response["users"][0]["mac"] == emulator.mac
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_user_index_without_card_search(hass, emulator, hass_storage):
+    """Users are still indexed and saved when only the card search is missing."""
+    emulator.users = [{"employeeNo": "1", "name": "Alice"}]
+    emulator.errors["/ISAPI/AccessControl/CardInfo/Search"] = 404
+    entry = MockConfigEntry(
+        domain=const.DOMAIN, data=emulator.config, unique_id=emulator.mac
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    users = hass.data[const.DOMAIN][entry.entry_id].users
+    assert users.search("alice")[0]["employee_no"] == "1"
+
+    emulator.users.append({"employeeNo": "2", "name": "Bob"})
+    emulator.requests.clear()
+    await users._async_check()
+    assert users.search("bob")[0]["employee_no"] == "2"
+    # The card search is not asked again.
+    assert "/ISAPI/AccessControl/CardInfo/Search" not in emulator.requests
+
+    # Flush the delayed save of the full sync.
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+    key = f"{const.DOMAIN}.{emulator.mac.replace(':', '')}.users"
+    assert set(hass_storage[key]["data"]["users"]) == {"1", "2"}
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()